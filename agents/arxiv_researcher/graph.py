@@ -45,7 +45,7 @@ class ArxivResearchAgent:
             model (str, optional): Language model to use
         """
         # Initialize Language Model
-        self.llm = load_chat_model(config.model, config.model_kwargs)
+        self.llm = load_chat_model(config.model, config.model_kwargs, config=config)
 
         # Create Arxiv Tool
         self.arxiv_tool = ArxivQueryRun(
@@ -0,0 +1,140 @@
+"""Submit queued batch requests and resume the graph runs waiting on them.
+
+Run alongside the LangGraph server:
+
+    python -m agents.batch.poller --langgraph-url http://localhost:2024
+
+Use `--batch-api-url http://localhost:8010/v1` to work against the local stand-in
+batch server (`agents.batch.server`) instead of the provider.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+
+from langgraph_sdk import get_client
+from openai import OpenAI
+
+from agents.batch.utils import BATCH_ENDPOINT, BatchLedger
+
+logger = logging.getLogger(__name__)
+
+FINISHED_BATCH_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def submit_queued(ledger: BatchLedger, client: OpenAI, api_url: str = "") -> None:
+    """Submit every request queued for this batch API in a single batch.
+
+    Requests queued for another API (a graph whose `batch_api_url` differs from the
+    poller's `--batch-api-url`) are left alone and reported.
+    """
+    for other_url, count in ledger.queued_elsewhere(api_url).items():
+        logger.warning(
+            f"{count} requests are queued for batch API {other_url or 'OpenAI'}, "
+            f"which this poller ({api_url or 'OpenAI'}) does not serve"
+        )
+    queued = ledger.queued(api_url)
+    if not queued:
+        return
+    lines = [
+        json.dumps(
+            {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+        )
+        for custom_id, body in queued
+    ]
+    input_file = client.files.create(
+        file=("batch.jsonl", "\n".join(lines).encode()), purpose="batch"
+    )
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+    ledger.mark_submitted([custom_id for custom_id, _ in queued], batch.id)
+    logger.info(f"Submitted {len(queued)} requests in batch {batch.id}")
+
+
+def collect_results(ledger: BatchLedger, client: OpenAI) -> None:
+    """Store the results of finished batches in the ledger."""
+    for batch_id in ledger.submitted_batches():
+        batch = client.batches.retrieve(batch_id)
+        if batch.status not in FINISHED_BATCH_STATUSES:
+            continue
+        for file_id, failed in ((batch.output_file_id, False), (batch.error_file_id, True)):
+            if not file_id:
+                continue
+            for line in client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    result = json.loads(line)
+                    ledger.complete(result["custom_id"], result, failed=failed)
+        # anything without an output line failed with the batch
+        ledger.fail_batch(batch_id, f"Batch {batch_id} finished with status {batch.status}")
+        logger.info(f"Collected results of batch {batch_id} ({batch.status})")
+
+
+async def resume_ready(ledger: BatchLedger, langgraph_url: str) -> None:
+    """Resume every paused thread whose requests have all finished."""
+    client = get_client(url=langgraph_url)
+    for wait_id, thread_id, assistant_id, results in ledger.ready_waits():
+        await client.runs.create(
+            thread_id, assistant_id, command={"resume": results}
+        )
+        ledger.mark_resumed(wait_id)
+        logger.info(f"Resumed thread {thread_id} with {len(results)} batch results")
+
+
+async def poll(
+    ledger: BatchLedger,
+    client: OpenAI,
+    langgraph_url: str,
+    interval: float,
+    api_url: str = "",
+) -> None:
+    """Submit, collect and resume forever."""
+    while True:
+        try:
+            await asyncio.to_thread(submit_queued, ledger, client, api_url)
+            await asyncio.to_thread(collect_results, ledger, client)
+            await resume_ready(ledger, langgraph_url)
+        except Exception as e:
+            logger.error(f"Batch polling failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def main() -> None:
+    """Run the poller from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ledger", default="~/.eminence-builder/batch.sqlite")
+    parser.add_argument("--langgraph-url", default="http://localhost:2024")
+    parser.add_argument(
+        "--batch-api-url",
+        default=None,
+        help="Base URL of an OpenAI compatible batch API. Defaults to OpenAI.",
+    )
+    parser.add_argument("--interval", type=float, default=30.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.batch_api_url:
+        # the stand-in server does not check keys
+        client = OpenAI(
+            base_url=args.batch_api_url,
+            api_key=os.getenv("OPENAI_API_KEY", "stand-in"),
+        )
+    else:
+        client = OpenAI()
+    asyncio.run(
+        poll(
+            BatchLedger(args.ledger),
+            client,
+            args.langgraph_url,
+            args.interval,
+            args.batch_api_url or "",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
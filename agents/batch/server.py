@@ -0,0 +1,164 @@
+"""Local stand-in for the OpenAI batch API, for testing batch mode offline.
+
+Implements the subset of the files and batches endpoints used by the poller.  Each
+request is answered by echoing the text of its last user message, after a delay, so
+graphs can be driven end to end without network access or cost.
+
+    uvicorn agents.batch.server:app --port 8010
+
+Then point the poller at it with `--batch-api-url http://localhost:8010/v1`.
+"""
+
+import json
+import os
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+
+from fastapi import FastAPI, HTTPException, Request, Response
+
+# seconds before a batch is reported as completed
+COMPLETION_DELAY_SECONDS = float(os.getenv("BATCH_STANDIN_DELAY", "5"))
+
+app = FastAPI(title="Batch API stand-in")
+files: dict[str, dict] = {}
+batches: dict[str, dict] = {}
+
+
+def _parse_multipart(content_type: str, body: bytes) -> dict[str, tuple[str, bytes]]:
+    """Return {field name: (filename, content)} for a multipart/form-data body."""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    return {
+        part.get_param("name", header="content-disposition"): (
+            part.get_filename() or "",
+            part.get_payload(decode=True),
+        )
+        for part in message.iter_parts()
+    }
+
+
+def _store_file(filename: str, content: bytes, purpose: str) -> dict:
+    file_id = f"file-{uuid.uuid4().hex}"
+    files[file_id] = {
+        "id": file_id,
+        "object": "file",
+        "bytes": len(content),
+        "created_at": int(time.time()),
+        "filename": filename,
+        "purpose": purpose,
+        "status": "processed",
+        "content": content,
+    }
+    return {k: v for k, v in files[file_id].items() if k != "content"}
+
+
+def _last_user_text(messages: list[dict]) -> str:
+    for message in reversed(messages):
+        if message.get("role") != "user":
+            continue
+        content = message.get("content")
+        if isinstance(content, str):
+            return content
+        return "\n".join(
+            block.get("text", "") for block in content if block.get("type") == "text"
+        )
+    return ""
+
+
+def _answer(request: dict) -> dict:
+    text = _last_user_text(request["body"].get("messages", []))
+    return {
+        "id": f"batch_req_{uuid.uuid4().hex}",
+        "custom_id": request["custom_id"],
+        "response": {
+            "status_code": 200,
+            "request_id": uuid.uuid4().hex,
+            "body": {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request["body"].get("model"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": text},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "total_tokens": 0,
+                },
+            },
+        },
+        "error": None,
+    }
+
+
+def _process(batch: dict) -> None:
+    """Answer every request of a batch and attach the output file."""
+    lines = files[batch["input_file_id"]]["content"].decode().splitlines()
+    requests = [json.loads(line) for line in lines if line.strip()]
+    output = "\n".join(json.dumps(_answer(request)) for request in requests)
+    batch["output_file_id"] = _store_file("output.jsonl", output.encode(), "batch_output")["id"]
+    batch["status"] = "completed"
+    batch["completed_at"] = int(time.time())
+    batch["request_counts"] = {
+        "total": len(requests),
+        "completed": len(requests),
+        "failed": 0,
+    }
+
+
+@app.post("/v1/files")
+async def create_file(request: Request):
+    form = _parse_multipart(request.headers["content-type"], await request.body())
+    if "file" not in form:
+        raise HTTPException(status_code=400, detail="Missing file.")
+    filename, content = form["file"]
+    purpose = form.get("purpose", ("", b"batch"))[1].decode()
+    return _store_file(filename, content, purpose)
+
+
+@app.get("/v1/files/{file_id}/content")
+async def file_content(file_id: str):
+    if file_id not in files:
+        raise HTTPException(status_code=404, detail="File not found.")
+    return Response(content=files[file_id]["content"], media_type="application/jsonl")
+
+
+@app.post("/v1/batches")
+async def create_batch(request: Request):
+    params = await request.json()
+    if params.get("input_file_id") not in files:
+        raise HTTPException(status_code=400, detail="Unknown input file.")
+    batch_id = f"batch_{uuid.uuid4().hex}"
+    batches[batch_id] = {
+        "id": batch_id,
+        "object": "batch",
+        "endpoint": params["endpoint"],
+        "input_file_id": params["input_file_id"],
+        "completion_window": params.get("completion_window", "24h"),
+        "status": "in_progress",
+        "created_at": int(time.time()),
+        "output_file_id": None,
+        "error_file_id": None,
+    }
+    return batches[batch_id]
+
+
+@app.get("/v1/batches/{batch_id}")
+async def retrieve_batch(batch_id: str):
+    batch = batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found.")
+    if (
+        batch["status"] == "in_progress"
+        and time.time() - batch["created_at"] >= COMPLETION_DELAY_SECONDS
+    ):
+        _process(batch)
+    return batch
@@ -0,0 +1,365 @@
+"""Batch execution mode for non-interactive model calls.
+
+When `batch_mode` is enabled, nodes such as `generate_report` or `validate_images`
+do not call the model directly.  Their requests are queued in a local ledger and the
+graph is paused with an interrupt.  The poller (`python -m agents.batch.poller`)
+submits queued requests to the provider batch endpoint, waits for the results and
+resumes each paused thread with them.
+
+Only models of the providers listed in `batch_providers` are queued, and only if
+their request can be sent as is: OpenAI models carry their bound tools, response
+format and sampling parameters into the batch body, while models of other providers
+are only batched without bound arguments.  Everything else is called directly.  Each
+request records the batch API it is meant for, and the poller only submits the
+requests of the API it talks to.
+
+Classes:
+    BatchLedger: SQLite record of queued requests, submitted batches and paused threads.
+
+Functions:
+    get_batch_ledger: Return the shared ledger for a configuration.
+    batch_body: Build the chat completions body a model would send for the messages.
+    invoke_chat_models: Call a model for several requests, through the batch endpoint in batch mode.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, convert_to_openai_messages
+from langchain_core.runnables import RunnableBinding, ensure_config
+from langchain_openai.chat_models.base import BaseChatOpenAI
+from langgraph.types import interrupt
+
+from agents.chat_models import HedgedChatModel, RateLimitedChatModel
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+
+class BatchLedger:
+    """SQLite record of queued requests, submitted batches and paused threads.
+
+    Requests move through the statuses queued -> submitted -> completed (or failed).
+    A wait groups the requests one node is paused on; it is resumed once all of its
+    requests have finished.
+    """
+
+    def __init__(self, path: str):
+        """Open (or create) the ledger database at the given path."""
+        self.path = os.path.expanduser(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS requests (
+                custom_id TEXT PRIMARY KEY,
+                api_url TEXT NOT NULL DEFAULT '',
+                body TEXT NOT NULL,
+                status TEXT NOT NULL,
+                batch_id TEXT,
+                result TEXT,
+                created REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS requests_status ON requests (status);
+            CREATE TABLE IF NOT EXISTS waits (
+                wait_id TEXT PRIMARY KEY,
+                thread_id TEXT NOT NULL,
+                assistant_id TEXT NOT NULL,
+                custom_ids TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created REAL NOT NULL
+            );
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(requests)")}
+        if "api_url" not in columns:
+            # ledgers created before requests recorded their batch API
+            self._conn.execute(
+                "ALTER TABLE requests ADD COLUMN api_url TEXT NOT NULL DEFAULT ''"
+            )
+        self._conn.commit()
+
+    def enqueue(self, custom_id: str, body: dict[str, Any], api_url: str = "") -> None:
+        """Queue a request for the given batch API (empty for OpenAI) unless it is already known."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO requests (custom_id, api_url, body, status, created) VALUES (?, ?, ?, 'queued', ?)",
+                (custom_id, api_url, json.dumps(body), time.time()),
+            )
+            self._conn.commit()
+
+    def add_wait(
+        self, thread_id: str, assistant_id: str, custom_ids: Sequence[str]
+    ) -> None:
+        """Record that a thread is paused until the given requests finish."""
+        wait_id = hashlib.sha256(
+            json.dumps([thread_id, *custom_ids]).encode()
+        ).hexdigest()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO waits (wait_id, thread_id, assistant_id, custom_ids, status, created) VALUES (?, ?, ?, ?, 'waiting', ?)",
+                (wait_id, thread_id, assistant_id, json.dumps(list(custom_ids)), time.time()),
+            )
+            self._conn.commit()
+
+    def queued(self, api_url: str = "") -> list[tuple[str, dict[str, Any]]]:
+        """Return the (custom_id, body) of every request for the given batch API not yet submitted."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT custom_id, body FROM requests WHERE status = 'queued' AND api_url = ? ORDER BY created",
+                (api_url,),
+            ).fetchall()
+        return [(custom_id, json.loads(body)) for custom_id, body in rows]
+
+    def queued_elsewhere(self, api_url: str = "") -> dict[str, int]:
+        """Return the number of queued requests per batch API other than the given one."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT api_url, COUNT(*) FROM requests WHERE status = 'queued' AND api_url != ? GROUP BY api_url",
+                (api_url,),
+            ).fetchall()
+        return dict(rows)
+
+    def mark_submitted(self, custom_ids: Sequence[str], batch_id: str) -> None:
+        """Record the batch a set of requests was submitted in."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE requests SET status = 'submitted', batch_id = ? WHERE custom_id = ?",
+                [(batch_id, custom_id) for custom_id in custom_ids],
+            )
+            self._conn.commit()
+
+    def submitted_batches(self) -> list[str]:
+        """Return the ids of batches with requests still awaiting results."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT batch_id FROM requests WHERE status = 'submitted'"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def complete(self, custom_id: str, result: dict[str, Any], failed: bool = False) -> None:
+        """Store the result (or error) of a request."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE requests SET status = ?, result = ? WHERE custom_id = ?",
+                ("failed" if failed else "completed", json.dumps(result), custom_id),
+            )
+            self._conn.commit()
+
+    def fail_batch(self, batch_id: str, reason: str) -> None:
+        """Fail every unfinished request of a batch."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE requests SET status = 'failed', result = ? WHERE batch_id = ? AND status = 'submitted'",
+                (json.dumps({"error": {"message": reason}}), batch_id),
+            )
+            self._conn.commit()
+
+    def ready_waits(self) -> list[tuple[str, str, str, list[dict[str, Any]]]]:
+        """Return (wait_id, thread_id, assistant_id, results) for waits whose requests have all finished."""
+        with self._lock:
+            waits = self._conn.execute(
+                "SELECT wait_id, thread_id, assistant_id, custom_ids FROM waits WHERE status = 'waiting'"
+            ).fetchall()
+            ready = []
+            for wait_id, thread_id, assistant_id, custom_ids in waits:
+                custom_ids = json.loads(custom_ids)
+                rows = dict(
+                    self._conn.execute(
+                        f"SELECT custom_id, result FROM requests WHERE custom_id IN ({','.join('?' * len(custom_ids))}) AND status IN ('completed', 'failed')",
+                        custom_ids,
+                    ).fetchall()
+                )
+                if len(rows) == len(custom_ids):
+                    results = [json.loads(rows[custom_id]) for custom_id in custom_ids]
+                    ready.append((wait_id, thread_id, assistant_id, results))
+        return ready
+
+    def mark_resumed(self, wait_id: str) -> None:
+        """Record that a paused thread was resumed."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE waits SET status = 'resumed' WHERE wait_id = ?", (wait_id,)
+            )
+            self._conn.commit()
+
+
+_ledgers: dict[str, BatchLedger] = {}
+_ledgers_lock = threading.Lock()
+
+
+def get_batch_ledger(config: Any) -> BatchLedger:
+    """Return the shared ledger for a configuration exposing `batch_ledger_path`."""
+    path = os.path.expanduser(config.batch_ledger_path)
+    with _ledgers_lock:
+        if path not in _ledgers:
+            _ledgers[path] = BatchLedger(path)
+        return _ledgers[path]
+
+
+def message_from_result(result: dict[str, Any]) -> AIMessage:
+    """Convert a batch output line into a chat message.
+
+    Raises:
+        ValueError: If the request failed.
+    """
+    response = result.get("response") or {}
+    if result.get("error") or response.get("status_code", 200) != 200:
+        error = result.get("error") or response.get("body", {}).get("error")
+        raise ValueError(f"Batch request {result.get('custom_id')} failed: {error}")
+    body = response["body"]
+    usage = body.get("usage") or {}
+    return AIMessage(
+        content=body["choices"][0]["message"]["content"] or "",
+        response_metadata={"model_name": body.get("model"), "batch": True},
+        usage_metadata={
+            "input_tokens": usage.get("prompt_tokens", 0),
+            "output_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+        },
+    )
+
+
+def batch_body(
+    model: Any, fully_specified_name: str, messages: list[BaseMessage]
+) -> Optional[dict[str, Any]]:
+    """Build the chat completions body a model would send for the messages.
+
+    OpenAI models build the body themselves, so bound tools, response formats and
+    sampling parameters are kept.  For other providers only the temperature and token
+    limit are known, so models with bound arguments cannot be batched.
+
+    Args:
+        model: The model, possibly bound, rate limited or hedged.
+        fully_specified_name (str): The 'provider/model' of the model.
+        messages (list[BaseMessage]): The messages of the request.
+
+    Returns:
+        Optional[dict[str, Any]]: The body, or None if the request must be sent directly.
+    """
+    kwargs: dict[str, Any] = {}
+    while True:
+        if isinstance(model, RunnableBinding):
+            kwargs = {**model.kwargs, **kwargs}
+            model = model.bound
+        elif isinstance(model, RateLimitedChatModel):
+            model = model.chat_model
+        elif isinstance(model, HedgedChatModel):
+            # the batch endpoint stands in for the primary model
+            model = model.primary
+        else:
+            break
+
+    if isinstance(model, BaseChatOpenAI):
+        body = model._get_request_payload(messages, **kwargs)
+        if "messages" not in body:
+            # built for the responses API, which the batch endpoint does not serve
+            return None
+        body.pop("stream", None)
+        return body
+    if kwargs:
+        return None
+    body = {
+        "model": fully_specified_name.partition("/")[2],
+        "messages": convert_to_openai_messages(messages),
+    }
+    for param in ("temperature", "max_tokens"):
+        if getattr(model, param, None) is not None:
+            body[param] = getattr(model, param)
+    return body
+
+
+async def invoke_chat_models(
+    model: BaseChatModel,
+    fully_specified_name: str,
+    requests: Sequence[list[BaseMessage]],
+    config: Any,
+    return_exceptions: bool = False,
+) -> list[Any]:
+    """Call a model once per request, through the provider batch endpoint in batch mode.
+
+    Outside batch mode, and for models the batch endpoint cannot serve (see
+    `batch_body`), the requests are sent concurrently.  In batch mode the requests
+    are queued in the ledger and the graph is interrupted until the poller resumes it
+    with the results.  When the node is re-run on resume, the requests are already
+    known to the ledger and the results are returned from the interrupt.
+
+    Args:
+        model (BaseChatModel): The model to use outside batch mode.
+        fully_specified_name (str): The 'provider/model' of the model.
+        requests (Sequence[list[BaseMessage]]): The messages of each request.
+        config: The graph configuration exposing `batch_mode`, `batch_api_url`,
+            `batch_providers` and `batch_ledger_path`.
+        return_exceptions (bool): Return failed requests as exceptions instead of raising.
+
+    Returns:
+        list[Any]: One AIMessage (or exception) per request, in order.
+    """
+    provider = fully_specified_name.partition("/")[0]
+    bodies = None
+    if getattr(config, "batch_mode", False):
+        if provider not in config.batch_providers or (
+            provider != "openai" and not config.batch_api_url
+        ):
+            logger.warning(
+                f"The batch endpoint does not serve {fully_specified_name}, calling the model directly"
+            )
+        else:
+            bodies = [
+                batch_body(model, fully_specified_name, messages) for messages in requests
+            ]
+            if None in bodies:
+                logger.warning(
+                    f"Requests to {fully_specified_name} use arguments the batch endpoint cannot carry, calling the model directly"
+                )
+                bodies = None
+    if bodies is None:
+        return await asyncio.gather(
+            *(model.ainvoke(messages) for messages in requests),
+            return_exceptions=return_exceptions,
+        )
+
+    run_config = ensure_config()
+    metadata = run_config.get("metadata", {})
+    thread_id = metadata.get("thread_id") or run_config.get("configurable", {}).get(
+        "thread_id"
+    )
+    assistant_id = metadata.get("assistant_id") or metadata.get("graph_id")
+    if not thread_id or not assistant_id:
+        raise ValueError("Batch mode requires a thread_id and assistant_id to resume the run.")
+    node = metadata.get("langgraph_node", "unknown")
+
+    ledger = get_batch_ledger(config)
+    custom_ids = []
+    for index, body in enumerate(bodies):
+        digest = hashlib.sha256(
+            json.dumps(body, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        custom_id = f"{thread_id}:{node}:{index}:{digest[:16]}"
+        ledger.enqueue(custom_id, body, config.batch_api_url)
+        custom_ids.append(custom_id)
+    ledger.add_wait(thread_id, assistant_id, custom_ids)
+
+    results = interrupt({"type": "batch", "node": node, "custom_ids": custom_ids})
+    messages = []
+    for result in results:
+        try:
+            messages.append(message_from_result(result))
+        except ValueError as e:
+            if not return_exceptions:
+                raise
+            messages.append(e)
+    return messages
@@ -0,0 +1,154 @@
+"""Content-addressed storage for large documents kept out of graph state.
+
+Graph state is checkpointed after every step, so scraped pages carried in
+`page_contents` would be serialized again at each condense loop, interrupt and
+rewrite.  Instead, documents longer than `blob_min_chars` are written once to a
+compressed blob named by the SHA-256 of their text, and state keeps a `Document`
+holding the page summary, when one was made while verifying the link, or else a
+preview of the first `PREVIEW_CHARS` characters, with the blob hash in its metadata.  Nodes that need the
+text resolve the documents with `aload_documents`.
+
+Classes:
+    BlobStore: Compressed, content-addressed text blobs under a directory.
+
+Functions:
+    get_blob_store: Return the blob store of a configuration.
+    offload_documents: Move the text of large documents into the blob store.
+    load_documents: Resolve offloaded documents back to their full text.
+    aload_documents: Resolve offloaded documents off the event loop.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import zlib
+from functools import lru_cache
+from typing import Any
+
+from langchain_core.documents import Document
+
+BLOB_KEY = "blob"
+BLOB_CHARS_KEY = "blob_chars"
+SUMMARY_KEY = "summary"
+PREVIEW_CHARS = 500
+
+
+class BlobStore:
+    """Compressed, content-addressed text blobs under a directory."""
+
+    def __init__(self, root: str):
+        """Create a store rooted at a directory."""
+        self.root = os.path.expanduser(root)
+
+    def path(self, sha256: str) -> str:
+        """Return the path of a blob."""
+        return os.path.join(self.root, sha256[:2], sha256[2:4], f"{sha256}.z")
+
+    def put(self, text: str) -> str:
+        """Store a text and return its hash.  Storing the same text again is free."""
+        data = text.encode("utf-8")
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(data))
+            os.replace(tmp_path, path)
+        return sha256
+
+    def get(self, sha256: str) -> str:
+        """Return a stored text.
+
+        Raises:
+            ValueError: If the blob does not exist.
+        """
+        path = self.path(sha256)
+        if not os.path.exists(path):
+            raise ValueError(f"Blob {sha256} not found in {self.root}")
+        return _read_blob(path)
+
+
+@lru_cache(maxsize=64)
+def _read_blob(path: str) -> str:
+    # blobs never change, so their text can be cached by path
+    with open(path, "rb") as f:
+        return zlib.decompress(f.read()).decode("utf-8")
+
+
+def get_blob_store(config: Any) -> BlobStore:
+    """Return the blob store of a configuration."""
+    return BlobStore(config.blob_store_dir)
+
+
+def _preview(text: str) -> str:
+    if len(text) <= PREVIEW_CHARS:
+        return text
+    cut = text.rfind(" ", 0, PREVIEW_CHARS)
+    return text[: cut if cut > 0 else PREVIEW_CHARS] + " …"
+
+
+def offload_documents(docs: list[Document], config: Any) -> list[Document]:
+    """Move the text of large documents into the blob store.
+
+    Documents of at most `blob_min_chars` characters, and documents already offloaded,
+    are returned unchanged.  An offloaded document keeps the summary in its
+    `summary` metadata as its text, or a preview of its first characters if it has
+    no summary.
+
+    Args:
+        docs: The documents.
+        config: Configuration naming the blob store directory and size threshold.
+
+    Returns:
+        list[Document]: Documents holding a summary or preview, and the blob hash in
+            their metadata.
+    """
+    store = get_blob_store(config)
+    offloaded = []
+    for doc in docs:
+        if BLOB_KEY in doc.metadata or len(doc.page_content) <= config.blob_min_chars:
+            offloaded.append(doc)
+            continue
+        sha256 = store.put(doc.page_content)
+        offloaded.append(
+            Document(
+                page_content=doc.metadata.get(SUMMARY_KEY) or _preview(doc.page_content),
+                metadata={
+                    **doc.metadata,
+                    BLOB_KEY: sha256,
+                    BLOB_CHARS_KEY: len(doc.page_content),
+                },
+            )
+        )
+    return offloaded
+
+
+def load_documents(docs: list[Document], config: Any) -> list[Document]:
+    """Resolve offloaded documents back to their full text.
+
+    The blob keys are dropped from the metadata of resolved documents; documents that
+    were never offloaded are returned unchanged.
+    """
+    store = get_blob_store(config)
+    loaded = []
+    for doc in docs:
+        sha256 = doc.metadata.get(BLOB_KEY)
+        if not sha256:
+            loaded.append(doc)
+            continue
+        metadata = {
+            key: value
+            for key, value in doc.metadata.items()
+            if key not in (BLOB_KEY, BLOB_CHARS_KEY)
+        }
+        loaded.append(Document(page_content=store.get(sha256), metadata=metadata))
+    return loaded
+
+
+async def aload_documents(docs: list[Document], config: Any) -> list[Document]:
+    """Resolve offloaded documents off the event loop."""
+    if not any(BLOB_KEY in doc.metadata for doc in docs):
+        return docs
+    return await asyncio.to_thread(load_documents, docs, config)
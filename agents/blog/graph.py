@@ -1,5 +1,6 @@
 """Main graph for the agent."""
 
+import asyncio
 from datetime import datetime
 from typing import Dict, Literal
 
@@ -21,8 +22,10 @@ from agents.blog.schema import BlogRequest, Sections
 from agents.blog.state import BlogState
 from agents.blog.utils import format_sections
 from agents.pplx_researcher.graph import PplxResearchAgent
+from agents.repository import get_repository
 from agents.schema import HumanResponse
-from agents.utils import load_blog_posts_collection, load_chat_model
+from agents.url_cache import get_url_cache
+from agents.utils import load_chat_model
 from agents.write_blog_section.configuration import BlogWriteSectionConfiguration
 from agents.write_blog_section.graph import graph as section_writer_graph
 from agents.write_blog_section.state import (
@@ -43,6 +46,7 @@ async def extract_details(state: BlogState, *, config: RunnableConfig) -> BlogSt
         model_kwargs=agent_config.extract_details_model_kwargs
         if agent_config.extract_details_model_kwargs
         else agent_config.default_model_kwargs,
+        config=agent_config,
     )
     system_prompt_template = build_research_details_prompt()
     chat_prompt = ChatPromptTemplate.from_messages(
@@ -66,6 +70,7 @@ async def define_structure(state: BlogState, *, config: RunnableConfig) -> BlogS
         model_kwargs=agent_config.define_structure_model_kwargs
         if agent_config.define_structure_model_kwargs
         else agent_config.default_model_kwargs,
+        config=agent_config,
     )
     # Generate sections
     structured_llm = llm.with_structured_output(Sections)
@@ -164,14 +169,38 @@ async def pplx_researcher(state: BlogState, *, config: RunnableConfig) -> BlogSt
 
 
 async def load_priority_links(state: BlogState, *, config: RunnableConfig) -> BlogState:
-    """Load data from links provided by user."""
+    """Load data from links provided by user.
+
+    Links loaded recently are served from the URL content cache; the rest are loaded
+    together in one browser session and cached.
+    """
+    agent_config = BlogConfiguration.from_runnable_config(config)
     documents = []
     if state.blog_request.priority_links:
-        loader = PlaywrightURLLoader(
-            urls=state.blog_request.priority_links,
-            remove_selectors=["header", "footer"],
-        )
-        documents = await loader.aload()
+        cache = get_url_cache(agent_config)
+        missing = []
+        for url in state.blog_request.priority_links:
+            cached = await asyncio.to_thread(cache.get, url, "playwright") if cache else None
+            if cached is None:
+                missing.append(url)
+            else:
+                documents.extend(cached)
+        if missing:
+            loader = PlaywrightURLLoader(
+                urls=missing,
+                remove_selectors=["header", "footer"],
+            )
+            loaded = await loader.aload()
+            documents.extend(loaded)
+            if cache:
+                for url in missing:
+                    url_documents = [
+                        doc for doc in loaded if doc.metadata.get("source") == url
+                    ]
+                    if url_documents:
+                        await asyncio.to_thread(
+                            cache.put, url, "playwright", url_documents
+                        )
 
     return {
         "reference_content": documents,
@@ -281,6 +310,7 @@ def write_final_sections(
     llm = load_chat_model(
         fully_specified_name=agent_config.default_model,
         model_kwargs=agent_config.default_model_kwargs,
+        config=agent_config,
     )
     section_content = llm.invoke(
         [SystemMessage(content=system_instructions)]
@@ -298,7 +328,7 @@ def write_final_sections(
     return {"completed_sections": [state.section]}
 
 
-def compile_final_blog(state: BlogState, *, config: RunnableConfig) -> BlogState:
+async def compile_final_blog(state: BlogState, *, config: RunnableConfig) -> BlogState:
     """Compile the final blog."""
     # Get sections
     sections = state.sections
@@ -318,16 +348,17 @@ def compile_final_blog(state: BlogState, *, config: RunnableConfig) -> BlogState
         model_kwargs=agent_config.compile_final_blog_model_kwargs
         if agent_config.compile_final_blog_model_kwargs
         else agent_config.default_model_kwargs,
+        config=agent_config,
     )
     # Format system instructions
     prompt = build_compile_blog_prompt(state, agent_config)
     # Rewrite content of the sections
-    response = llm.invoke([SystemMessage(content=prompt)])
+    response = await llm.ainvoke([SystemMessage(content=prompt)])
     # TODO: trigger interrupt for hitl to review and approve sections
     return {"final_blog": response.content}
 
 
-def save_blog(state: BlogState, config: BlogConfiguration) -> BlogState:
+async def save_blog(state: BlogState, config: BlogConfiguration) -> BlogState:
     """Save blog for later use."""
     blog_config = BlogConfiguration.from_runnable_config(config)
     try:
@@ -336,12 +367,11 @@ def save_blog(state: BlogState, config: BlogConfiguration) -> BlogState:
             "created_date": datetime.now(),
             **state.model_dump(),
         }
-        collection = load_blog_posts_collection(blog_config)
-        result = collection.insert_one(scheduled_blog)
+        object_id = await get_repository(blog_config).insert_blog_post(scheduled_blog)
     except Exception as e:
         raise ValueError(f"Error storing new post: {e}")
     return {
-        "object_id": result.inserted_id if result else None,
+        "object_id": object_id,
     }
 
 
@@ -0,0 +1,256 @@
+"""Local caches shared by the agents.
+
+Classes:
+    DiskCache: Size-bounded key/value store backed by SQLite.
+    LLMResponseCache: LangChain cache that replays deterministic chat model responses.
+
+Functions:
+    get_response_cache: Return the shared response cache for a configuration, if enabled.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """Size-bounded key/value store backed by a local SQLite database.
+
+    Values are stored as bytes.  When the total size of stored values exceeds
+    `max_bytes`, the least recently accessed entries are evicted until the cache
+    is back under its low-water mark.  Entries older than `ttl_seconds` (when set)
+    are treated as misses and removed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int,
+        ttl_seconds: Optional[float] = None,
+        low_water_ratio: float = 0.9,
+    ):
+        """Open (or create) the cache database at the given path.
+
+        Args:
+            path (str): Location of the SQLite database file.  `~` is expanded.
+            max_bytes (int): Maximum total size of stored values before eviction.
+            ttl_seconds (Optional[float]): Maximum age of an entry.  None disables expiry.
+            low_water_ratio (float): Fraction of `max_bytes` to evict down to.
+        """
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.low_water_ratio = low_water_ratio
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the value stored for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: bytes) -> None:
+        """Store value under key, evicting old entries if the cache is full."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        """Remove key from the cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def size(self) -> int:
+        """Return the total size in bytes of the stored values."""
+        with self._lock:
+            return self._total_size()
+
+    def hit_rate(self) -> float:
+        """Return the fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _total_size(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self) -> None:
+        total = self._total_size()
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * self.low_water_ratio)
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed ASC"
+        ).fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logger.debug(f"Evicted {evicted} entries from {self.path}")
+
+
+# message fields that change between otherwise identical requests
+_VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+def _normalize(node: Any) -> Any:
+    """Drop message ids and metadata from a serialized prompt so reruns share a key.
+
+    Message content is kept byte for byte; prompts differing only in whitespace are
+    different requests.
+    """
+    if isinstance(node, list):
+        return [_normalize(item) for item in node]
+    if isinstance(node, dict):
+        normalized = {k: _normalize(v) for k, v in node.items()}
+        kwargs = normalized.get("kwargs")
+        if "lc" in normalized and isinstance(kwargs, dict):
+            for name in _VOLATILE_MESSAGE_FIELDS:
+                kwargs.pop(name, None)
+        return normalized
+    return node
+
+
+def response_cache_key(prompt: str, llm_string: str) -> str:
+    """Build the cache key for a model request.
+
+    Args:
+        prompt (str): The serialized messages sent to the model.
+        llm_string (str): LangChain's description of the model, its parameters and any
+            bound tools or structured output schema.
+
+    Returns:
+        str: A hex digest identifying the request.
+    """
+    try:
+        prompt = json.dumps(_normalize(json.loads(prompt)), sort_keys=True)
+    except (TypeError, ValueError):
+        pass
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+
+class LLMResponseCache(BaseCache):
+    """LangChain cache that replays chat model responses from a DiskCache.
+
+    Keys cover the model, its parameters, bound tools and structured output schema,
+    and the messages without their ids and metadata, so only byte-equivalent requests
+    are replayed.  Replayed messages carry `response_metadata["cached"]` so metrics
+    handlers do not count them as provider calls.
+    """
+
+    def __init__(self, store: DiskCache):
+        """Create a response cache on top of the given store."""
+        self.store = store
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Look up a cached response."""
+        value = self.store.get(response_cache_key(prompt, llm_string))
+        if value is None:
+            return None
+        try:
+            generations = [loads(generation) for generation in json.loads(value)]
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cached response: {e}")
+            return None
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            if message is not None:
+                message.response_metadata["cached"] = True
+        return generations
+
+    def update(
+        self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE
+    ) -> None:
+        """Store a response."""
+        value = json.dumps([dumps(generation) for generation in return_val])
+        self.store.put(response_cache_key(prompt, llm_string), value.encode())
+
+    def clear(self, **kwargs: Any) -> None:
+        """Remove every cached response."""
+        self.store.clear()
+
+
+_response_caches: dict[str, LLMResponseCache] = {}
+_response_caches_lock = threading.Lock()
+
+
+def get_response_cache(config: Any) -> Optional[LLMResponseCache]:
+    """Return the shared response cache for a configuration.
+
+    Args:
+        config: A configuration exposing `llm_cache_enabled`, `llm_cache_path` and
+            `llm_cache_max_mb`.
+
+    Returns:
+        Optional[LLMResponseCache]: The cache, or None if caching is disabled.
+    """
+    if not getattr(config, "llm_cache_enabled", False):
+        return None
+    path = os.path.expanduser(config.llm_cache_path)
+    with _response_caches_lock:
+        if path not in _response_caches:
+            _response_caches[path] = LLMResponseCache(
+                DiskCache(path, max_bytes=config.llm_cache_max_mb * 1024 * 1024)
+            )
+        return _response_caches[path]
+
@@ -0,0 +1,410 @@
+"""Chat model wrappers applied by `load_chat_model`.
+
+Classes:
+    RateLimitedChatModel: Chat model that holds a provider limiter slot for each request.
+    HedgedChatModel: Chat model that races a secondary model when the primary is slow or failing.
+
+Functions:
+    apply_model_policies: Apply caching, rate limiting and instrumentation to a freshly loaded chat model.
+    get_hedge_policy: Return the hedging policy configured for the current graph node.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.callbacks import (
+    AsyncCallbackManager,
+    AsyncCallbackManagerForLLMRun,
+    CallbackManager,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import (
+    Runnable,
+    RunnableBinding,
+    RunnableParallel,
+    RunnableSequence,
+    ensure_config,
+)
+
+from agents.cache import get_response_cache
+from agents.instrumentation import get_metrics_handler
+from agents.metrics import counter
+from agents.rate_limit import ProviderLimiter, get_limiter
+
+logger = logging.getLogger(__name__)
+
+# errors that are worth retrying on another provider
+DEFAULT_HEDGE_ERRORS = (
+    "RateLimitError",
+    "APITimeoutError",
+    "APIConnectionError",
+    "InternalServerError",
+    "OverloadedError",
+    "TimeoutError",
+)
+
+HEDGES_TOTAL = counter(
+    "llm_hedges_total",
+    "Secondary model requests sent, by the reason the primary was hedged.",
+    labels=("node", "primary", "secondary", "reason"),
+)
+HEDGE_WINS_TOTAL = counter(
+    "llm_hedge_wins_total",
+    "Hedged calls by the model whose answer was used.",
+    labels=("node", "winner"),
+)
+
+
+def estimate_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Roughly estimate the number of input tokens in a list of messages."""
+    return sum(len(str(message.content)) for message in messages) // 4
+
+
+def usage_tokens(result: ChatResult) -> Optional[int]:
+    """Return the total tokens reported by the provider for a result, if any."""
+    total = 0
+    for generation in result.generations:
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+        if not usage:
+            return None
+        total += usage.get("total_tokens", 0)
+    return total
+
+
+def _chunk_tokens(chunk: ChatGenerationChunk) -> Optional[int]:
+    usage = getattr(chunk.message, "usage_metadata", None)
+    return usage.get("total_tokens", 0) if usage else None
+
+
+def _swap_model(runnable: Runnable, old: Runnable, new: Runnable) -> Optional[Runnable]:
+    """Return a copy of `runnable` calling `new` where it called `old`, or None if it never does."""
+    if runnable is old:
+        return new
+    if isinstance(runnable, RunnableBinding):
+        bound = _swap_model(runnable.bound, old, new)
+        return runnable.model_copy(update={"bound": bound}) if bound else None
+    if isinstance(runnable, RunnableSequence):
+        swapped = [_swap_model(step, old, new) for step in runnable.steps]
+        if not any(swapped):
+            return None
+        steps = [new_step or step for new_step, step in zip(swapped, runnable.steps)]
+        return RunnableSequence(*steps, name=runnable.name)
+    if isinstance(runnable, RunnableParallel):
+        swapped = {key: _swap_model(step, old, new) for key, step in runnable.steps__.items()}
+        if not any(swapped.values()):
+            return None
+        return RunnableParallel(
+            {key: swapped[key] or step for key, step in runnable.steps__.items()}
+        )
+    return None
+
+
+def _child_callbacks(
+    run_manager: Optional[CallbackManagerForLLMRun | AsyncCallbackManagerForLLMRun],
+    manager_class: type[CallbackManager | AsyncCallbackManager],
+) -> Optional[CallbackManager | AsyncCallbackManager]:
+    """Return a callback manager nesting inner model calls under a chat model run.
+
+    LLM run managers have no `get_child`, so this mirrors the chain version: the
+    inheritable handlers, tags and metadata (including `langgraph_node`) are passed on.
+    """
+    if run_manager is None:
+        return None
+    manager = manager_class(handlers=[], parent_run_id=run_manager.run_id)
+    manager.set_handlers(run_manager.inheritable_handlers)
+    manager.add_tags(run_manager.inheritable_tags)
+    manager.add_metadata(run_manager.inheritable_metadata)
+    return manager
+
+
+class RateLimitedChatModel(BaseChatModel):
+    """Chat model that waits for a shared provider limiter before each request.
+
+    The wrapper sits outside the provider model so cache hits are answered before a
+    limiter slot is requested.  Tool binding, structured output and streaming are
+    delegated to the wrapped model so provider specific formats (such as OpenAI's
+    `response_format` json schema) are preserved.
+    """
+
+    chat_model: BaseChatModel
+    limiter: ProviderLimiter
+
+    @property
+    def _llm_type(self) -> str:
+        return self.chat_model._llm_type
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return self.chat_model._identifying_params
+
+    def _get_ls_params(self, stop: Optional[list[str]] = None, **kwargs: Any):
+        return self.chat_model._get_ls_params(stop=stop, **kwargs)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        """Bind tools using the wrapped model's tool format."""
+        return self.bind(**self.chat_model.bind_tools(tools, **kwargs).kwargs)
+
+    def with_structured_output(self, schema: Any, *, include_raw: bool = False, **kwargs: Any):
+        """Build structured output with the wrapped model's method, calling through the limiter."""
+        runnable = self.chat_model.with_structured_output(
+            schema, include_raw=include_raw, **kwargs
+        )
+        swapped = _swap_model(runnable, self.chat_model, self)
+        if swapped is None:
+            logger.warning(
+                f"Could not rate limit structured output of {self._llm_type}; "
+                "falling back to tool calling"
+            )
+            return super().with_structured_output(schema, include_raw=include_raw, **kwargs)
+        return swapped
+
+    def _should_stream(
+        self,
+        *,
+        async_api: bool,
+        run_manager: Optional[CallbackManagerForLLMRun | AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> bool:
+        return self.chat_model._should_stream(
+            async_api=async_api, run_manager=run_manager, **kwargs
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        with self.limiter.slot_sync(estimate_tokens(messages)) as lease:
+            result = self.chat_model._generate(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            )
+            lease.record_usage(usage_tokens(result))
+        return result
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        async with self.limiter.slot(estimate_tokens(messages)) as lease:
+            result = await self.chat_model._agenerate(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            )
+            lease.record_usage(usage_tokens(result))
+        return result
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        with self.limiter.slot_sync(estimate_tokens(messages)) as lease:
+            total = None
+            for chunk in self.chat_model._stream(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            ):
+                if (tokens := _chunk_tokens(chunk)) is not None:
+                    total = (total or 0) + tokens
+                yield chunk
+            lease.record_usage(total)
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async with self.limiter.slot(estimate_tokens(messages)) as lease:
+            total = None
+            async for chunk in self.chat_model._astream(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            ):
+                if (tokens := _chunk_tokens(chunk)) is not None:
+                    total = (total or 0) + tokens
+                yield chunk
+            lease.record_usage(total)
+
+
+class HedgedChatModel(BaseChatModel):
+    """Chat model that sends a hedged request to a secondary model.
+
+    The primary model is called first.  If it has not answered after
+    `hedge_after_seconds`, or fails with one of `fallback_errors`, the same request
+    is sent to the secondary model.  Whichever answer arrives first is used and the
+    other request is cancelled.  Synchronous calls only fall back on errors, since a
+    blocking request cannot be cancelled.
+
+    Both models are runnables so tools and structured output schemas can be bound
+    to each in its own provider format.
+    """
+
+    primary: Runnable
+    secondary: Runnable
+    primary_name: str
+    secondary_name: str
+    node: str = "unknown"
+    hedge_after_seconds: Optional[float] = None
+    fallback_errors: tuple[str, ...] = DEFAULT_HEDGE_ERRORS
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {
+            "primary": self.primary_name,
+            "secondary": self.secondary_name,
+            "hedge_after_seconds": self.hedge_after_seconds,
+        }
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        """Bind tools to both models, each in its own format."""
+        return self.model_copy(
+            update={
+                "primary": self.primary.bind_tools(tools, **kwargs),
+                "secondary": self.secondary.bind_tools(tools, **kwargs),
+            }
+        )
+
+    def _should_fallback(self, error: BaseException) -> bool:
+        names = {cls.__name__ for cls in type(error).__mro__}
+        return bool(names.intersection(self.fallback_errors))
+
+    def _record_hedge(self, reason: str) -> None:
+        logger.info(
+            f"Hedging {self.primary_name} with {self.secondary_name} in {self.node} ({reason})"
+        )
+        HEDGES_TOTAL.inc(
+            node=self.node,
+            primary=self.primary_name,
+            secondary=self.secondary_name,
+            reason=reason,
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        config = {"callbacks": _child_callbacks(run_manager, CallbackManager)}
+        try:
+            message = self.primary.invoke(messages, config=config, stop=stop, **kwargs)
+        except Exception as e:
+            if not self._should_fallback(e):
+                raise
+            self._record_hedge("error")
+            message = self.secondary.invoke(messages, config=config, stop=stop, **kwargs)
+            HEDGE_WINS_TOTAL.inc(node=self.node, winner="secondary")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        config = {"callbacks": _child_callbacks(run_manager, AsyncCallbackManager)}
+
+        def start(model: Runnable) -> asyncio.Task:
+            return asyncio.create_task(
+                model.ainvoke(messages, config=config, stop=stop, **kwargs)
+            )
+
+        primary = start(self.primary)
+        tasks = {primary: "primary"}
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_after_seconds)
+            if primary in done:
+                error = primary.exception()
+                if error is None:
+                    return ChatResult(generations=[ChatGeneration(message=primary.result())])
+                if not self._should_fallback(error):
+                    raise error
+                self._record_hedge("error")
+            else:
+                self._record_hedge("latency")
+            tasks[start(self.secondary)] = "secondary"
+
+            pending = {task for task in tasks if not task.done()}
+            error = primary.exception() if primary.done() else None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        HEDGE_WINS_TOTAL.inc(node=self.node, winner=tasks[task])
+                        return ChatResult(
+                            generations=[ChatGeneration(message=task.result())]
+                        )
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+def get_hedge_policy(config: Any) -> tuple[str, Optional[dict[str, Any]]]:
+    """Return the hedging policy configured for the graph node currently running.
+
+    The node is read from the `langgraph_node` metadata of the active runnable
+    config, so this must be called from inside a node (as `load_chat_model` is).
+
+    Args:
+        config: A configuration exposing `hedging`, a dict keyed by node name.
+
+    Returns:
+        tuple[str, Optional[dict[str, Any]]]: The node name and its policy, if any.
+    """
+    node = ensure_config().get("metadata", {}).get("langgraph_node", "unknown")
+    return node, (getattr(config, "hedging", None) or {}).get(node)
+
+
+def apply_model_policies(
+    chat_model: BaseChatModel,
+    fully_specified_name: str,
+    config: Any = None,
+    deterministic: bool = True,
+) -> BaseChatModel:
+    """Apply the response cache, provider rate limits and metrics configured for a graph.
+
+    Args:
+        chat_model (BaseChatModel): The model created for the provider.
+        fully_specified_name (str): String in the format 'provider/model'.
+        config: Configuration of the calling graph, or None to skip all policies.
+        deterministic (bool): Whether responses are reproducible (temperature 0) and may be cached.
+
+    Returns:
+        BaseChatModel: The model to hand to the calling node.
+    """
+    if config is None:
+        return chat_model
+
+    limiter = get_limiter(fully_specified_name, config)
+    if limiter:
+        chat_model = RateLimitedChatModel(chat_model=chat_model, limiter=limiter)
+
+    cache = get_response_cache(config) if deterministic else None
+    if cache:
+        chat_model.cache = cache
+
+    handler = get_metrics_handler(fully_specified_name, config)
+    if handler:
+        chat_model.callbacks = [handler]
+    return chat_model
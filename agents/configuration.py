@@ -7,6 +7,8 @@ from typing import Optional, Type, TypeVar
 
 from langchain_core.runnables import RunnableConfig, ensure_config
 
+from agents.rate_limit import DEFAULT_RATE_LIMITS
+
 MODEL_NAME_TO_RESPONSE_MODEL = {
     "anthropic_claude_3_5_sonnet": "anthropic/claude-3-5-sonnet-20240620",
 }
@@ -65,6 +67,163 @@ class BaseConfiguration:
             "description": "The name of the MongoDB collection to store blog posts."
         },
     )
-
+    mongo_collection_images: str = field(
+        default="images",
+        metadata={
+            "description": "The name of the MongoDB collection indexing stored images by content hash and source URL."
+        },
+    )
+    mongo_max_pool_size: int = field(
+        default=50,
+        metadata={
+            "description": "Maximum number of connections in the shared MongoDB connection pool."
+        },
+    )
+    mongo_min_pool_size: int = field(
+        default=0,
+        metadata={
+            "description": "Number of connections the shared MongoDB connection pool keeps open."
+        },
+    )
+    mongo_max_idle_time_ms: int = field(
+        default=300_000,
+        metadata={
+            "description": "Milliseconds an idle pooled MongoDB connection is kept before being closed."
+        },
+    )
+    mongo_executor_workers: int = field(
+        default=8,
+        metadata={
+            "description": "Number of threads running MongoDB operations off the event loop, shared by the process."
+        },
+    )
+    rules_cache_check_seconds: float = field(
+        default=60.0,
+        metadata={
+            "description": "How long cached reflection rules are used before their version is checked, when no MongoDB change stream is available."
+        },
+    )
+    image_probe_ttl_seconds: float = field(
+        default=60 * 60.0,
+        metadata={
+            "description": "How long the type, size and dimensions probed for an image URL are reused."
+        },
+    )
+    image_probe_failure_ttl_seconds: float = field(
+        default=60.0,
+        metadata={
+            "description": "How long a failed probe of an image URL is reused before the URL is probed again."
+        },
+    )
+    image_probe_bytes: int = field(
+        default=32 * 1024,
+        metadata={
+            "description": "Bytes requested from the start of an image to read its type and dimensions."
+        },
+    )
+    blob_store_dir: str = field(
+        default="~/.eminence-builder/blobs",
+        metadata={
+            "description": "Directory of the content-addressed store holding large documents kept out of graph state."
+        },
+    )
+    blob_min_chars: int = field(
+        default=2000,
+        metadata={
+            "description": "Documents longer than this are moved to the blob store, leaving a summary and hash in state."
+        },
+    )
+    llm_cache_enabled: bool = field(
+        default=False,
+        metadata={
+            "description": "Whether temperature 0 model responses should be replayed from the local response cache."
+        },
+    )
+    llm_cache_path: str = field(
+        default="~/.eminence-builder/llm-cache.sqlite",
+        metadata={"description": "Location of the SQLite file backing the response cache."},
+    )
+    llm_cache_max_mb: int = field(
+        default=512,
+        metadata={
+            "description": "Size of the response cache in megabytes before least recently used responses are evicted."
+        },
+    )
+    url_cache_enabled: bool = field(
+        default=True,
+        metadata={
+            "description": "Whether scraped URL contents are reused from the local URL content cache."
+        },
+    )
+    url_cache_path: str = field(
+        default="~/.eminence-builder/url-cache.sqlite",
+        metadata={"description": "Location of the SQLite file backing the URL content cache."},
+    )
+    url_cache_max_mb: int = field(
+        default=256,
+        metadata={
+            "description": "Size of the URL content cache in megabytes before least recently used pages are evicted."
+        },
+    )
+    url_cache_ttl_seconds: float = field(
+        default=24 * 60 * 60.0,
+        metadata={
+            "description": "How long scraped URL contents are reused before the page is fetched again."
+        },
+    )
+    rate_limits: dict = field(
+        default_factory=lambda: dict(DEFAULT_RATE_LIMITS),
+        metadata={
+            "description": "Budgets shared by every graph in the process, keyed by 'provider/model', 'provider' or search client name. Each entry may set requests_per_minute, tokens_per_minute and max_in_flight."
+        },
+    )
+    hedging: dict = field(
+        default_factory=dict,
+        metadata={
+            "description": "Per node hedging policies, keyed by graph node name. Each entry sets secondary_model and optionally secondary_model_kwargs, hedge_after_seconds and fallback_errors (exception class names), e.g. {'generate_report': {'secondary_model': 'anthropic/claude-3-5-sonnet-20240620', 'hedge_after_seconds': 45}}."
+        },
+    )
+    batch_mode: bool = field(
+        default=False,
+        metadata={
+            "description": "Whether non-interactive model calls are queued for the provider batch endpoint. The run is paused until `python -m agents.batch.poller` resumes it with the results."
+        },
+    )
+    batch_api_url: str = field(
+        default="",
+        metadata={
+            "description": "Base URL of the OpenAI compatible batch API requests are queued for, such as the local stand-in server. Empty uses OpenAI. Must match the `--batch-api-url` of the poller, which only submits requests queued for its API."
+        },
+    )
+    batch_providers: list[str] = field(
+        default_factory=lambda: ["openai"],
+        metadata={
+            "description": "Providers whose models the batch API serves. Models of other providers, and of any provider other than openai while `batch_api_url` is empty, are called directly."
+        },
+    )
+    batch_ledger_path: str = field(
+        default="~/.eminence-builder/batch.sqlite",
+        metadata={
+            "description": "Location of the SQLite ledger shared with the batch poller."
+        },
+    )
+    metrics_enabled: bool = field(
+        default=True,
+        metadata={
+            "description": "Whether latency, token and cost metrics are recorded for model calls."
+        },
+    )
+    metrics_port: int = field(
+        default=0,
+        metadata={
+            "description": "Local port serving metrics in Prometheus format at /metrics. 0 disables the endpoint."
+        },
+    )
+    metrics_dir: str = field(
+        default="",
+        metadata={
+            "description": "Directory for per-run JSON metric summaries, keyed by thread id, e.g. '~/.eminence-builder/runs'. Empty (the default) disables them."
+        },
+    )
 
 T = TypeVar("T", bound=BaseConfiguration)
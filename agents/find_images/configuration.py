@@ -31,3 +31,9 @@ class FindImagesConfiguration(BaseConfiguration):
             "description": "The language model used to validate images. Should be in the form: provider/model-name."
         },
     )
+    min_image_dimension: int = field(
+        default=200,
+        metadata={
+            "description": "Images narrower or shorter than this many pixels (icons, logos, tracking pixels) are discarded before validation."
+        },
+    )
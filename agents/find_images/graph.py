@@ -4,6 +4,8 @@ from langgraph.graph import StateGraph
 from langgraph.graph import START, END
 from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import SystemMessage, HumanMessage
+from agents.batch.utils import invoke_chat_models
+from agents.blob_store import aload_documents
 from agents.find_images.state import FindImagesState
 from agents.find_images.configuration import FindImagesConfiguration
 from agents.utils import get_link_type, load_chat_model
@@ -23,6 +25,7 @@ async def find_images(
 ) -> FindImagesState:
     """Locate image urls referenced in page_contents and add them to state.image_options."""
     # state = mock_find_images_state()
+    config = FindImagesConfiguration.from_runnable_config(config)
     image_urls = []
     link = state.relevant_links[0]
     link_type = get_link_type(link)
@@ -31,7 +34,8 @@ async def find_images(
             for options in state.image_options:
                 image_urls.append(options)
             if state.page_contents:
-                for doc in state.page_contents:
+                # image urls are only in the full page text, not the checkpointed summary
+                for doc in await aload_documents(state.page_contents, config):
                     extracted_urls = (filter_image_urls(extract_image_urls(doc.page_content)))
                     for url in extracted_urls:
                         if is_valid_url(url):
@@ -75,6 +79,8 @@ async def find_images(
         case _:
             raise ValueError(f"Unknown link type: {link_type}")
 
+    image_urls = await filter_usable_images(image_urls, config)
+
     return {
         "post": state.post,
         "relevant_links": state.relevant_links,
@@ -93,34 +99,36 @@ async def validate_images(
 
     # Break unprotected_image_urls into arrays of 10 elements each (chunks)
     chunked_image_urls = chunk_array(unprotected_image_urls, 10)
-    all_relevant_indices = []
+    requests = []
     # this tracks offset between chunks and the unprotected_image_urls array
     base_index = 0
-    # process each chunk of image urls
+    # build one validation request per chunk of image urls
     for chunk in chunked_image_urls:
-        image_messages = await get_images_messages(chunk, base_index)
+        image_messages = await get_images_messages(chunk, base_index, config)
+        # increment offset for next chunk
+        base_index += len(chunk)
         # no messages? skip
         if not image_messages:
             continue
-        
-        try:
-            # call model to validate images in the chunk
-            model = load_chat_model(config.validate_image_model)
-            response = await model.ainvoke(
-                [
-                    SystemMessage(build_validate_images_prompt(state, config)),
-                    HumanMessage(image_messages),
-                ]
-            )
-            chunk_analysis = parse_validate_images_response(response.content)
-            # translate chunk index values to global index values (their value in the image_options array)
-            # global_indices = [i + base_index for i in chunk_analysis]
-            all_relevant_indices.extend(chunk_analysis)
-        except Exception as e:
-            # TODO: log error about problem validating chunk
-            pass
-        # increment offset for next chunk
-        base_index += len(chunk)
+        requests.append(
+            [
+                SystemMessage(build_validate_images_prompt(state, config)),
+                HumanMessage(image_messages),
+            ]
+        )
+
+    all_relevant_indices = []
+    if requests:
+        # validate all chunks at once (or through the batch endpoint in batch mode)
+        model = load_chat_model(config.validate_image_model, config=config)
+        responses = await invoke_chat_models(
+            model, config.validate_image_model, requests, config, return_exceptions=True
+        )
+        for response in responses:
+            if isinstance(response, Exception):
+                # TODO: log error about problem validating chunk
+                continue
+            all_relevant_indices.extend(parse_validate_images_response(response.content))
 
     # create array by selecting only the relevant image indices from the unprotected_image_urls array
     validated_image_options = [unprotected_image_urls[i] for i in all_relevant_indices]
@@ -146,12 +154,12 @@ async def rerank_images(
     base_index = 0
     # process each chunk of image urls
     for chunk in chunked_image_urls:
-        image_messages = await get_images_messages(chunk, base_index)
+        image_messages = await get_images_messages(chunk, base_index, config)
         if not image_messages:
             continue
 
         try:
-            model = load_chat_model(config.rerank_image_model)
+            model = load_chat_model(config.rerank_image_model, config=config)
             response = await model.ainvoke(
                 [
                     SystemMessage(build_rerank_images_prompt(state, config)),
@@ -181,6 +189,14 @@ async def rerank_images(
         "image_options": ranked_image_options,
     }
 
+def route_find_images(
+        state: FindImagesState, config: RunnableConfig
+    ) -> Literal["find_images", "validate_images"]:
+    """Skip discovery when the caller already discovered the candidate images."""
+    if state.image_options:
+        return "validate_images"
+    return "find_images"
+
 def route_validate_images(
         state: FindImagesState, config: RunnableConfig
     ) -> Literal["validate_images", "__end__"]:
@@ -194,7 +210,7 @@ builder = StateGraph(state_schema=FindImagesState, config_schema=FindImagesConfi
 builder.add_node(find_images)
 builder.add_node(validate_images)
 builder.add_node(rerank_images)
-builder.add_edge(START, "find_images")
+builder.add_conditional_edges(START, route_find_images)
 builder.add_conditional_edges("find_images", route_validate_images)
 builder.add_edge("validate_images", "rerank_images")
 builder.add_edge("rerank_images", END)
@@ -2,6 +2,7 @@ import re
 from typing import Optional, TypedDict
 from agents.find_images.configuration import FindImagesConfiguration
 from agents.find_images.state import FindImagesState
+from agents.image_probe import get_image_probe
 from agents.prompts import VALIDATE_IMAGES_PROMPT, RERANK_IMAGES_PROMPT
 import mimetypes
 
@@ -49,14 +50,37 @@ BLACKLISTED_MIME_TYPES = [
   "text/",
 ]
 
-async def get_images_messages(chunk: list[str], base_index: int) -> list[ImageMessage]:
+def is_blacklisted_mime_type(mime_type: Optional[str]) -> bool:
+    """Whether a MIME type is missing or not usable as a post image."""
+    return not mime_type or any(mime_type.startswith(blacklisted) for blacklisted in BLACKLISTED_MIME_TYPES)
+
+async def filter_usable_images(urls: list[str], config: FindImagesConfiguration) -> list[str]:
+    """Drop duplicate, unreachable, blacklisted and tiny images, probing only their first bytes."""
+    urls = list(dict.fromkeys(urls))
+    # query parameters often carry signatures or sizes, so the URL is probed as given
+    infos = await get_image_probe(config).probe_many(urls)
+    usable = []
+    for url in urls:
+        info = infos[url]
+        if not info.ok:
+            continue
+        if is_blacklisted_mime_type(info.mime_type or get_mime_type(remove_query_params(url))):
+            continue
+        if info.width is not None and min(info.width, info.height) < config.min_image_dimension:
+            continue
+        usable.append(url)
+    return usable
+
+async def get_images_messages(chunk: list[str], base_index: int, config: Optional[FindImagesConfiguration] = None) -> list[ImageMessage]:
     """Get messages for images."""
     messages = []
+    infos = await get_image_probe(config).probe_many(chunk)
     for index, url in enumerate(chunk):
         cleaned_url = remove_query_params(url)
-        mime_type = get_mime_type(cleaned_url)
+        # probe results are cached, so images checked by find_images are not fetched again
+        mime_type = infos[url].mime_type or get_mime_type(cleaned_url)
         # if the mime type is blacklisted, skip the image
-        if not mime_type or any(mime_type.startswith(blacklisted) for blacklisted in BLACKLISTED_MIME_TYPES):
+        if is_blacklisted_mime_type(mime_type):
             continue
         else:
             # The structure of these messages will vary by model
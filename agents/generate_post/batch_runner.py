@@ -0,0 +1,191 @@
+"""Generate many posts at once and collect them for review.
+
+Reads a JSON Lines file with one post request per line, for example
+
+    {"topic": "AI in healthcare", "links": ["https://example.com/article"], "style": "news"}
+
+and starts a `generate_post` run for each on the LangGraph server, at most
+`--concurrency` at a time.  Requests with a topic skip the request parsing step; the
+request is also sent as a user message, from which the graph parses the topic when
+it is missing.  Runs execute in the server process, so links shared by
+several requests are fetched and checked for relevance once (see `verify_links`),
+and model responses are shared through the response cache when it is enabled
+(`--config '{"llm_cache_enabled": true}'`).
+
+Every run that stops for human review is written to a single review queue file, one
+JSON line per thread, with the post, its alternatives and the interrupt to answer:
+
+    python -m agents.generate_post.batch_runner posts.jsonl --review-queue review.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Optional
+
+from langgraph_sdk import get_client
+
+logger = logging.getLogger(__name__)
+
+REQUEST_FIELDS = ("topic", "links", "style", "commentary")
+
+
+def load_requests(path: str) -> list[dict[str, Any]]:
+    """Read post requests from a JSON Lines file, skipping blank lines."""
+    requests = []
+    with open(os.path.expanduser(path)) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            if not request.get("links"):
+                raise ValueError(f"Request on line {line_number} has no links")
+            unknown = set(request) - set(REQUEST_FIELDS)
+            if unknown:
+                raise ValueError(
+                    f"Request on line {line_number} has unknown fields: {sorted(unknown)}"
+                )
+            requests.append(request)
+    return requests
+
+
+def request_message(request: dict[str, Any]) -> str:
+    """Describe a post request as the user message the graph would receive."""
+    topic = request.get("topic")
+    lines = [f"Write a post about {topic}." if topic else "Write a post."]
+    if request.get("style"):
+        lines.append(f"Use the {request['style']} style.")
+    lines.append("Sources:")
+    lines.extend(f"- {link}" for link in request["links"])
+    if request.get("commentary"):
+        lines.append(f"Commentary: {request['commentary']}")
+    return "\n".join(lines)
+
+
+def _review_status(interrupts: list[Any]) -> str:
+    if not interrupts:
+        return "done"
+    if any(isinstance(value, dict) and value.get("type") == "batch" for value in interrupts):
+        # paused on the batch endpoint; the poller resumes it up to human review
+        return "batch_pending"
+    return "review"
+
+
+async def run_request(
+    client,
+    assistant_id: str,
+    request: dict[str, Any],
+    config: dict[str, Any],
+    semaphore: asyncio.Semaphore,
+    batch_id: str,
+) -> dict[str, Any]:
+    """Run one request to its first interrupt (or the end) and describe the result."""
+    async with semaphore:
+        start = time.monotonic()
+        thread = await client.threads.create(metadata={"batch_id": batch_id})
+        thread_id = thread["thread_id"]
+        try:
+            await client.runs.wait(
+                thread_id,
+                assistant_id,
+                input={
+                    **request,
+                    "messages": [{"role": "user", "content": request_message(request)}],
+                },
+                config={"configurable": config},
+            )
+            state = await client.threads.get_state(thread_id)
+        except Exception as e:
+            logger.warning(f"Run for {request.get('topic')!r} failed: {e}")
+            return {"thread_id": thread_id, **request, "status": "error", "error": str(e)}
+
+    values = state.get("values") or {}
+    interrupts = [
+        interrupt["value"]
+        for task in state.get("tasks", [])
+        for interrupt in task.get("interrupts", [])
+    ]
+    logger.info(
+        f"Run for {request.get('topic')!r} finished in {time.monotonic() - start:.1f}s"
+    )
+    return {
+        "thread_id": thread_id,
+        **request,
+        "status": _review_status(interrupts),
+        "post": values.get("post"),
+        "alternative_posts": values.get("alternative_posts", []),
+        "relevant_links": values.get("relevant_links", []),
+        "interrupts": interrupts,
+    }
+
+
+def write_review_queue(path: str, results: list[dict[str, Any]]) -> None:
+    """Write the results as JSON Lines, replacing the file atomically."""
+    path = os.path.expanduser(path)
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        for result in results:
+            f.write(json.dumps(result, default=str) + "\n")
+    os.replace(tmp_path, path)
+
+
+async def run_batch(
+    requests: list[dict[str, Any]],
+    langgraph_url: str,
+    assistant_id: str = "generate_post",
+    concurrency: int = 4,
+    config: Optional[dict[str, Any]] = None,
+) -> list[dict[str, Any]]:
+    """Run every request, at most `concurrency` at a time, and return their results in order."""
+    client = get_client(url=langgraph_url)
+    semaphore = asyncio.Semaphore(concurrency)
+    batch_id = f"batch-{int(time.time())}"
+    return await asyncio.gather(
+        *(
+            run_request(client, assistant_id, request, config or {}, semaphore, batch_id)
+            for request in requests
+        )
+    )
+
+
+def main() -> None:
+    """Run the batch from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("requests", help="JSON Lines file of post requests.")
+    parser.add_argument("--review-queue", default="review-queue.jsonl")
+    parser.add_argument("--langgraph-url", default="http://localhost:2024")
+    parser.add_argument("--assistant-id", default="generate_post")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--config",
+        type=json.loads,
+        default={},
+        help="JSON object of configurable values passed to every run.",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    requests = load_requests(args.requests)
+    results = asyncio.run(
+        run_batch(
+            requests,
+            args.langgraph_url,
+            assistant_id=args.assistant_id,
+            concurrency=args.concurrency,
+            config=args.config,
+        )
+    )
+    write_review_queue(args.review_queue, results)
+    counts: dict[str, int] = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    logger.info(f"Wrote {len(results)} runs to {args.review_queue}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -36,6 +36,18 @@ class GeneratePostConfiguration(BaseConfiguration):
             "description": "The language model used for generating information reports that act as input to posts. Should be in the form: provider/model-name."
         },
     )
+    report_summary_model: str = field(
+        default="openai/gpt-4o-mini",
+        metadata={
+            "description": "The language model used to summarize each page before the report is written from the summaries. Should be in the form: provider/model-name."
+        },
+    )
+    report_map_reduce_tokens: int = field(
+        default=30000,
+        metadata={
+            "description": "Estimated input tokens above which pages are summarized concurrently and the report is written from the summaries. 0 disables summarizing."
+        },
+    )
     rewrite_model: str = field(
         default="openai/gpt-4o-mini",
         metadata={
@@ -53,10 +65,34 @@ class GeneratePostConfiguration(BaseConfiguration):
             "description": "Model used to route user responses Should be in the form: provider/model-name."
         },
     )
+    local_routing: bool = field(
+        default=True,
+        metadata={
+            "description": "Whether unambiguous reviewer replies (priorities, dates, edit instructions) are routed without calling route_model."
+        },
+    )
     max_post_length: int = field(
         default=1000,
         metadata={"description": "The maximum length of the post."},
     )
+    post_candidates: int = field(
+        default=1,
+        metadata={
+            "description": "Number of candidate posts generated concurrently. The best scoring one is reviewed, with the rest offered as alternatives."
+        },
+    )
+    candidate_post_models: list[str] = field(
+        default_factory=list,
+        metadata={
+            "description": "Models the candidate posts are spread across, in the form provider/model-name. Empty uses post_model for every candidate."
+        },
+    )
+    max_local_trim_chars: int = field(
+        default=100,
+        metadata={
+            "description": "Largest overage of max_post_length fixed with local edits (emoji, hashtags, bullets) before falling back to the condense model."
+        },
+    )
     max_condense_count: int = field(
         default=3,
         metadata={"description": "The maximum iterations spent condensing post size."},
@@ -72,12 +108,34 @@ class GeneratePostConfiguration(BaseConfiguration):
             "description": "The root directory for storing image files associated with post documents."
         },
     )
+    image_download_max_mb: int = field(
+        default=20,
+        metadata={"description": "Largest image downloaded when scheduling a post."},
+    )
+    image_download_timeout_seconds: float = field(
+        default=60.0,
+        metadata={
+            "description": "Time allowed for downloading a post's image when scheduling it."
+        },
+    )
     reflection_graph_name: str = field(
         default="reflection",
         metadata={
             "description": "Name of the graph the performs reflection on changes made to post content during human review."
         },
     )
+    reflection_queue_path: str = field(
+        default="~/.eminence-builder/reflections.sqlite",
+        metadata={
+            "description": "SQLite file holding pending reflection jobs, so they survive restarts."
+        },
+    )
+    reflection_workers: int = field(
+        default=2,
+        metadata={
+            "description": "Number of background threads running reflection jobs, shared by the process."
+        },
+    )
     # TODO: figure out why attribute default values cannot be defined in the base configuration
     langgraph_url: str = field(
         default="http://localhost:2024",
@@ -3,30 +3,43 @@
 The source content may be URLs directly provided, or it may need to be located via web search relevant to the desired topic.
 """
 
+import asyncio
+import logging
 import random
-import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, Literal, Optional, cast
 
-import requests
+from langchain_core.documents import Document
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, START, StateGraph
 from langgraph.store.base import BaseStore
 from langgraph.types import interrupt
 
+from agents.batch.utils import invoke_chat_models
+from agents.blob_store import aload_documents
+from agents.chat_models import estimate_tokens
+from agents.find_images.graph import find_images as find_image_options
 from agents.find_images.graph import graph as find_images
 from agents.generate_post.configuration import GeneratePostConfiguration
 from agents.generate_post.interrupt import determine_next_node
+from agents.generate_post.length import (
+    CONDENSE_CALLS_SAVED_TOTAL,
+    enforce_post_length,
+    post_length,
+)
+from agents.generate_post.scoring import rank_posts
 from agents.generate_post.state import GeneratePostState, Image
 from agents.generate_post.utils import (
     build_condense_post_system_prompt,
     build_default_date,
     build_interrupt_desc,
     build_post_system_prompt,
+    build_reflections_prompt,
     build_report_content_prompt,
     build_report_prompt,
+    build_report_summary_system_prompt,
     build_report_system_prompt,
     build_rewrite_post_prompt,
     calc_scheduled_date,
@@ -35,11 +48,16 @@ from agents.generate_post.utils import (
     parse_date,
     parse_post,
     parse_report,
+    parse_summary,
     process_image_input,
     remove_urls,
     spawn_reflection_graph,
+    use_page_summaries,
 )
+from agents.image_store import ImageStore
+from agents.prompt_builder import to_system_message
 from agents.reflection.state import ReflectionState
+from agents.repository import get_repository
 from agents.schema import (
     ActionRequest,
     HumanInterrupt,
@@ -48,11 +66,14 @@ from agents.schema import (
 )
 from agents.utils import (
     convert_md_to_unicode,
+    fetch_rules,
+    format_docs,
     load_chat_model,
-    load_linkedin_posts_collection,
 )
 from agents.verify_links.graph import graph as verify_links
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass(kw_only=True)
 class PostInformation:
@@ -72,7 +93,7 @@ async def parse_post_request(
     """Parse most recent Human message to determine the information about the post to write."""
     config = GeneratePostConfiguration.from_runnable_config(config)
     # call model to generate the report
-    model = load_chat_model(config.parse_request_model)
+    model = load_chat_model(config.parse_request_model, config=config)
     model = model.with_structured_output(PostInformation)
     # extract last elements of type HumanMessage from state.messages list
     human_messages = [msg for msg in state.messages if isinstance(msg, HumanMessage)]
@@ -96,24 +117,106 @@ async def parse_post_request(
     }
 
 
+async def summarize_pages(
+    state: GeneratePostState,
+    config: GeneratePostConfiguration,
+    page_contents: list[Document],
+) -> list[Document]:
+    """Summarize each page concurrently, keeping what the report rules call for.
+
+    Pages whose summary fails are passed on in full.
+    """
+    model = load_chat_model(config.report_summary_model, config=config)
+    system_message = to_system_message(
+        build_report_summary_system_prompt(state, config), config.report_summary_model
+    )
+    responses = await invoke_chat_models(
+        model,
+        config.report_summary_model,
+        [
+            [system_message, HumanMessage(format_docs([doc]))]
+            for doc in page_contents
+        ],
+        config,
+        return_exceptions=True,
+    )
+    summaries = []
+    for doc, response in zip(page_contents, responses):
+        if isinstance(response, Exception):
+            logger.warning(
+                f"Failed to summarize {doc.metadata.get('source', 'page')}, using the full text: {response}"
+            )
+            summaries.append(doc)
+        else:
+            summaries.append(
+                Document(
+                    page_content=parse_summary(response.content), metadata=doc.metadata
+                )
+            )
+    return summaries
+
+
 async def generate_report(
     state: GeneratePostState, *, config: RunnableConfig
 ) -> GeneratePostState:
-    """Create report content."""
+    """Create report content.
+
+    When the pages are estimated to exceed `report_map_reduce_tokens`, each page is
+    summarized first and the report is written from the summaries.
+    """
     config = GeneratePostConfiguration.from_runnable_config(config)
+    # pages summarized by the relevance check are reported from their summaries;
+    # the others are resolved to their full text
+    page_contents = await aload_documents(
+        use_page_summaries(state.page_contents), config
+    )
+    system_message = to_system_message(
+        build_report_system_prompt(state, config), config.report_model
+    )
+    content_message = HumanMessage(
+        build_report_content_prompt(state, config, page_contents)
+    )
+    input_tokens = estimate_tokens([system_message, content_message])
+    if 0 < config.report_map_reduce_tokens < input_tokens:
+        logger.info(
+            f"Report input of ~{input_tokens} tokens exceeds {config.report_map_reduce_tokens}, "
+            f"summarizing {len(page_contents)} pages first"
+        )
+        summaries = await summarize_pages(state, config, page_contents)
+        content_message = HumanMessage(
+            build_report_content_prompt(state, config, summaries)
+        )
     # call model to generate the report
-    model = load_chat_model(config.report_model)
-    response = await model.ainvoke(
-        [
-            SystemMessage(build_report_system_prompt(state, config)),
-            HumanMessage(build_report_content_prompt(state, config)),
-        ]
+    model = load_chat_model(config.report_model, config=config)
+    [response] = await invoke_chat_models(
+        model,
+        config.report_model,
+        [[system_message, content_message]],
+        config,
     )
     return {
         "report": parse_report(response.content),
     }
 
 
+async def discover_images(
+    state: GeneratePostState, *, config: RunnableConfig
+) -> GeneratePostState:
+    """Extract and probe candidate images while the report and post are written.
+
+    Only the post dependent validation and reranking wait for the final post.
+    """
+    if not state.relevant_links:
+        return {}
+    try:
+        result = await find_image_options(state, config)
+    except (ValueError, NotImplementedError) as e:
+        # images are optional; never fail the post over them
+        logger.warning(f"Skipping image discovery: {e}")
+        return {}
+    return {"image_options": result["image_options"]}
+
+
 async def generate_post(
     state: GeneratePostState, *, config: RunnableConfig, store: BaseStore
 ) -> GeneratePostState:
@@ -124,21 +227,59 @@ async def generate_post(
         raise ValueError("No relevant links found.")
 
     config = GeneratePostConfiguration.from_runnable_config(config)
-    # call model to generate the post
-    model = load_chat_model(config.post_model)
-    response = await model.ainvoke(
-        [
-            SystemMessage(build_post_system_prompt(state, config, store)),
-            HumanMessage(build_report_prompt(state, config)),
+    reflections_prompt = await build_reflections_prompt(state, config, store)
+    system_prompt = build_post_system_prompt(state, config, store, reflections_prompt)
+    report_prompt = build_report_prompt(state, config)
+
+    # spread the candidates across the candidate models
+    candidates = max(1, config.post_candidates)
+    model_names = config.candidate_post_models or [config.post_model]
+    requests_by_model: dict[str, list] = {}
+    for index in range(candidates):
+        model_name = model_names[index % len(model_names)]
+        prompt = report_prompt
+        if candidates > 1:
+            # also keeps otherwise identical requests from sharing a cached response
+            prompt += f"\n\nThis is draft {index + 1} of {candidates}. Take a distinct angle from the other drafts."
+        requests_by_model.setdefault(model_name, []).append(
+            [to_system_message(system_prompt, model_name), HumanMessage(prompt)]
+        )
+
+    async def generate(model_name: str, requests: list) -> list:
+        model = load_chat_model(model_name, config=config)
+        return await invoke_chat_models(
+            model, model_name, requests, config, return_exceptions=candidates > 1
+        )
+
+    if config.batch_mode:
+        # each call may pause the run until its batch completes; resume them in turn
+        results = [
+            await generate(name, requests) for name, requests in requests_by_model.items()
         ]
-    )
+    else:
+        results = await asyncio.gather(
+            *(generate(name, requests) for name, requests in requests_by_model.items())
+        )
+    responses = [response for group in results for response in group]
+    posts = [
+        parse_post(response.content)
+        for response in responses
+        if not isinstance(response, Exception)
+    ]
+    if not posts:
+        raise responses[0]
+
+    rules = await fetch_rules(config, state.style) if len(posts) > 1 else []
+    ranked = rank_posts(posts, config.max_post_length, rules, state.relevant_links)
+
     # calculate post during time for next Saturday
     next_saturday = get_next_saturday()
     random_hour = random.randint(8, 17)  # 8am to 5pm
     random_minute = random.randint(0, 59)
     schedule_date = next_saturday.replace(hour=random_hour, minute=random_minute)
     return {
-        "post": parse_post(response.content),
+        "post": ranked[0][0],
+        "alternative_posts": [post for post, _ in ranked[1:]],
         "schedule_date": schedule_date,
     }
 
@@ -158,23 +299,58 @@ async def condense_post(
     original_post_length = len(remove_urls(state.post))
 
     # call model to generate the post
-    model = load_chat_model(config.post_model)
-    response = await model.ainvoke(
+    model = load_chat_model(config.post_model, config=config)
+    reflections_prompt = await build_reflections_prompt(state, config, store)
+    [response] = await invoke_chat_models(
+        model,
+        config.post_model,
         [
-            SystemMessage(
-                build_condense_post_system_prompt(
-                    state=state,
-                    config=config,
-                    original_post_length=original_post_length,
-                    store=store,
-                )
-            ),
-            HumanMessage(f"Here is the the post I'd like to condense: {state.post}"),
-        ]
+            [
+                to_system_message(
+                    build_condense_post_system_prompt(
+                        state=state,
+                        config=config,
+                        original_post_length=original_post_length,
+                        store=store,
+                        reflections_prompt=reflections_prompt,
+                    ),
+                    config.post_model,
+                ),
+                HumanMessage(f"Here is the the post I'd like to condense: {state.post}"),
+            ]
+        ],
+        config,
     )
     return {
         "post": parse_post(response.content),
         "condense_count": state.condense_count + 1,
+        # the other candidates were not condensed, so they no longer fit
+        "alternative_posts": [],
+    }
+
+
+async def enforce_length(
+    state: GeneratePostState, *, config: RunnableConfig
+) -> GeneratePostState:
+    """Fix small post length overages locally so condense_post only runs when needed."""
+    config = GeneratePostConfiguration.from_runnable_config(config)
+    was_over = post_length(state.post) > config.max_post_length
+    result = enforce_post_length(
+        state.post, config.max_post_length, config.max_local_trim_chars
+    )
+
+    saved = 0
+    if result.length <= config.max_post_length:
+        if state.condense_count == 0 and not was_over:
+            # a fresh post within the limit used to be condensed regardless
+            saved, reason = 1, "within_limit"
+        elif was_over and state.condense_count < config.max_condense_count:
+            saved, reason = 1, "local_trim"
+    if saved:
+        CONDENSE_CALLS_SAVED_TOTAL.inc(reason=reason)
+    return {
+        "post": result.post,
+        "condense_calls_saved": state.condense_calls_saved + saved,
     }
 
 
@@ -254,7 +430,7 @@ async def human(
 
             if not config.text_only_mode:
                 procceesed_image = await process_image_input(
-                    cast_args.get("image", None)
+                    cast_args.get("image", None), config
                 )
                 if procceesed_image != "remove":
                     image_state = procceesed_image
@@ -271,7 +447,9 @@ async def human(
             if state.post != response_post:
                 spawn_reflection_graph(
                     state=ReflectionState(
-                        original_text=state.post, revised_text=response_post
+                        original_text=state.post,
+                        revised_text=response_post,
+                        post_style=state.style,
                     ),
                     config=config,
                 )
@@ -297,7 +475,7 @@ async def human(
             cast_args: Dict[str, str] = response["args"]["args"]
             response_post = cast_args.get("post", None)
             post_date = parse_date(cast_args.get("date", default_date_string))
-            procceesed_image = await process_image_input(cast_args.get("image", None))
+            procceesed_image = await process_image_input(cast_args.get("image", None), config)
             if procceesed_image != "remove":
                 image_state = procceesed_image
             elif procceesed_image == "remove":
@@ -333,7 +511,9 @@ async def rewrite_post(
         raise ValueError("No user response found.")
 
     config = GeneratePostConfiguration.from_runnable_config(config)
-    model = load_chat_model(config.rewrite_model, config.rewrite_model_kwargs)
+    model = load_chat_model(
+        config.rewrite_model, config.rewrite_model_kwargs, config=config
+    )
     rewrite_post_prompt = await build_rewrite_post_prompt(state, config, store)
     editor_feedback = HumanMessage(state.user_response)
     response = await model.ainvoke(
@@ -343,18 +523,22 @@ async def rewrite_post(
         ]
     )
     new_post = parse_post(response.content)
-    await spawn_reflection_graph(
+    spawn_reflection_graph(
         ReflectionState(
             original_text=state.post,
             revised_text=new_post,
+            post_style=state.style,
             editor_feedback=editor_feedback,
         ),
+        config,
     )
 
     return {
         "post": new_post,
         "next": None,
         "user_response": None,
+        # the alternatives do not include the requested changes
+        "alternative_posts": [],
     }
 
 
@@ -364,35 +548,25 @@ async def schedule_post(
     """Schedule the post."""
     config = GeneratePostConfiguration.from_runnable_config(config)
     try:
-        filepath = None
+        image_fields = {}
         if state.image and state.image.get("image_url"):
-            mime_type = state.image.get("mime_type", "image/jpeg")
-            extension = mime_type.split("/")[-1] if "/" in mime_type else "jpg"
-
-            filename = f"{uuid.uuid4()}.{extension}"
-            filepath = f"{config.image_dir}/{filename}"
-            image_url = state.image["image_url"]
-            response = requests.get(image_url)
-            if response.status_code == 200:
-                with open(filepath, "wb") as f:
-                    f.write(response.content)
-            else:
-                raise ValueError(f"Failed to download image from {image_url}")
+            image_fields = await ImageStore(config.image_dir, config).store_url(
+                state.image["image_url"], state.image.get("mime_type", "image/jpeg")
+            )
 
         scheduled_post = {
             "topic": state.topic,
             "post": convert_md_to_unicode(state.post),
             "scheduled_date": calc_scheduled_date(state.schedule_date),
             "status": "pending",
-            **({"image_path": filepath} if filepath else {}),
+            **image_fields,
             "created_date": datetime.now(),
         }
-        collection = load_linkedin_posts_collection(config)
-        result = collection.insert_one(scheduled_post)
+        object_id = await get_repository(config).insert_linkedin_post(scheduled_post)
     except Exception as e:
         raise ValueError(f"Error storing new post: {e}")
     return {
-        "object_id": result.inserted_id if result else None,
+        "object_id": object_id,
     }
 
 
@@ -407,6 +581,25 @@ async def update_schedule_date(
     }
 
 
+def route_post_request(
+    state: GeneratePostState, config: RunnableConfig
+) -> Literal["parse_post_request", "verify_links"]:
+    """Skip parsing the request when its topic and links were given directly."""
+    if state.topic and state.links:
+        return "verify_links"
+    return "parse_post_request"
+
+
+def route_after_verify_links(
+    state: GeneratePostState, config: RunnableConfig
+) -> list[str]:
+    """Write the report, discovering images alongside it unless in text only mode."""
+    config = GeneratePostConfiguration.from_runnable_config(config)
+    if config.text_only_mode:
+        return ["generate_report"]
+    return ["generate_report", "discover_images"]
+
+
 def route_condense_human_images(
     state: GeneratePostState, config: RunnableConfig
 ) -> Literal["condense_post", "human", "find_images"]:
@@ -442,18 +635,24 @@ builder.add_node(parse_post_request)
 builder.add_node("verify_links", verify_links)
 builder.add_node(generate_post)
 builder.add_node(generate_report)
+builder.add_node(discover_images)
 builder.add_node(condense_post)
+builder.add_node(enforce_length)
 builder.add_node(human)
 builder.add_node("find_images", find_images)
 builder.add_node(rewrite_post)
 builder.add_node(schedule_post)
 builder.add_node(update_schedule_date)
-builder.add_edge(START, "parse_post_request")
+builder.add_conditional_edges(START, route_post_request)
 builder.add_edge("parse_post_request", "verify_links")
-builder.add_edge("verify_links", "generate_report")
+builder.add_conditional_edges(
+    "verify_links", route_after_verify_links, ["generate_report", "discover_images"]
+)
+builder.add_edge("discover_images", END)
 builder.add_edge("generate_report", "generate_post")
-builder.add_edge("generate_post", "condense_post")
-builder.add_conditional_edges("condense_post", route_condense_human_images)
+builder.add_edge("generate_post", "enforce_length")
+builder.add_edge("condense_post", "enforce_length")
+builder.add_conditional_edges("enforce_length", route_condense_human_images)
 builder.add_edge("find_images", "human")
 builder.add_edge("rewrite_post", "human")
 builder.add_conditional_edges("human", route_human_response)
@@ -1,14 +1,52 @@
-"""Utility functions specifically for handling interrupts."""
+"""Utility functions specifically for handling interrupts.
 
+Reviewer replies are routed locally when they are unambiguous: a bare priority
+(`p1`), a date such as `12/25/2024 10:00 AM PST`, optionally behind phrasing like
+"schedule it for", or an edit instruction that says nothing about scheduling.  Only
+the remaining replies are sent to the route model.
+"""
+
+import logging
+import re
 from dataclasses import dataclass
-from typing import Literal, TypedDict
+from typing import Literal, Optional, TypedDict
 
 from langchain_core.messages import HumanMessage
 
 from agents.generate_post.configuration import GeneratePostConfiguration
+from agents.metrics import counter
 from agents.prompts import ROUTE_RESPONSE_PROMPT
 from agents.utils import load_chat_model
 
+logger = logging.getLogger(__name__)
+
+ROUTE_DECISIONS_TOTAL = counter(
+    "route_decisions_total",
+    "Reviewer replies routed, by route and whether the route model was needed.",
+    labels=("route", "source"),
+)
+
+# phrasing in front of a date or priority, e.g. "please schedule it for"
+_SCHEDULE_PREFIX = re.compile(
+    r"^(?:please\s+)?(?:re)?(?:schedule|set|change|move|update|post|publish)\b.*?\b(?:to|for|on|at|as)\s+"
+)
+_PRIORITY = re.compile(r"(?:priority\s*|p\s*)([123])")
+_DATE = re.compile(
+    r"\d{1,2}/\d{1,2}/\d{4}(?:,?\s+\d{1,2}(?::\d{2})?\s*(?:am|pm)?(?:\s+[a-z]{2,5})?)?"
+)
+_DATE_CUES = re.compile(
+    r"\b(?:date|day|time|schedul\w*|priority|p[123]|today|tonight|tomorrow|week|month"
+    r"|monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+    r"|jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|june?|july?|aug(?:ust)?"
+    r"|sep(?:tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b"
+    r"|\d{1,2}(?::\d{2})?\s*(?:am|pm)\b|\d{1,2}/\d{1,2}"
+)
+_REWRITE_CUES = re.compile(
+    r"\b(?:rewrite|rephrase|reword|edit|shorten|shorter|longer|lengthen|expand|simplify"
+    r"|tone|wording|sentence|paragraph|intro|hook|hashtags?|emojis?|typo|grammar"
+    r"|add|remove|delete|drop|replace|mention|include|cut|fix|less|more)\b"
+)
+
 
 class RouteResponseArgs(TypedDict):
     """A TypedDict for the arguments required to determine the route response."""
@@ -49,6 +87,34 @@ def build_route_content_prompt(
     )
 
 
+def route_locally(
+    user_response: str,
+) -> Optional[Literal["rewrite_post", "update_date"]]:
+    """Route a reviewer reply without the route model when its intent is unambiguous.
+
+    Args:
+        user_response (str): The reviewer's reply.
+
+    Returns:
+        Optional[str]: "update_date" for a priority or date, "rewrite_post" for an
+            edit instruction without scheduling cues, or None if the reply is
+            ambiguous and needs the route model.
+    """
+    text = " ".join(user_response.lower().split()).rstrip(".!")
+    if not text or "?" in text:
+        return None
+    value = _SCHEDULE_PREFIX.sub("", text)
+    if _PRIORITY.fullmatch(value) or _DATE.fullmatch(value):
+        return "update_date"
+    date_cues = _DATE_CUES.search(text)
+    rewrite_cues = _REWRITE_CUES.search(text)
+    if rewrite_cues and not date_cues:
+        return "rewrite_post"
+    if date_cues and not rewrite_cues and _SCHEDULE_PREFIX.match(text):
+        return "update_date"
+    return None
+
+
 async def determine_next_node(
     post: str,
     date_or_priority: str,
@@ -57,6 +123,9 @@ async def determine_next_node(
 ) -> RouteResponseArgs:
     """Determine the next node based on the user's response.
 
+    Unambiguous replies are routed locally (see `route_locally`); the route model is
+    only called for the rest.
+
     Args:
         post (str): The post content.
         date_or_priority (str): The date or priority information.
@@ -66,9 +135,16 @@ async def determine_next_node(
     Returns:
         RouteResponseArgs: The arguments required to determine the route response.
     """
-    model = load_chat_model(config.route_model)
+    if config.local_routing:
+        route = route_locally(user_response)
+        if route:
+            ROUTE_DECISIONS_TOTAL.inc(route=route, source="local")
+            logger.debug(f"Routed reviewer reply to {route} locally")
+            return {"route": route}
+    model = load_chat_model(config.route_model, config=config)
     model = model.with_structured_output(RouteDecision)
     prompt = build_route_content_prompt(config, post, date_or_priority, user_response)
     # not sure if this should be a system message instead
     result = await model.ainvoke([HumanMessage(content=prompt)])
+    ROUTE_DECISIONS_TOTAL.inc(route=result["route"], source="model")
     return result
@@ -0,0 +1,141 @@
+"""Deterministic post length enforcement.
+
+Posts that are only slightly over `max_post_length` are brought under it with local
+edits instead of another round trip through the condense model.  Edits are applied
+least destructive first, and each only while the post is still too long:
+
+1. collapse runs of emoji to a single emoji;
+2. drop hashtags from the hashtag block ending the post, keeping at least `MIN_HASHTAGS`;
+3. shorten list bullets by removing parenthetical asides and trailing punctuation.
+
+Whitespace is always normalised, although it does not count towards the length.
+
+Classes:
+    TrimResult: A post after local length enforcement.
+
+Functions:
+    remove_urls: Remove all URLs and multi-spaces from the input string.
+    post_length: Return the length of a post as measured against `max_post_length`.
+    enforce_post_length: Bring a post under a length limit with local edits.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from agents.metrics import counter
+
+MIN_HASHTAGS = 2
+
+CONDENSE_CALLS_SAVED_TOTAL = counter(
+    "post_condense_calls_saved_total",
+    "Condense model calls avoided because a post was within its length limit or trimmed locally.",
+    labels=("reason",),
+)
+
+_URL = re.compile(r"http[s]?://\S+")
+_WHITESPACE = re.compile(r"\s+")
+# pictographs, symbols and dingbats, with their variation selectors, joiners and skin tones
+EMOJI_PATTERN = (
+    r"[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF]"
+    r"[\uFE0F\u200D\U0001F3FB-\U0001F3FF]*"
+)
+_EMOJI_RUN = re.compile(rf"({EMOJI_PATTERN})(?:[ \t]*{EMOJI_PATTERN})+")
+HASHTAG_PATTERN = r"(?<!\S)#\w+"
+_HASHTAG = re.compile(rf"[ \t]*{HASHTAG_PATTERN}")
+_TRAILING_HASHTAGS = re.compile(rf"(?:\s*{HASHTAG_PATTERN})+\s*$")
+_BULLET = re.compile(r"^(\s*(?:[-*•]|\d+[.)])\s+)(.*)$", re.MULTILINE)
+_PARENTHETICAL = re.compile(r"\s*\([^()]*\)")
+
+
+def remove_urls(input_string: str) -> str:
+    """Remove all URLs and multi-spaces from the input string."""
+    return _WHITESPACE.sub(" ", _URL.sub("", input_string)).strip()
+
+
+def post_length(post: str) -> int:
+    """Return the length of a post as measured against `max_post_length`."""
+    return len(remove_urls(post))
+
+
+@dataclass
+class TrimResult:
+    """A post after local length enforcement.
+
+    Attributes:
+        post: The edited post.
+        length: Its measured length.
+        steps: The edits that changed the post.
+    """
+
+    post: str
+    length: int
+    steps: list[str] = field(default_factory=list)
+
+
+def normalize_whitespace(post: str) -> str:
+    """Strip trailing spaces and collapse repeated spaces and blank lines."""
+    lines = [re.sub(r"(?<=\S)[ \t]{2,}", " ", line).rstrip() for line in post.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def collapse_emoji(post: str) -> str:
+    """Replace each run of emoji with its first emoji."""
+    return _EMOJI_RUN.sub(r"\1", post)
+
+
+def trim_hashtags(post: str, max_length: int) -> str:
+    """Drop hashtags from the end of a post until it fits, keeping `MIN_HASHTAGS`.
+
+    Only the block of hashtags ending the post is trimmed; hashtags used as words
+    in the text are left alone.
+    """
+    block = _TRAILING_HASHTAGS.search(post)
+    hashtags = list(_HASHTAG.finditer(post, block.start())) if block else []
+    while len(hashtags) > MIN_HASHTAGS and post_length(post) > max_length:
+        last = hashtags.pop()
+        post = post[: last.start()] + post[last.end() :]
+    return normalize_whitespace(post)
+
+
+def shorten_bullets(post: str) -> str:
+    """Remove parenthetical asides and trailing punctuation from list bullets."""
+
+    def shorten(match: re.Match) -> str:
+        text = _PARENTHETICAL.sub("", match.group(2)).rstrip(" .!;")
+        return f"{match.group(1)}{text}"
+
+    return _BULLET.sub(shorten, post)
+
+
+def enforce_post_length(post: str, max_length: int, max_overage: int) -> TrimResult:
+    """Bring a post under a length limit with local edits.
+
+    Posts more than `max_overage` characters over the limit are returned unchanged
+    (apart from whitespace): they need the condense model.
+
+    Args:
+        post: The post.
+        max_length: The length limit, as measured by `post_length`.
+        max_overage: The largest overage attempted locally.
+
+    Returns:
+        TrimResult: The post, edited as far as needed and possible.
+    """
+    post = normalize_whitespace(post)
+    overage = post_length(post) - max_length
+    if overage <= 0 or overage > max_overage:
+        return TrimResult(post, post_length(post))
+
+    steps = []
+    for name, edit in (
+        ("collapse_emoji", collapse_emoji),
+        ("trim_hashtags", lambda p: trim_hashtags(p, max_length)),
+        ("shorten_bullets", shorten_bullets),
+    ):
+        if post_length(post) <= max_length:
+            break
+        edited = normalize_whitespace(edit(post))
+        if edited != post:
+            steps.append(name)
+            post = edited
+    return TrimResult(post, post_length(post), steps)
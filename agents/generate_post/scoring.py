@@ -0,0 +1,122 @@
+"""Local scoring of candidate posts.
+
+When several candidate posts are generated, they are ranked without another model
+call, on the checks a reviewer would otherwise send back as rewrite requests:
+
+- length: within `max_post_length`, with a penalty growing with the overage;
+- links: the post mentions at least one of the relevant links;
+- rules: the post does not break the reflection rules that can be checked
+  mechanically, i.e. outright bans ("avoid", "never", "do not use") of emoji,
+  hashtags, exclamation marks or a quoted phrase.  Rules that limit a quantity
+  ("no more than 3 hashtags") and all other rules are left to the model and the
+  reviewer.
+
+Classes:
+    PostScore: The score of a candidate post and its failed checks.
+
+Functions:
+    score_post: Score a candidate post.
+    rank_posts: Order candidate posts from best to worst.
+"""
+
+import re
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+from agents.generate_post.length import EMOJI_PATTERN, HASHTAG_PATTERN, post_length
+
+LENGTH_WEIGHT = 4.0
+LINK_WEIGHT = 2.0
+RULE_WEIGHT = 1.0
+
+_BAN = re.compile(r"\b(?:avoid|never|(?:don't|do not) (?:use|include|add|say|write))\b", re.I)
+_QUANTITY = re.compile(
+    r"\d|\b(?:one|two|three|four|five|six|seven|eight|nine|ten|more than|fewer than|"
+    r"less than|at most|at least|maximum|max|up to)\b",
+    re.I,
+)
+_QUOTED = re.compile(r"[\"“]([^\"”]{3,})[\"”]|(?<!\w)'([^']{3,})'(?!\w)")
+_EMOJI = re.compile(EMOJI_PATTERN)
+_HASHTAG = re.compile(HASHTAG_PATTERN)
+
+
+@dataclass
+class PostScore:
+    """The score of a candidate post; higher is better.
+
+    Attributes:
+        score: The combined score.
+        failed: Names of the checks the post failed.
+    """
+
+    score: float
+    failed: list[str] = field(default_factory=list)
+
+
+def _broken_rules(post: str, rules: list[str]) -> list[str]:
+    broken = []
+    lowered = post.lower()
+    for rule in rules:
+        if not _BAN.search(rule) or _QUANTITY.search(_QUOTED.sub("", rule)):
+            continue
+        rule_lowered = rule.lower()
+        if "emoji" in rule_lowered and _EMOJI.search(post):
+            broken.append(rule)
+        elif "hashtag" in rule_lowered and _HASHTAG.search(post):
+            broken.append(rule)
+        elif "exclamation" in rule_lowered and "!" in post:
+            broken.append(rule)
+        elif any(
+            (double or single).lower() in lowered
+            for double, single in _QUOTED.findall(rule)
+        ):
+            broken.append(rule)
+    return broken
+
+
+def _mentions_link(post: str, links: list[str]) -> bool:
+    for link in links:
+        host = urlparse(link).netloc.removeprefix("www.")
+        if link in post or (host and host in post):
+            return True
+    return False
+
+
+def score_post(
+    post: str, max_length: int, rules: list[str], links: list[str]
+) -> PostScore:
+    """Score a candidate post.
+
+    Args:
+        post: The candidate post.
+        max_length: The length limit, as measured by `post_length`.
+        rules: The reflection rules of the post style.
+        links: The relevant links the post should reference.
+
+    Returns:
+        PostScore: The score and failed checks.
+    """
+    score = 0.0
+    failed = []
+    overage = post_length(post) - max_length
+    if overage > 0:
+        score -= LENGTH_WEIGHT * min(1.0, overage / max_length)
+        failed.append("length")
+    if links and not _mentions_link(post, links):
+        score -= LINK_WEIGHT
+        failed.append("links")
+    for rule in _broken_rules(post, rules):
+        score -= RULE_WEIGHT
+        failed.append(f"rule: {rule}")
+    return PostScore(score, failed)
+
+
+def rank_posts(
+    posts: list[str], max_length: int, rules: list[str], links: list[str]
+) -> list[tuple[str, PostScore]]:
+    """Order candidate posts from best to worst.
+
+    Ties keep the order the posts were given in.
+    """
+    scored = [(post, score_post(post, max_length, rules, links)) for post in posts]
+    return sorted(scored, key=lambda item: item[1].score, reverse=True)
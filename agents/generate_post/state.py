@@ -63,6 +63,8 @@ class GeneratePostState:
     """Unique list of links found in the message"""
     post: str = ""
     """The generated post"""
+    alternative_posts: list[str] = field(default_factory=list)
+    """Runner-up candidate posts, best first, offered to the reviewer as alternatives."""
     schedule_date: PostDate = None
     """The data to schedule the post for."""
     user_response: str = None
@@ -75,6 +77,8 @@ class GeneratePostState:
     image_options: list[str] = field(default_factory=list)
     """ The image options to provide the user. """
     condense_count: int = 0 # TODO: make sure this can handle parrallelism
+    condense_calls_saved: int = 0
+    """Condense model calls avoided by enforcing the post length locally."""
     object_id: str = None
     """The object ID of the post stored in the mongo database."""
 
@@ -2,17 +2,20 @@
 
 import logging
 import re
-import threading
 from datetime import datetime, timedelta
-from typing import Any, cast
+from typing import Any, Optional, cast
 
-import aiohttp
 import pytz
+from langchain_core.documents import Document
 from langgraph.store.base import BaseStore
 
-from agents.find_images.utils import BLACKLISTED_MIME_TYPES
+from agents.blob_store import BLOB_CHARS_KEY, BLOB_KEY, SUMMARY_KEY
+from agents.find_images.utils import is_blacklisted_mime_type
 from agents.generate_post.configuration import GeneratePostConfiguration
+from agents.generate_post.length import remove_urls
 from agents.generate_post.state import GeneratePostState, PostDate
+from agents.http import get_http_session
+from agents.image_probe import get_image_probe
 from agents.prompts import (
     CONDENSE_POST_PROMPT,
     NEWS_POST_CONTENT_RULES,
@@ -25,12 +28,13 @@ from agents.prompts import (
     REFLECTIONS_PROMPT,
     REPORT_CONTENT_RULES,
     REPORT_STRUCTURE_GUIDELINES,
+    REPORT_SUMMARY_SYSTEM_PROMPT,
     REPORT_SYSTEM_PROMPT_DEFAULT,
     REPORT_SYSTEM_PROMPT_NEWS,
     REWRITE_POST_PROMPT,
     WRITE_POST_SYSTEM_PROMPT,
 )
-from agents.reflection.graph import graph as reflection_graph
+from agents.reflection.queue import get_reflection_queue
 from agents.reflection.state import ReflectionState
 from agents.utils import fetch_rules, format_docs, is_valid_url
 
@@ -85,13 +89,20 @@ def get_structure_instructions(
     state: GeneratePostState, config: GeneratePostConfiguration
 ) -> str:
     """Get post structure instructions."""
-    if state.style in instructions_by_style:
-        if state.style == "news":
-            return instructions_by_style[state.style].format(
-                commentary=state.commentary
-            )
-    else:
-        return POST_STRUCTURE_INSTRUCTIONS
+    return instructions_by_style.get(state.style, POST_STRUCTURE_INSTRUCTIONS)
+
+
+def build_commentary_prompt(
+    state: GeneratePostState, config: GeneratePostConfiguration
+) -> str:
+    """Get the editorial commentary to include in news posts."""
+    if state.style != "news":
+        return ""
+    return f"""
+<commentary>
+{state.commentary}
+</commentary>
+"""
 
 
 content_rules_by_style = {
@@ -111,14 +122,22 @@ def get_content_rules(
 
 
 def build_post_system_prompt(
-    state: GeneratePostState, config: GeneratePostConfiguration, store: BaseStore
+    state: GeneratePostState,
+    config: GeneratePostConfiguration,
+    store: BaseStore,
+    reflections_prompt: str = "",
 ) -> str:
-    """Build the system prompt for generating a post."""
+    """Build the system prompt for generating a post.
+
+    The examples, structure, rules and reflections form a cacheable prefix that only
+    changes with the post style and the reflection rules.
+    """
     return WRITE_POST_SYSTEM_PROMPT.format(
         examples=get_examples(state, config),
         structure_instructions=get_structure_instructions(state, config),
         content_rules=get_content_rules(state, config),
-        reflections_prompt=build_reflections_prompt(state, config, store),
+        reflections_prompt=reflections_prompt,
+        commentary_prompt=build_commentary_prompt(state, config),
     )
 
 
@@ -127,13 +146,18 @@ def build_condense_post_system_prompt(
     config: GeneratePostConfiguration,
     store: BaseStore,
     original_post_length: int,
+    reflections_prompt: str = "",
 ) -> str:
-    """Build the system prompt for generating a post."""
+    """Build the system prompt for condensing a post.
+
+    The report and length targets are placed after the cacheable rules and structure.
+    """
     return CONDENSE_POST_PROMPT.format(
         report=state.report,
         structure_instructions=get_structure_instructions(state, config),
         content_rules=get_content_rules(state, config),
-        reflections_prompt=build_reflections_prompt(state, config, store),
+        reflections_prompt=reflections_prompt,
+        commentary_prompt=build_commentary_prompt(state, config),
         original_post_length=original_post_length,
         max_post_length=config.max_post_length,
     )
@@ -161,7 +185,7 @@ def build_report_system_prompt(
 ) -> str:
     """Get the system prompt for generating a post."""
     if state.style == "news":
-        return REPORT_SYSTEM_PROMPT_NEWS
+        return REPORT_SYSTEM_PROMPT_NEWS.format()
     else:
         return REPORT_SYSTEM_PROMPT_DEFAULT.format(
             content_rules=get_report_content_rules(state, config),
@@ -169,6 +193,15 @@ def build_report_system_prompt(
         )
 
 
+def build_report_summary_system_prompt(
+    state: GeneratePostState, config: GeneratePostConfiguration
+) -> str:
+    """Get the system prompt for summarizing one page ahead of the report."""
+    return REPORT_SUMMARY_SYSTEM_PROMPT.format(
+        report_instructions=build_report_system_prompt(state, config)
+    )
+
+
 def get_report_content_rules(
     state: GeneratePostState, config: GeneratePostConfiguration
 ) -> str:
@@ -230,6 +263,7 @@ Original URL: ${original_link}
 ```
 {post}
 ```
+{alternatives_text}
 
 {image_options_text}
 
@@ -303,11 +337,24 @@ def build_interrupt_desc(
             "Text only mode enabled. Image support has been disabled.\n"
         )
 
+    alternatives_text = ""
+    if state.alternative_posts:
+        alternatives = "\n".join(
+            f"#### Alternative {index}\n```\n{post}\n```"
+            for index, post in enumerate(state.alternative_posts, start=1)
+        )
+        alternatives_text = f"""
+### Alternatives
+Other candidate posts, best first. Paste one into the 'post' field to use it instead.
+{alternatives}
+"""
+
     return get_interupt_desc_template(state, config).format(
         unknow_response_desc=get_unknown_response_desc(state, config),
         relavant_links="\n- ".join(state.relevant_links),
         original_link=state.links[0],
         post=state.post,
+        alternatives_text=alternatives_text,
         image_options_text=image_options_text,
         image_instruction=image_instructions,
         report=state.report,
@@ -345,13 +392,40 @@ def parse_date(string: str) -> PostDate:
         return None
 
 
+def use_page_summaries(page_contents: list[Document]) -> list[Document]:
+    """Replace pages summarized while verifying links with their summaries.
+
+    Pages without a summary are returned unchanged, so they are still read in full.
+    """
+    documents = []
+    for doc in page_contents:
+        summary = doc.metadata.get(SUMMARY_KEY)
+        if not summary:
+            documents.append(doc)
+            continue
+        metadata = {
+            key: value
+            for key, value in doc.metadata.items()
+            if key not in (BLOB_KEY, BLOB_CHARS_KEY, SUMMARY_KEY)
+        }
+        documents.append(Document(page_content=summary, metadata=metadata))
+    return documents
+
+
 def build_report_content_prompt(
-    state: GeneratePostState, config: GeneratePostConfiguration
+    state: GeneratePostState,
+    config: GeneratePostConfiguration,
+    page_contents: Optional[list[Document]] = None,
 ) -> str:
-    """Get content rules."""
+    """Get content rules.
+
+    `page_contents` are the resolved page contents; defaults to those in state.
+    """
+    if page_contents is None:
+        page_contents = state.page_contents
     return f"""
 The following text contains summaries, or entire pages from the content I submitted to you. Please review the content and generate a report on it.
-{format_docs(state.page_contents)}
+{format_docs(page_contents)}
     """
 
 
@@ -394,9 +468,13 @@ def parse_report(input_string: str) -> str:
         return input_string
 
 
-def remove_urls(input_string: str) -> str:
-    """Remove all URLs and multi-spaces from the input string."""
-    return re.sub(r"\s+", " ", re.sub(r"http[s]?://\S+", "", input_string)).strip()
+def parse_summary(input_string: str) -> str:
+    """Extract contents between <summary> tags from the input string."""
+    match = re.search(r"<summary>(.*?)</summary>", input_string, re.DOTALL)
+    if match:
+        return match.group(1).strip()
+    else:
+        return input_string
 
 
 def calc_scheduled_date(scheduled: PostDate) -> datetime:
@@ -412,22 +490,21 @@ def calc_scheduled_date(scheduled: PostDate) -> datetime:
         return scheduled
 
 
-async def process_image_input(input: str) -> dict:
+async def process_image_input(
+    input: str, config: GeneratePostConfiguration = None
+) -> dict:
     """Process image input."""
     if input and input.lower() == "remove":
         return "remove"
     if is_valid_url(input):
-        content_type = await determine_content_type(input)
-        # if image type is blacklisted, then don't return it
-        if any(
-            content_type.startswith(blacklisted)
-            for blacklisted in BLACKLISTED_MIME_TYPES
-        ):
+        info = await get_image_probe(config).probe(input)
+        # if the image is unreachable or its type is blacklisted, then don't return it
+        if not info.ok or is_blacklisted_mime_type(info.mime_type):
             return None
         else:
             return {
                 "image_url": input,
-                "mime_type": content_type,
+                "mime_type": info.mime_type,
             }
     else:
         return None
@@ -438,10 +515,10 @@ async def image_url_to_buffer(url: str) -> dict[str, Any]:
     if not is_valid_url(url=url):
         raise Exception("Invalid image URL provided")
 
-    response = await aiohttp.ClientSession().get(url=url)
-    response.raise_for_status()
-    buffer = await response.read()
-    content_type = response.headers.get("Content-Type", "image/jpeg")
+    async with get_http_session().get(url=url) as response:
+        response.raise_for_status()
+        buffer = await response.read()
+        content_type = response.headers.get("Content-Type", "image/jpeg")
 
     return {"buffer": buffer, "content_type": content_type}
 
@@ -451,27 +528,25 @@ async def determine_content_type(url: str) -> str:
     if not is_valid_url(url=url):
         raise Exception("Invalid image URL provided")
 
-    response = await aiohttp.ClientSession().get(url=url)
-    response.raise_for_status()
-    await response.read()
-    content_type = response.headers.get("Content-Type", "image/jpeg")
-
-    return content_type
+    info = await get_image_probe().probe(url)
+    if not info.ok:
+        raise Exception(f"Failed to fetch image from {url}")
+    return info.mime_type or "image/jpeg"
 
 
-def spawn_reflection_graph(state: ReflectionState, config: GeneratePostConfiguration):
-    """Spawn a reflection graph."""
-    if not config.langgraph_url:
-        raise ValueError("No langgraph_url found.")
+def spawn_reflection_graph(
+    state: ReflectionState, config: GeneratePostConfiguration
+) -> Optional[int]:
+    """Queue a reflection on an editor's change to a post.
 
+    Returns:
+        Optional[int]: The id of the reflection job, or None if reflection is skipped.
+    """
     if not config.reflection_graph_name:
         logger.warning("Skipping reflections because no reflection graph name found.")
-        return
-
-    def invoke_reflection_graph(state: ReflectionState):
-        reflection_graph.invoke(state)
+        return None
+    if not state.original_text or not state.revised_text:
+        logger.warning("Skipping reflections because the post was removed.")
+        return None
 
-    # remote_graph = RemoteGraph(config.reflection_graph_name, url=config.langgraph_url)
-    # asyncio.create_task(remote_graph.invoke(input=state))
-    thread = threading.Thread(target=invoke_reflection_graph, args=(state,))
-    thread.start()
+    return get_reflection_queue(config).enqueue(state)
@@ -0,0 +1,116 @@
+"""Shared HTTP client for the agents.
+
+`aiohttp.ClientSession` owns a connection pool bound to the event loop it was created
+on.  One session is kept per running loop (the server's loop, or each `asyncio.run`
+of a graph invoked from a thread), so connections to image and content hosts are
+reused across nodes and threads instead of opened per request.
+
+Functions:
+    get_http_session: Return the shared session of the running event loop.
+    download_to_file: Stream a URL to disk through a temporary file.
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+import weakref
+from typing import Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+    weakref.WeakKeyDictionary()
+)
+_sessions_lock = threading.Lock()
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Return the shared session of the running event loop, creating it on first use.
+
+    Returns:
+        aiohttp.ClientSession: A session that must not be closed by callers.
+    """
+    loop = asyncio.get_running_loop()
+    with _sessions_lock:
+        session = _sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, limit_per_host=10)
+            )
+            _sessions[loop] = session
+        return session
+
+
+async def download_to_file(
+    url: str,
+    filepath: str,
+    max_bytes: int,
+    timeout_seconds: float,
+    session: Optional[aiohttp.ClientSession] = None,
+) -> int:
+    """Stream a URL to disk through a temporary file.
+
+    The body is written in chunks to a temporary file next to `filepath`, which is
+    renamed into place only once the download completes, so readers never see a
+    partial file.
+
+    Args:
+        url: The URL to download.
+        filepath: The final path of the file.
+        max_bytes: Largest body accepted.
+        timeout_seconds: Time allowed for the whole download.
+        session: Session to use instead of the shared one.
+
+    Returns:
+        int: The number of bytes written.
+
+    Raises:
+        ValueError: If the response is not successful or the body exceeds `max_bytes`.
+    """
+    session = session or get_http_session()
+    directory = os.path.dirname(filepath) or "."
+    os.makedirs(directory, exist_ok=True)
+    start = time.monotonic()
+    timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    size = 0
+    try:
+        async with session.get(url, timeout=timeout) as response:
+            if response.status != 200:
+                raise ValueError(
+                    f"Failed to download {url}: HTTP status {response.status}"
+                )
+            if (response.content_length or 0) > max_bytes:
+                raise ValueError(
+                    f"{url} is {response.content_length} bytes, more than the {max_bytes} allowed"
+                )
+            with os.fdopen(fd, "wb") as f:
+                fd = None
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_BYTES):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ValueError(
+                            f"{url} is more than the {max_bytes} bytes allowed"
+                        )
+                    # file writes are small and buffered; the loop is only ever
+                    # blocked for one chunk at a time
+                    f.write(chunk)
+        os.replace(tmp_path, filepath)
+    except asyncio.TimeoutError:
+        raise ValueError(f"Downloading {url} took more than {timeout_seconds}s")
+    finally:
+        if fd is not None:
+            os.close(fd)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    logger.debug(
+        f"Downloaded {size} bytes from {url} in {time.monotonic() - start:.2f}s"
+    )
+    return size
@@ -0,0 +1,234 @@
+"""Cheap image metadata lookups.
+
+Deciding whether an image URL is usable only needs its type, size and pixel
+dimensions, all of which are available from the response headers and the first few
+kilobytes of the file.  The probe fetches just those bytes with a ranged GET over the
+shared HTTP session and caches the result per URL, so the find images graph and the
+human review step never download whole images to inspect them.
+
+Classes:
+    ImageInfo: What is known about an image URL.
+    ImageProbe: Probe image URLs with a per-URL TTL cache, kept short for failures.
+
+Functions:
+    parse_image_header: Read the type and pixel dimensions from the first bytes of an image.
+    get_image_probe: Return the process-wide probe.
+"""
+
+import asyncio
+import logging
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import aiohttp
+
+from agents.http import get_http_session
+from agents.singleflight import AsyncMemo
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROBE_BYTES = 32 * 1024
+DEFAULT_PROBE_TTL_SECONDS = 60 * 60.0
+DEFAULT_FAILED_PROBE_TTL_SECONDS = 60.0
+PROBE_TIMEOUT_SECONDS = 10.0
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    """What is known about an image URL.
+
+    Attributes:
+        url: The probed URL.
+        ok: Whether the URL answered successfully.
+        mime_type: The type read from the image bytes, or the Content-Type header.
+        size: The size of the image in bytes, if reported.
+        width: Width in pixels, if it could be read from the header bytes.
+        height: Height in pixels, if it could be read from the header bytes.
+    """
+
+    url: str
+    ok: bool
+    mime_type: Optional[str] = None
+    size: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
+def _jpeg_dimensions(data: bytes) -> Optional[tuple[int, int]]:
+    # walk the segments up to the first start-of-frame marker
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        (length,) = struct.unpack(">H", data[i + 2 : i + 4])
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", data[i + 5 : i + 9])
+            return width, height
+        i += 2 + length
+    return None
+
+
+def _webp_dimensions(data: bytes) -> Optional[tuple[int, int]]:
+    chunk = data[12:16]
+    if chunk == b"VP8 " and len(data) >= 30:
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(data) >= 25:
+        bits = int.from_bytes(data[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(data) >= 30:
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def parse_image_header(
+    data: bytes,
+) -> tuple[Optional[str], Optional[int], Optional[int]]:
+    """Read the type and pixel dimensions from the first bytes of an image.
+
+    Supports PNG, GIF, JPEG, WebP, BMP and ICO; SVG is recognised by its markup.
+
+    Args:
+        data: The first bytes of the file.
+
+    Returns:
+        tuple: (mime_type, width, height), each None if it could not be determined.
+    """
+    dimensions: Optional[tuple[int, int]] = None
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        mime_type = "image/png"
+        if len(data) >= 24:
+            dimensions = struct.unpack(">II", data[16:24])
+    elif data[:6] in (b"GIF87a", b"GIF89a"):
+        mime_type = "image/gif"
+        if len(data) >= 10:
+            dimensions = struct.unpack("<HH", data[6:10])
+    elif data.startswith(b"\xff\xd8"):
+        mime_type = "image/jpeg"
+        dimensions = _jpeg_dimensions(data)
+    elif data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        mime_type = "image/webp"
+        dimensions = _webp_dimensions(data)
+    elif data.startswith(b"BM"):
+        mime_type = "image/bmp"
+        if len(data) >= 26:
+            width, height = struct.unpack("<ii", data[18:26])
+            dimensions = (width, abs(height))
+    elif data.startswith(b"\x00\x00\x01\x00"):
+        mime_type = "image/x-icon"
+    elif b"<svg" in data[:1024].lower():
+        mime_type = "image/svg+xml"
+    else:
+        return None, None, None
+    if dimensions:
+        return mime_type, dimensions[0], dimensions[1]
+    return mime_type, None, None
+
+
+def _total_size(response: aiohttp.ClientResponse) -> Optional[int]:
+    content_range = response.headers.get("Content-Range", "")
+    if "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    if response.status == 200:
+        return response.content_length
+    return None
+
+
+class ImageProbe:
+    """Probe image URLs, caching results per URL for `ttl_seconds`.
+
+    Concurrent probes of the same URL share one request.  Failures are often
+    transient (timeouts, rate limits), so they are only cached for
+    `failure_ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_PROBE_TTL_SECONDS,
+        probe_bytes: int = DEFAULT_PROBE_BYTES,
+        failure_ttl_seconds: float = DEFAULT_FAILED_PROBE_TTL_SECONDS,
+    ):
+        """Create a probe."""
+        self.ttl_seconds = ttl_seconds
+        self.probe_bytes = probe_bytes
+        self.failure_ttl_seconds = failure_ttl_seconds
+        self._memo = AsyncMemo(max_entries=10_000)
+
+    async def probe(self, url: str) -> ImageInfo:
+        """Return the type, size and dimensions of an image URL.
+
+        Failed requests are returned with `ok` set to False, and cached for
+        `failure_ttl_seconds` only.
+        """
+        return await self._memo.get_or_compute(
+            url,
+            lambda: self._fetch(url),
+            lambda info: self.ttl_seconds if info.ok else self.failure_ttl_seconds,
+        )
+
+    async def probe_many(self, urls: list[str]) -> dict[str, ImageInfo]:
+        """Probe several URLs concurrently."""
+        infos = await asyncio.gather(*(self.probe(url) for url in urls))
+        return dict(zip(urls, infos))
+
+    async def _fetch(self, url: str) -> ImageInfo:
+        session = get_http_session()
+        headers = {"Range": f"bytes=0-{self.probe_bytes - 1}"}
+        timeout = aiohttp.ClientTimeout(total=PROBE_TIMEOUT_SECONDS)
+        try:
+            async with session.get(url, headers=headers, timeout=timeout) as response:
+                if response.status not in (200, 206):
+                    return ImageInfo(url=url, ok=False)
+                # servers ignoring the range send the whole file; stop reading early
+                data = b""
+                while len(data) < self.probe_bytes:
+                    chunk = await response.content.read(self.probe_bytes - len(data))
+                    if not chunk:
+                        break
+                    data += chunk
+                size = _total_size(response)
+                header_type = response.headers.get("Content-Type", "").split(";")[0]
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.debug(f"Failed to probe image {url}: {e}")
+            return ImageInfo(url=url, ok=False)
+        mime_type, width, height = parse_image_header(data)
+        return ImageInfo(
+            url=url,
+            ok=True,
+            mime_type=mime_type or header_type or None,
+            size=size,
+            width=width,
+            height=height,
+        )
+
+
+_probe: Optional[ImageProbe] = None
+_probe_lock = threading.Lock()
+
+
+def get_image_probe(config: Any = None) -> ImageProbe:
+    """Return the process-wide probe, created with the settings of the first configuration."""
+    global _probe
+    with _probe_lock:
+        if _probe is None:
+            _probe = ImageProbe(
+                ttl_seconds=getattr(
+                    config, "image_probe_ttl_seconds", DEFAULT_PROBE_TTL_SECONDS
+                ),
+                probe_bytes=getattr(config, "image_probe_bytes", DEFAULT_PROBE_BYTES),
+                failure_ttl_seconds=getattr(
+                    config,
+                    "image_probe_failure_ttl_seconds",
+                    DEFAULT_FAILED_PROBE_TTL_SECONDS,
+                ),
+            )
+        return _probe
@@ -0,0 +1,214 @@
+"""Content-addressed store for post images.
+
+Images are saved once per distinct content under `image_dir`, at a path derived from
+their SHA-256 alone (`ab/cd/abcd...`), and indexed in MongoDB by hash with their
+type and every URL they were downloaded from.  The same bytes served under different
+types therefore share one file.  Scheduling a post with an image that is already stored,
+by URL or by content, costs neither a download nor disk space.
+
+Posts reference images through their `image_hash` (and `image_path`).  The reference
+counts on the index are reconciled from the LinkedIn post documents by `gc`, which
+also removes images no post references any more.
+
+Classes:
+    ImageStore: Store images by content and index them by URL.
+
+Functions:
+    gc: Reconcile reference counts and delete unreferenced images.
+    main: Run garbage collection from the command line.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from agents.http import download_to_file
+from agents.mongo import get_mongo_client
+from agents.repository import get_repository
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+_indexes_ensured = False
+
+
+def hash_file(filepath: str) -> str:
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def image_relpath(sha256: str) -> str:
+    """Return the path of an image relative to the store root."""
+    return os.path.join(sha256[:2], sha256[2:4], sha256)
+
+
+class ImageStore:
+    """Store images by content under a root directory and index them by URL."""
+
+    def __init__(self, root: str, config: Any):
+        """Create a store rooted at a directory, indexed in the configuration's database."""
+        self.root = os.path.expanduser(root)
+        self.config = config
+        self.repository = get_repository(config)
+
+    async def store_url(self, url: str, mime_type: Optional[str] = None) -> dict[str, Any]:
+        """Return the stored image of a URL, downloading it only if its content is new.
+
+        Args:
+            url: The image URL.
+            mime_type: The image type, recorded in the index.
+
+        Returns:
+            dict: `image_hash` and `image_path` of the stored image.
+        """
+        global _indexes_ensured
+        if not _indexes_ensured:
+            await self.repository.ensure_image_indexes()
+            _indexes_ensured = True
+        image = await self.repository.find_image_by_url(url)
+        if image and os.path.exists(image["path"]):
+            logger.debug(f"Reusing stored image {image['_id']} for {url}")
+            await self.repository.add_image_reference(image["_id"], url)
+            return {"image_hash": image["_id"], "image_path": image["path"]}
+
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        os.close(fd)
+        try:
+            size = await download_to_file(
+                url,
+                tmp_path,
+                max_bytes=self.config.image_download_max_mb * 1024 * 1024,
+                timeout_seconds=self.config.image_download_timeout_seconds,
+            )
+            sha256 = await asyncio.to_thread(hash_file, tmp_path)
+            path = os.path.join(self.root, image_relpath(sha256))
+            if os.path.exists(path):
+                logger.debug(f"Image from {url} is already stored as {sha256}")
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        await self.repository.add_image_reference(
+            sha256,
+            url,
+            {
+                "path": path,
+                "mime_type": mime_type,
+                "size": size,
+                "created_date": datetime.now(),
+            },
+        )
+        return {"image_hash": sha256, "image_path": path}
+
+
+def gc(config: Any, root: str, grace: timedelta, dry_run: bool = False) -> dict[str, int]:
+    """Reconcile reference counts and delete unreferenced images.
+
+    Reference counts are recomputed from the `image_hash` of the LinkedIn post
+    documents.  Images stored within the grace period are kept even when unreferenced,
+    since the post referencing them may still be being written.  Files under the root
+    that are not in the index at all are removed the same way.
+
+    Args:
+        config: Configuration naming the database and collections.
+        root: The store root directory.
+        grace: Minimum age of an unreferenced image before it is deleted.
+        dry_run: Report what would be deleted without deleting it.
+
+    Returns:
+        dict: Counts of `referenced`, `deleted` and `orphaned_files` images.
+    """
+    root = os.path.expanduser(root)
+    db = get_mongo_client(config)[config.mongo_db]
+    posts = db[config.mongo_collection_linkedin_posts]
+    images = db[config.mongo_collection_images]
+    cutoff = datetime.now() - grace
+
+    counts = {
+        row["_id"]: row["count"]
+        for row in posts.aggregate(
+            [
+                {"$match": {"image_hash": {"$exists": True}}},
+                {"$group": {"_id": "$image_hash", "count": {"$sum": 1}}},
+            ]
+        )
+    }
+    stats = {"referenced": 0, "deleted": 0, "orphaned_files": 0}
+    # files referenced by path only, like images saved before the store existed
+    indexed = set(posts.distinct("image_path"))
+    for image in images.find({}, {"path": 1, "refcount": 1, "created_date": 1}):
+        refcount = counts.get(image["_id"], 0)
+        if refcount:
+            stats["referenced"] += 1
+            indexed.add(image["path"])
+            if image.get("refcount") != refcount and not dry_run:
+                images.update_one({"_id": image["_id"]}, {"$set": {"refcount": refcount}})
+            continue
+        if image.get("created_date") and image["created_date"] > cutoff:
+            indexed.add(image["path"])
+            continue
+        logger.info(f"Deleting unreferenced image {image['path']}")
+        if dry_run:
+            indexed.add(image["path"])
+        else:
+            # a post scheduled since the counts were read bumps refcount; keep the image
+            result = images.delete_one(
+                {"_id": image["_id"], "refcount": image.get("refcount")}
+            )
+            if not result.deleted_count:
+                indexed.add(image["path"])
+                continue
+            if os.path.exists(image["path"]):
+                os.remove(image["path"])
+        stats["deleted"] += 1
+
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if path in indexed:
+                continue
+            if datetime.fromtimestamp(os.path.getmtime(path)) > cutoff:
+                continue
+            stats["orphaned_files"] += 1
+            logger.info(f"Deleting orphaned file {path}")
+            if not dry_run:
+                os.remove(path)
+    return stats
+
+
+def main() -> None:
+    """Run garbage collection from the command line."""
+    from agents.generate_post.configuration import GeneratePostConfiguration
+
+    config = GeneratePostConfiguration()
+    parser = argparse.ArgumentParser(description=gc.__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["gc"])
+    parser.add_argument("--root", default=config.image_dir)
+    parser.add_argument("--mongo-url", default=config.mongo_url)
+    parser.add_argument("--grace-hours", type=float, default=24.0)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config.mongo_url = args.mongo_url
+    stats = gc(config, args.root, timedelta(hours=args.grace_hours), args.dry_run)
+    logger.info(f"Image store gc: {stats}")
+
+
+if __name__ == "__main__":
+    main()
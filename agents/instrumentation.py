@@ -0,0 +1,327 @@
+"""Latency, token and cost instrumentation for chat model calls.
+
+`load_chat_model` attaches an `LLMMetricsHandler` to every model it creates, so each
+call is recorded against the graph node that made it (taken from the `langgraph_node`
+run metadata) and the model that served it.
+
+Metrics are served in the Prometheus text format by a local HTTP endpoint when
+`metrics_port` is configured.  When `metrics_dir` is set, a JSON summary per run
+(keyed by `thread_id`) is also kept there; summaries are accumulated in memory and
+the file is only rewritten, never read back, after each call.
+
+Classes:
+    LLMMetricsHandler: Callback handler recording model call metrics.
+
+Functions:
+    estimate_cost: Estimate the USD cost of a call from its token counts.
+    get_metrics_handler: Return the shared handler for a configuration, if enabled.
+    start_metrics_server: Serve the metrics registry over HTTP.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from agents.metrics import counter, histogram, render_metrics
+
+logger = logging.getLogger(__name__)
+
+# USD per million input / output tokens
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "claude-3-5-sonnet": (3.00, 15.00),
+    "claude-3-sonnet": (3.00, 15.00),
+    "claude-3-haiku": (0.25, 1.25),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "sonar-deep-research": (2.00, 8.00),
+}
+
+LLM_LATENCY_SECONDS = histogram(
+    "llm_latency_seconds",
+    "Wall time of chat model calls.",
+    labels=("node", "model"),
+)
+LLM_TTFT_SECONDS = histogram(
+    "llm_time_to_first_token_seconds",
+    "Time until the first streamed token of chat model calls.",
+    labels=("node", "model"),
+)
+LLM_TOKENS_TOTAL = counter(
+    "llm_tokens_total",
+    "Tokens consumed by chat model calls.",
+    labels=("node", "model", "direction"),
+)
+LLM_COST_USD_TOTAL = counter(
+    "llm_cost_usd_total",
+    "Estimated cost of chat model calls in USD.",
+    labels=("node", "model"),
+)
+LLM_CACHE_HITS_TOTAL = counter(
+    "llm_cache_hits_total",
+    "Chat model calls answered from the response cache.",
+    labels=("node", "model"),
+)
+LLM_ERRORS_TOTAL = counter(
+    "llm_errors_total",
+    "Chat model calls that raised an error.",
+    labels=("node", "model"),
+)
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Estimate the USD cost of a call from its token counts.
+
+    Args:
+        model (str): The model name, with or without a 'provider/' prefix.
+        input_tokens (int): Number of prompt tokens.
+        output_tokens (int): Number of completion tokens.
+
+    Returns:
+        float: The estimated cost, or 0.0 for models missing from `MODEL_PRICES`.
+    """
+    model = model.split("/", maxsplit=1)[-1]
+    # longest prefix first so 'gpt-4o-mini' is not priced as 'gpt-4o'
+    for prefix in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model.startswith(prefix):
+            input_price, output_price = MODEL_PRICES[prefix]
+            return (input_tokens * input_price + output_tokens * output_price) / 1e6
+    return 0.0
+
+
+def _token_usage(response: LLMResult) -> tuple[int, int]:
+    """Return (input, output) tokens reported for a response."""
+    input_tokens = output_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+    if not (input_tokens or output_tokens):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+    return input_tokens, output_tokens
+
+
+def _is_cached(response: LLMResult) -> bool:
+    """Return whether every generation of a response was replayed from the cache."""
+    messages = [
+        getattr(generation, "message", None)
+        for generations in response.generations
+        for generation in generations
+    ]
+    return bool(messages) and all(
+        message is not None and message.response_metadata.get("cached")
+        for message in messages
+    )
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """Callback handler recording latency, TTFT, tokens and cost of chat model calls.
+
+    Time to first token is only known when the model streams (for example when a
+    graph runs on the LangGraph server with message streaming); otherwise only the
+    total latency is recorded.  Responses replayed from the response cache are only
+    counted in `llm_cache_hits_total`, so they do not skew latency, tokens or cost.
+    """
+
+    def __init__(self, model: str, summary_dir: Optional[str] = None):
+        """Create a handler for the given 'provider/model'.
+
+        Args:
+            model (str): The fully specified name of the instrumented model.
+            summary_dir (Optional[str]): Directory for per-run JSON summaries. None disables them.
+        """
+        self.model = model
+        self.summary_dir = os.path.expanduser(summary_dir) if summary_dir else None
+        self._runs: dict[UUID, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list,
+        *,
+        run_id: UUID,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Remember when a call started and which node made it."""
+        metadata = metadata or {}
+        with self._lock:
+            self._runs[run_id] = {
+                "start": time.monotonic(),
+                "first_token": None,
+                "node": metadata.get("langgraph_node", "unknown"),
+                "thread_id": metadata.get("thread_id"),
+            }
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record the arrival of the first streamed token."""
+        run = self._runs.get(run_id)
+        if run and run["first_token"] is None:
+            run["first_token"] = time.monotonic()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record the metrics of a completed call."""
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        node, model = run["node"], self.model
+        if _is_cached(response):
+            LLM_CACHE_HITS_TOTAL.inc(node=node, model=model)
+            return
+        latency = time.monotonic() - run["start"]
+        ttft = run["first_token"] - run["start"] if run["first_token"] else None
+        input_tokens, output_tokens = _token_usage(response)
+        cost = estimate_cost(model, input_tokens, output_tokens)
+
+        LLM_LATENCY_SECONDS.observe(latency, node=node, model=model)
+        if ttft is not None:
+            LLM_TTFT_SECONDS.observe(ttft, node=node, model=model)
+        LLM_TOKENS_TOTAL.inc(input_tokens, node=node, model=model, direction="input")
+        LLM_TOKENS_TOTAL.inc(output_tokens, node=node, model=model, direction="output")
+        LLM_COST_USD_TOTAL.inc(cost, node=node, model=model)
+
+        if self.summary_dir and run["thread_id"]:
+            self._update_summary(
+                run["thread_id"],
+                node,
+                latency=latency,
+                ttft=ttft,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                cost=cost,
+            )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        """Count a failed call.  Cancelled calls (such as the loser of a hedge) are not errors."""
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is not None and not isinstance(error, asyncio.CancelledError):
+            LLM_ERRORS_TOTAL.inc(node=run["node"], model=self.model)
+
+    def _update_summary(self, thread_id: str, node: str, **call: Any) -> None:
+        """Add a call to the JSON summary of a run."""
+        path = os.path.join(self.summary_dir, f"{thread_id}.json")
+        with _summary_lock:
+            summary = _summaries.pop(path, None) or {"thread_id": thread_id, "nodes": {}}
+            # most recently updated runs last; the oldest are dropped from memory
+            _summaries[path] = summary
+            while len(_summaries) > MAX_BUFFERED_SUMMARIES:
+                _summaries.popitem(last=False)
+            entry = summary["nodes"].setdefault(f"{node}|{self.model}", {
+                "node": node,
+                "model": self.model,
+                "calls": 0,
+                "latency_seconds": 0.0,
+                "max_latency_seconds": 0.0,
+                "ttft_seconds": [],
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "cost_usd": 0.0,
+            })
+            entry["calls"] += 1
+            entry["latency_seconds"] += call["latency"]
+            entry["max_latency_seconds"] = max(entry["max_latency_seconds"], call["latency"])
+            if call["ttft"] is not None:
+                entry["ttft_seconds"].append(call["ttft"])
+            entry["input_tokens"] += call["input_tokens"]
+            entry["output_tokens"] += call["output_tokens"]
+            entry["cost_usd"] += call["cost"]
+            summary["total_cost_usd"] = sum(e["cost_usd"] for e in summary["nodes"].values())
+            summary["total_latency_seconds"] = sum(
+                e["latency_seconds"] for e in summary["nodes"].values()
+            )
+            summary["updated"] = time.time()
+            os.makedirs(self.summary_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.summary_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(summary, f, indent=2)
+            os.replace(tmp_path, path)
+
+
+MAX_BUFFERED_SUMMARIES = 1000
+_summaries: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+_summary_lock = threading.Lock()
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+_servers: dict[int, ThreadingHTTPServer] = {}
+_servers_lock = threading.Lock()
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> None:
+    """Serve the metrics registry at http://host:port/metrics from a daemon thread.
+
+    Calling this again for a port that is already being served does nothing.
+    """
+    with _servers_lock:
+        if port in _servers:
+            return
+        try:
+            server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+        except OSError as e:
+            logger.warning(f"Could not start metrics endpoint on port {port}: {e}")
+            return
+        _servers[port] = server
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+
+
+_handlers: dict[tuple, LLMMetricsHandler] = {}
+_handlers_lock = threading.Lock()
+
+
+def get_metrics_handler(
+    fully_specified_name: str, config: Any
+) -> Optional[LLMMetricsHandler]:
+    """Return the shared metrics handler for a model, starting the endpoint if configured.
+
+    Args:
+        fully_specified_name (str): String in the format 'provider/model'.
+        config: A configuration exposing `metrics_enabled`, `metrics_port` and `metrics_dir`.
+
+    Returns:
+        Optional[LLMMetricsHandler]: The handler, or None if instrumentation is disabled.
+    """
+    if not getattr(config, "metrics_enabled", False):
+        return None
+    if config.metrics_port:
+        start_metrics_server(config.metrics_port)
+    key = (fully_specified_name, config.metrics_dir)
+    with _handlers_lock:
+        if key not in _handlers:
+            _handlers[key] = LLMMetricsHandler(
+                fully_specified_name, summary_dir=config.metrics_dir or None
+            )
+        return _handlers[key]
@@ -57,3 +57,21 @@ class LinkedInUploadPostConfiguration(BaseConfiguration):
             "description": "Controls whether or not post should be drafted or actually submitted."
         },
     )
+    upload_workers: int = field(
+        default=1,
+        metadata={
+            "description": "Number of upload workers draining due posts in parallel."
+        },
+    )
+    lease_seconds: int = field(
+        default=15 * 60,
+        metadata={
+            "description": "How long a claimed post stays reserved for its worker. Leases are renewed while the upload runs; expired leases are reclaimed by other workers."
+        },
+    )
+    worker_id: str = field(
+        default="",
+        metadata={
+            "description": "Identifier recorded on claimed posts. Empty generates one per claim from the host and process."
+        },
+    )
@@ -24,13 +24,13 @@ async def load_document(
 ) -> LinkedInUploadPostState:
     """Load the post document from the database."""
 
-    logger.debug("Loading pending posts")
+    logger.debug("Claiming next pending post")
     config = LinkedInUploadPostConfiguration.from_runnable_config(config)
-    pending_posts = load_next_pending_post(config)
-
-    for post in pending_posts:
-        return {"post": post}
-    return {"post": None}
+    # pymongo blocks, so keep it off the event loop
+    post = await asyncio.to_thread(
+        claim_next_pending_post, config, new_worker_id(config)
+    )
+    return {"post": post}
 
 
 async def upload_post(
@@ -46,7 +46,6 @@ async def upload_post(
 
     browser = None
     uploaded = False
-    collection = load_linkedin_posts_collection(config)
     browser = Browser(config=config.browser_config)
     controller = Controller()
 
@@ -94,12 +93,16 @@ async def upload_post(
     #     logger.info(msg)
     #     return ActionResult(extracted_content=msg, include_in_memory=True)
 
+    # keep the claim alive while the browser agent works
+    async def keep_lease():
+        while True:
+            await asyncio.sleep(config.lease_seconds / 3)
+            if not await asyncio.to_thread(renew_lease, config, state.post):
+                logger.warning(f"Lost claim on post {state.post['_id']}")
+                return
+
+    lease_task = asyncio.create_task(keep_lease())
     try:
-        # update post document state to queued (so no parrallel jobs try to upload the same post)
-        if not config.draft_mode:
-            collection.update_one(
-                {"_id": state.post["_id"]}, {"$set": {"status": "queued"}}
-            )
         # launch browser agent to upload post
         model = load_chat_model(config.browser_model, config.browser_model_kwargs)
         agent = Agent(
@@ -112,20 +115,23 @@ async def upload_post(
         logger.debug("Starting post upload process.")
         await agent.run(max_steps=20)
         uploaded = True
-        # record fact that post was uploaded
-        if not config.draft_mode:
-            collection.update_one(
-                {"_id": state.post["_id"]},
-                {"$set": {"status": "uploaded", "posted_date": datetime.now()}},
+        # record fact that post was uploaded (drafts go back to pending)
+        if config.draft_mode:
+            state.post["status"] = "pending"
+            await asyncio.to_thread(release_post, config, state.post, "pending")
+        else:
+            state.post["status"] = "uploaded"
+            await asyncio.to_thread(
+                release_post, config, state.post, "uploaded", posted_date=datetime.now()
             )
     except Exception as e:
-        # rollback status to pending if exception raised before post was uploaded
+        # release the claim if exception raised before post was uploaded
         if not uploaded:
-            collection.update_one(
-                {"_id": state.post["_id"]}, {"$set": {"status": "pending"}}
-            )
+            state.post["status"] = "pending"
+            await asyncio.to_thread(release_post, config, state.post, "pending")
         print(e)
     finally:
+        lease_task.cancel()
         await browser.close() if browser else None
 
     return state
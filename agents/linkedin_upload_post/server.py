@@ -12,6 +12,7 @@ from agents.linkedin_upload_post.configuration import LinkedInUploadPostConfigur
 from agents.linkedin_upload_post.utils import *
 from agents.linkedin_upload_post.state import LinkedInUploadPostState
 from agents.linkedin_upload_post.graph import graph
+from agents.mongo import close_mongo_clients
 
 # Load logging configuration from file
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -48,9 +49,11 @@ scheduler.add_job(call_now_sync, "interval", minutes=INTERVAL_MINUTES)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    ensure_linkedin_posts_indexes(LinkedInUploadPostConfiguration())
     scheduler.start()
     yield
     scheduler.shutdown()
+    close_mongo_clients()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -64,7 +67,7 @@ app = FastAPI(lifespan=lifespan)
 async def next():
     config = LinkedInUploadPostConfiguration()
     posts = load_next_pending_post(config)
-    if posts is None:
+    if not posts:
         return {"message": "No posts found."}
     else:
         return json.loads(json_util.dumps(posts[0]))
@@ -77,11 +80,29 @@ async def next():
 )
 async def now():
     config = LinkedInUploadPostConfiguration()
-    state = LinkedInUploadPostState()
-    result = await graph.ainvoke(
-        input=state
-    )  # TODO figure out what to pass, config=config)
-    return json.loads(json_util.dumps(result))
+    results = await asyncio.gather(
+        *(upload_worker() for _ in range(config.upload_workers))
+    )
+    return json.loads(json_util.dumps([r for worker in results for r in worker]))
+
+
+async def upload_worker() -> list[dict]:
+    """Upload due posts one at a time until none are left to claim.
+
+    A worker stops after a post goes back to pending (a draft or a failed upload),
+    so it does not immediately claim the same post again.
+    """
+    results = []
+    while True:
+        state = LinkedInUploadPostState()
+        result = await graph.ainvoke(
+            input=state
+        )  # TODO figure out what to pass, config=config)
+        if not result.get("post"):
+            return results
+        results.append(result)
+        if result["post"].get("status") != "uploaded":
+            return results
 
 
 @app.get("/", summary="Liveliness probe")
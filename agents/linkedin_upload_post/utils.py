@@ -1,4 +1,10 @@
-from datetime import datetime
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, ReturnDocument
+
 from agents.utils import load_linkedin_posts_collection
 from agents.linkedin_upload_post.configuration import LinkedInUploadPostConfiguration
 from agents.linkedin_upload_post.state import LinkedInUploadPostState
@@ -39,20 +45,133 @@ def build_browser_instructions_prompt(
     return prompt.format(post=state.post["post"])
 
 
-def load_next_pending_post(config: LinkedInUploadPostConfiguration):
+# fields needed to upload a post; anything else stored with the post is left out
+UPLOAD_POST_PROJECTION = {
+    "topic": 1,
+    "post": 1,
+    "scheduled_date": 1,
+    "status": 1,
+    "image_path": 1,
+}
+
+_indexed_collections = set()
+
+
+def ensure_linkedin_posts_indexes(config: LinkedInUploadPostConfiguration) -> None:
+    """Create the indexes used to find due posts, once per process and collection."""
+    key = (config.mongo_url, config.mongo_db, config.mongo_collection_linkedin_posts)
+    if key in _indexed_collections:
+        return
+    collection = load_linkedin_posts_collection(config)
+    collection.create_index(
+        [("status", ASCENDING), ("scheduled_date", ASCENDING)],
+        name="status_scheduled_date",
+    )
+    _indexed_collections.add(key)
+
+
+def load_next_pending_post(
+    config: LinkedInUploadPostConfiguration, limit: int = 1
+) -> list[dict]:
+    """Load the pending posts that are due, earliest first.
+
+    Args:
+        config (LinkedInUploadPostConfiguration): Configuration info used to connect to MongoDB.
+        limit (int, optional): Maximum number of posts to return. Defaults to 1.
 
+    Returns:
+        list[dict]: The due posts, with only the fields needed to upload them.
+    """
+    ensure_linkedin_posts_indexes(config)
     collection = load_linkedin_posts_collection(config)
 
-    # get all posts in pending state scheduled for now (or earlier)
-    filter = {
-        "$and": [
-            {"status": "pending"},
-            {
-                "scheduled_date": {
-                    "$lte": datetime.now(),
-                }
+    # get posts in pending state scheduled for now (or earlier)
+    filter = {"status": "pending", "scheduled_date": {"$lte": datetime.now()}}
+    pending_posts = (
+        collection.find(filter, UPLOAD_POST_PROJECTION)
+        .sort("scheduled_date", ASCENDING)
+        .limit(limit)
+    )
+    return list(pending_posts)
+
+
+def new_worker_id(config: LinkedInUploadPostConfiguration) -> str:
+    """Return the configured worker id, or a unique one for this host and process."""
+    return config.worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def claim_next_pending_post(
+    config: LinkedInUploadPostConfiguration, worker_id: str
+) -> dict | None:
+    """Atomically claim the earliest due post for a worker.
+
+    A post can be claimed when it is pending, or when it is queued but the lease of
+    the worker that claimed it has expired (for example because the worker died).
+    Posts queued before leases were introduced have no lease and are reclaimed too.
+    The claim sets the post to queued with the worker id and a lease expiry, so no
+    other worker can pick it up until the lease runs out.
+
+    Args:
+        config (LinkedInUploadPostConfiguration): Configuration info used to connect to MongoDB.
+        worker_id (str): Identifier of the claiming worker.
+
+    Returns:
+        dict | None: The claimed post, or None if no post is due.
+    """
+    ensure_linkedin_posts_indexes(config)
+    collection = load_linkedin_posts_collection(config)
+    now = datetime.now()
+    return collection.find_one_and_update(
+        {
+            "scheduled_date": {"$lte": now},
+            "$or": [
+                {"status": "pending"},
+                {"status": "queued", "lease_expires": {"$lt": now}},
+                {"status": "queued", "lease_expires": {"$exists": False}},
+            ],
+        },
+        {
+            "$set": {
+                "status": "queued",
+                "worker_id": worker_id,
+                "lease_expires": now + timedelta(seconds=config.lease_seconds),
             },
-        ]
-    }
-    pending_posts = collection.find(filter)
-    return pending_posts
+            "$inc": {"claim_count": 1},
+        },
+        projection={**UPLOAD_POST_PROJECTION, "worker_id": 1},
+        sort=[("scheduled_date", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def renew_lease(config: LinkedInUploadPostConfiguration, post: dict) -> bool:
+    """Extend the lease on a claimed post.  Returns False if the claim was lost."""
+    collection = load_linkedin_posts_collection(config)
+    result = collection.update_one(
+        {"_id": post["_id"], "worker_id": post["worker_id"], "status": "queued"},
+        {
+            "$set": {
+                "lease_expires": datetime.now() + timedelta(seconds=config.lease_seconds)
+            }
+        },
+    )
+    return result.modified_count == 1
+
+
+def release_post(
+    config: LinkedInUploadPostConfiguration, post: dict, status: str, **fields
+) -> bool:
+    """Set the final status of a claimed post and drop its lease.
+
+    The update only applies while the post is still claimed by the same worker.
+    Returns False if the claim was lost.
+    """
+    collection = load_linkedin_posts_collection(config)
+    result = collection.update_one(
+        {"_id": post["_id"], "worker_id": post["worker_id"]},
+        {
+            "$set": {"status": status, **fields},
+            "$unset": {"worker_id": "", "lease_expires": ""},
+        },
+    )
+    return result.modified_count == 1
@@ -0,0 +1,186 @@
+"""In-process metrics shared by the agents.
+
+Metrics are kept in a process-wide registry and rendered in the Prometheus text
+exposition format.
+
+Functions:
+    counter: Get or create a counter.
+    gauge: Get or create a gauge.
+    histogram: Get or create a histogram.
+    render_metrics: Render every registered metric in Prometheus text format.
+"""
+
+import bisect
+import threading
+from typing import Iterable, Optional
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _label_key(label_names: tuple[str, ...], labels: dict[str, str]) -> tuple:
+    return tuple(str(labels.get(name, "")) for name in label_names)
+
+
+def _format_labels(label_names: Iterable[str], values: Iterable, **extra) -> str:
+    pairs = [(name, value) for name, value in zip(label_names, values)]
+    pairs.extend(extra.items())
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return f"{{{body}}}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    """Monotonically increasing value, partitioned by labels."""
+
+    type = "counter"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        """Create a counter."""
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increment the counter for the given labels."""
+        key = _label_key(self.labels, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Return the current value for the given labels."""
+        return self._values.get(_label_key(self.labels, labels), 0)
+
+    def render(self) -> list[str]:
+        """Render the samples of this counter."""
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {value}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, partitioned by labels."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the gauge for the given labels."""
+        key = _label_key(self.labels, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        """Decrement the gauge for the given labels."""
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Distribution of observed values, partitioned by labels."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        """Create a histogram."""
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._values: dict[tuple, tuple[list[int], float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observation for the given labels."""
+        key = _label_key(self.labels, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels: str) -> int:
+        """Return the number of observations for the given labels."""
+        counts, _ = self._values.get(_label_key(self.labels, labels), ([], 0.0))
+        return sum(counts)
+
+    def render(self) -> list[str]:
+        """Render the samples of this histogram."""
+        with self._lock:
+            items = [(key, (list(counts), total)) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labels, key, le=bound)} {cumulative}"
+                )
+            cumulative += counts[-1]
+            lines.append(
+                f"{self.name}_bucket{_format_labels(self.labels, key, le='+Inf')} {cumulative}"
+            )
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+_registry: dict[str, "Counter | Gauge | Histogram"] = {}
+_registry_lock = threading.Lock()
+
+
+def _register(metric_cls, name: str, *args, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = metric_cls(name, *args, **kwargs)
+            _registry[name] = metric
+        elif type(metric) is not metric_cls:
+            raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+        return metric
+
+
+def counter(name: str, description: str, labels: tuple[str, ...] = ()) -> Counter:
+    """Get or create the counter with the given name."""
+    return _register(Counter, name, description, labels)
+
+
+def gauge(name: str, description: str, labels: tuple[str, ...] = ()) -> Gauge:
+    """Get or create the gauge with the given name."""
+    return _register(Gauge, name, description, labels)
+
+
+def histogram(
+    name: str,
+    description: str,
+    labels: tuple[str, ...] = (),
+    buckets: Optional[tuple[float, ...]] = None,
+) -> Histogram:
+    """Get or create the histogram with the given name."""
+    return _register(Histogram, name, description, labels, buckets or DEFAULT_BUCKETS)
+
+
+def render_metrics() -> str:
+    """Render every registered metric in the Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,62 @@
+"""Process-wide MongoDB clients.
+
+A `MongoClient` owns a connection pool and background monitor threads, so one client
+per `mongo_url` is shared by every node and graph in the process.
+
+Functions:
+    get_mongo_client: Return the shared client for a configuration's `mongo_url`.
+    close_mongo_clients: Close every shared client.
+"""
+
+import atexit
+import logging
+import threading
+from typing import Any
+
+from pymongo import MongoClient
+
+logger = logging.getLogger(__name__)
+
+_clients: dict[str, MongoClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_mongo_client(config: Any) -> MongoClient:
+    """Return the shared client for a configuration's `mongo_url`.
+
+    The client is created on first use with the pool settings of that configuration
+    (`mongo_max_pool_size`, `mongo_min_pool_size` and `mongo_max_idle_time_ms`);
+    later configurations with the same URL reuse it as is.
+
+    Args:
+        config: A configuration exposing `mongo_url` and the pool settings.
+
+    Returns:
+        MongoClient: The shared client.
+    """
+    with _clients_lock:
+        client = _clients.get(config.mongo_url)
+        if client is None:
+            client = MongoClient(
+                config.mongo_url,
+                maxPoolSize=config.mongo_max_pool_size,
+                minPoolSize=config.mongo_min_pool_size,
+                maxIdleTimeMS=config.mongo_max_idle_time_ms,
+            )
+            _clients[config.mongo_url] = client
+            logger.debug(
+                f"Created MongoDB client with pool size {config.mongo_max_pool_size}"
+            )
+        return client
+
+
+def close_mongo_clients() -> None:
+    """Close every shared client.  Clients are recreated on next use."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+atexit.register(close_mongo_clients)
@@ -0,0 +1,331 @@
+"""Tiered fetching of web pages as markdown.
+
+Most article pages are served as plain HTML, so a direct GET over the shared HTTP
+session and local extraction of the main content is enough, and far cheaper than a
+remote render.  FireCrawl is only used when the direct tier does not yield a usable
+page: the request fails or is blocked, the response is not HTML, or too little text
+remains after extraction, as happens for pages rendered with JavaScript.  The
+screenshot FireCrawl can return is only requested when `firecrawl_screenshot` is set.
+
+The tier that served each page, and the latency of every attempt, are recorded per
+domain in the `page_fetches_total` and `page_fetch_latency_seconds` metrics.  Domains
+whose pages repeatedly fail the direct tier go straight to FireCrawl for a while.
+
+Functions:
+    html_to_markdown: Extract the main content of an HTML page as markdown.
+    fetch_direct: Fetch a page with a direct GET and extract it locally.
+    fetch_firecrawl: Fetch a page with FireCrawl.
+    fetch_page: Fetch a page, trying the direct tier before FireCrawl.
+"""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+from typing import Any, Optional
+from urllib.parse import urljoin, urlsplit
+
+import aiohttp
+from bs4 import BeautifulSoup, NavigableString, Tag
+from langchain_community.document_loaders import FireCrawlLoader
+from langchain_core.documents import Document
+
+from agents.http import get_http_session
+from agents.metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+MAX_HTML_BYTES = 5 * 1024 * 1024
+HTML_CHUNK_BYTES = 64 * 1024
+DIRECT_FAILURES_BEFORE_SKIP = 3
+DIRECT_SKIP_SECONDS = 60 * 60.0
+USER_AGENT = "Mozilla/5.0 (compatible; eminence-builder/0.1; +https://github.com/jleonelion/eminence-builder)"
+
+PAGE_FETCHES_TOTAL = counter(
+    "page_fetches_total",
+    "Page fetch attempts, by domain, tier (direct or firecrawl) and result.",
+    labels=("domain", "tier", "result"),
+)
+PAGE_FETCH_LATENCY_SECONDS = histogram(
+    "page_fetch_latency_seconds",
+    "Wall time of page fetch attempts, by domain and tier.",
+    labels=("domain", "tier"),
+    buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 30, 60),
+)
+
+# elements that never hold article content
+_NOISE_TAGS = (
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "form",
+    "button", "nav", "header", "footer", "aside",
+)
+_BLOCK_MARKERS = re.compile(
+    r"enable javascript|javascript is (?:disabled|required)|just a moment\.\.\.|"
+    r"checking your browser|access denied|are you a robot|captcha",
+    re.IGNORECASE,
+)
+_HEADINGS = {f"h{level}": "#" * level for level in range(1, 7)}
+
+# domain -> (consecutive direct tier failures, time of the last failure)
+_direct_failures: dict[str, tuple[int, float]] = {}
+_direct_failures_lock = threading.Lock()
+
+
+def _domain(url: str) -> str:
+    return (urlsplit(url).hostname or "unknown").removeprefix("www.")
+
+
+def _inline(node: Any, base_url: str) -> str:
+    """Render inline content, keeping links and images."""
+    if isinstance(node, NavigableString):
+        return str(node)
+    if not isinstance(node, Tag):
+        return ""
+    if node.name == "img":
+        src = node.get("src") or node.get("data-src")
+        if not src or src.startswith("data:"):
+            return ""
+        return f"![{node.get('alt', '').strip()}]({urljoin(base_url, src)})"
+    if node.name == "br":
+        return "\n"
+    text = "".join(_inline(child, base_url) for child in node.children)
+    if node.name == "a" and node.get("href") and text.strip():
+        href = node["href"]
+        if not href.startswith(("#", "javascript:")):
+            return f"[{text.strip()}]({urljoin(base_url, href)})"
+    if node.name in ("strong", "b") and text.strip():
+        return f"**{text.strip()}**"
+    if node.name in ("em", "i") and text.strip():
+        return f"*{text.strip()}*"
+    if node.name == "code" and text.strip():
+        return f"`{text.strip()}`"
+    return text
+
+
+def _blocks(node: Tag, base_url: str, out: list[str]) -> None:
+    """Append the markdown blocks of an element to `out`."""
+    inline: list[str] = []
+
+    def flush() -> None:
+        text = " ".join("".join(inline).split())
+        if text:
+            out.append(text)
+        inline.clear()
+
+    for child in node.children:
+        if not isinstance(child, Tag):
+            inline.append(_inline(child, base_url))
+            continue
+        name = child.name
+        if name in _HEADINGS:
+            flush()
+            text = " ".join(child.get_text(" ").split())
+            if text:
+                out.append(f"{_HEADINGS[name]} {text}")
+        elif name == "p":
+            flush()
+            text = " ".join(_inline(child, base_url).split())
+            if text:
+                out.append(text)
+        elif name in ("ul", "ol"):
+            flush()
+            items = child.find_all("li", recursive=False)
+            for index, item in enumerate(items, start=1):
+                marker = f"{index}." if name == "ol" else "-"
+                text = " ".join(_inline(item, base_url).split())
+                if text:
+                    out.append(f"{marker} {text}")
+        elif name == "pre":
+            flush()
+            out.append(f"```\n{child.get_text().strip()}\n```")
+        elif name == "blockquote":
+            flush()
+            quoted: list[str] = []
+            _blocks(child, base_url, quoted)
+            out.extend("> " + line for block in quoted for line in block.splitlines())
+        elif name == "img":
+            flush()
+            image = _inline(child, base_url)
+            if image:
+                out.append(image)
+        elif name in ("a", "span", "strong", "b", "em", "i", "code", "br", "small", "sup", "sub"):
+            inline.append(_inline(child, base_url))
+        else:
+            flush()
+            _blocks(child, base_url, out)
+    flush()
+
+
+def _main_content(soup: BeautifulSoup) -> Tag:
+    """Pick the element most likely to hold the article, readability style."""
+    for selector in ("article", "main", "[role=main]"):
+        candidates = soup.select(selector)
+        if candidates:
+            return max(candidates, key=lambda tag: len(tag.get_text(" ", strip=True)))
+    # otherwise the parent of the most paragraph text
+    scores: dict[int, tuple[int, Tag]] = {}
+    for paragraph in soup.find_all("p"):
+        parent = paragraph.parent
+        if isinstance(parent, Tag):
+            length = len(paragraph.get_text(" ", strip=True))
+            score, _ = scores.get(id(parent), (0, parent))
+            scores[id(parent)] = (score + length, parent)
+    if scores:
+        return max(scores.values(), key=lambda entry: entry[0])[1]
+    return soup.body or soup
+
+
+def html_to_markdown(html: str, base_url: str) -> tuple[str, dict[str, Any]]:
+    """Extract the main content of an HTML page as markdown.
+
+    Args:
+        html (str): The page HTML.
+        base_url (str): URL of the page, used to resolve relative links and images.
+
+    Returns:
+        tuple: (markdown, metadata) where metadata holds the `title`, `description`,
+            `ogImage` and `images` (absolute image URLs found in the content) of the page.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+
+    def meta(*names: str) -> Optional[str]:
+        for name in names:
+            tag = soup.find("meta", attrs={"property": name}) or soup.find(
+                "meta", attrs={"name": name}
+            )
+            if tag and tag.get("content"):
+                return tag["content"].strip()
+        return None
+
+    title = meta("og:title") or (soup.title.get_text(strip=True) if soup.title else None)
+    og_image = meta("og:image", "twitter:image")
+    metadata = {
+        "source": base_url,
+        "title": title,
+        "description": meta("og:description", "description"),
+        "ogImage": urljoin(base_url, og_image) if og_image else None,
+    }
+    for tag in soup.find_all(list(_NOISE_TAGS)):
+        tag.decompose()
+    blocks: list[str] = []
+    _blocks(_main_content(soup), base_url, blocks)
+    markdown = "\n\n".join(blocks)
+    if title and not markdown.startswith("# "):
+        markdown = f"# {title}\n\n{markdown}"
+    metadata["images"] = list(
+        dict.fromkeys(re.findall(r"!\[[^\]]*\]\(([^)\s]+)\)", markdown))
+    )
+    return markdown, metadata
+
+
+def _record(domain: str, tier: str, result: str, start: float) -> None:
+    PAGE_FETCHES_TOTAL.inc(domain=domain, tier=tier, result=result)
+    PAGE_FETCH_LATENCY_SECONDS.observe(time.monotonic() - start, domain=domain, tier=tier)
+
+
+def _skip_direct(domain: str) -> bool:
+    with _direct_failures_lock:
+        failures, last = _direct_failures.get(domain, (0, 0.0))
+        return (
+            failures >= DIRECT_FAILURES_BEFORE_SKIP
+            and time.monotonic() - last < DIRECT_SKIP_SECONDS
+        )
+
+
+def _note_direct(domain: str, ok: bool) -> None:
+    with _direct_failures_lock:
+        if ok:
+            _direct_failures.pop(domain, None)
+        else:
+            failures, _ = _direct_failures.get(domain, (0, 0.0))
+            _direct_failures[domain] = (failures + 1, time.monotonic())
+
+
+async def fetch_direct(url: str, config: Any) -> Optional[Document]:
+    """Fetch a page with a direct GET and extract it locally.
+
+    Returns:
+        Optional[Document]: The page as markdown, or None if it was unavailable,
+            larger than `MAX_HTML_BYTES`, blocked or yielded fewer than
+            `direct_fetch_min_chars` characters.
+    """
+    domain = _domain(url)
+    start = time.monotonic()
+    timeout = aiohttp.ClientTimeout(total=config.direct_fetch_timeout_seconds)
+    headers = {"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"}
+    try:
+        async with get_http_session().get(
+            url, headers=headers, timeout=timeout
+        ) as response:
+            content_type = response.headers.get("Content-Type", "")
+            if response.status != 200 or "html" not in content_type:
+                _record(domain, "direct", f"http_{response.status}", start)
+                return None
+            if (response.content_length or 0) > MAX_HTML_BYTES:
+                _record(domain, "direct", "too_large", start)
+                return None
+            # read the whole body, which may arrive without a length, up to the cap
+            chunks = []
+            size = 0
+            async for chunk in response.content.iter_chunked(HTML_CHUNK_BYTES):
+                size += len(chunk)
+                if size > MAX_HTML_BYTES:
+                    _record(domain, "direct", "too_large", start)
+                    return None
+                chunks.append(chunk)
+            html = b"".join(chunks).decode(response.charset or "utf-8", errors="replace")
+            final_url = str(response.url)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        logger.debug(f"Direct fetch of {url} failed: {e}")
+        _record(domain, "direct", "error", start)
+        return None
+    # parsing large pages is CPU bound; keep it off the event loop
+    markdown, metadata = await asyncio.to_thread(html_to_markdown, html, final_url)
+    text = re.sub(r"!?\[([^\]]*)\]\([^)]*\)", r"\1", markdown)
+    if len(text) < config.direct_fetch_min_chars:
+        result = "blocked" if _BLOCK_MARKERS.search(html) else "too_short"
+        _record(domain, "direct", result, start)
+        return None
+    _record(domain, "direct", "ok", start)
+    metadata["fetch_tier"] = "direct"
+    return Document(page_content=markdown, metadata=metadata)
+
+
+async def fetch_firecrawl(url: str, config: Any) -> list[Document]:
+    """Fetch a page with FireCrawl, with a screenshot only if `firecrawl_screenshot` is set."""
+    domain = _domain(url)
+    start = time.monotonic()
+    formats = ["markdown", "screenshot"] if config.firecrawl_screenshot else ["markdown"]
+    loader = FireCrawlLoader(url=url, mode="scrape", params={"formats": formats})
+    try:
+        docs = await loader.aload()
+    except Exception:
+        _record(domain, "firecrawl", "error", start)
+        raise
+    _record(domain, "firecrawl", "ok" if docs else "empty", start)
+    for doc in docs:
+        doc.metadata["fetch_tier"] = "firecrawl"
+    return docs
+
+
+async def fetch_page(url: str, config: Any) -> list[Document]:
+    """Fetch a page, trying the direct tier before FireCrawl.
+
+    Args:
+        url (str): The page URL.
+        config: A configuration exposing `direct_fetch_enabled`,
+            `direct_fetch_timeout_seconds`, `direct_fetch_min_chars` and
+            `firecrawl_screenshot`.
+
+    Returns:
+        list[Document]: The page as markdown documents, each with the `fetch_tier`
+            that served it in its metadata.
+    """
+    domain = _domain(url)
+    if config.direct_fetch_enabled and not _skip_direct(domain):
+        doc = await fetch_direct(url, config)
+        _note_direct(domain, doc is not None)
+        if doc is not None:
+            return [doc]
+        logger.debug(f"Falling back to FireCrawl for {url}")
+    return await fetch_firecrawl(url, config)
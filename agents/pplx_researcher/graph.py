@@ -37,7 +37,7 @@ class PplxResearchAgent:
             llm: The language model loaded based on the provided configuration.
         """
         # Initialize Language Model
-        self.llm = load_chat_model(config.model, config.model_kwargs)
+        self.llm = load_chat_model(config.model, config.model_kwargs, config=config)
 
     def research_topic(self, topic: str) -> Document:
         """Conduct research on a specified topic.
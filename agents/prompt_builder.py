@@ -0,0 +1,156 @@
+"""Prompt templates that keep cacheable content at the front of the prompt.
+
+Providers cache the longest prompt prefix they have seen recently (OpenAI does this
+automatically, Anthropic for blocks marked with `cache_control`).  A template is
+therefore split into a static part, whose fields only change with the post style or
+the reflection rules, and a dynamic part holding per-run content such as the report.
+The static part is rendered first and memoized, so identical prefixes are byte for
+byte equal across runs.
+
+Classes:
+    CachedPrompt: Rendered prompt that remembers where its cacheable prefix ends.
+    PromptTemplate: Template split into a static prefix and a dynamic suffix.
+
+Functions:
+    to_system_message: Build a system message, marking the cacheable prefix for Anthropic models.
+"""
+
+import functools
+import logging
+from string import Formatter
+
+from langchain_core.messages import SystemMessage
+
+from agents.metrics import histogram
+
+logger = logging.getLogger(__name__)
+
+PROMPT_CACHED_PREFIX_SHARE = histogram(
+    "prompt_cached_prefix_share",
+    "Share of each rendered prompt that is a cacheable static prefix.",
+    labels=("prompt",),
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
+)
+
+
+class CachedPrompt(str):
+    """Rendered prompt that remembers where its cacheable prefix ends.
+
+    It is a plain string for every other purpose, so it can be passed anywhere a
+    formatted prompt was used before.
+    """
+
+    prefix_length: int
+
+    def __new__(cls, prefix: str, suffix: str = ""):
+        """Create a prompt from its cacheable prefix and per-run suffix."""
+        prompt = super().__new__(cls, prefix + suffix)
+        prompt.prefix_length = len(prefix)
+        return prompt
+
+    @property
+    def prefix(self) -> str:
+        """The cacheable part of the prompt."""
+        return str(self)[: self.prefix_length]
+
+    @property
+    def suffix(self) -> str:
+        """The per-run part of the prompt."""
+        return str(self)[self.prefix_length :]
+
+    @property
+    def cached_share(self) -> float:
+        """Fraction of the prompt covered by the cacheable prefix."""
+        return self.prefix_length / len(self) if len(self) else 0.0
+
+
+def _compile(template: str) -> list[tuple[str, str | None]]:
+    """Parse a format string once into (literal, field name) pairs."""
+    return [(literal, field) for literal, field, _, _ in Formatter().parse(template)]
+
+
+def _render(compiled: list[tuple[str, str | None]], values: dict) -> str:
+    return "".join(
+        literal + (str(values[field]) if field is not None else "")
+        for literal, field in compiled
+    )
+
+
+class PromptTemplate:
+    """Template split into a static prefix and a dynamic suffix.
+
+    Both parts are parsed when the template is created (at import for the prompts
+    in `agents.prompts`), and rendered prefixes are memoized per set of static values.
+
+    Example:
+        >>> template = PromptTemplate("report", "Rules: {rules}\\n", "Report: {report}")
+        >>> prompt = template.format(rules="- be brief", report="...")
+        >>> prompt.prefix
+        'Rules: - be brief\\n'
+    """
+
+    def __init__(self, name: str, static: str, dynamic: str = ""):
+        """Create a template.
+
+        Args:
+            name (str): Name used when reporting the cached-prefix share.
+            static (str): Format string for the cacheable prefix.  Its fields must
+                only depend on slowly changing inputs such as the post style.
+            dynamic (str): Format string for the per-run suffix.
+        """
+        self.name = name
+        self._static = _compile(static)
+        self._dynamic = _compile(dynamic)
+        self.static_fields = {field for _, field in self._static if field is not None}
+        self.dynamic_fields = {field for _, field in self._dynamic if field is not None}
+        self._render_prefix = functools.lru_cache(maxsize=32)(self._render_static)
+
+    def _render_static(self, items: tuple[tuple[str, str], ...]) -> str:
+        return _render(self._static, dict(items))
+
+    def format(self, **kwargs) -> CachedPrompt:
+        """Render the template, with the static part first.
+
+        The cached-prefix share is only reported for templates with a dynamic part.
+        """
+        static_items = tuple(
+            sorted((field, str(kwargs[field])) for field in self.static_fields)
+        )
+        prompt = CachedPrompt(
+            self._render_prefix(static_items), _render(self._dynamic, kwargs)
+        )
+        if self._dynamic:
+            # a fully static prompt is always 100% cacheable, which says nothing
+            PROMPT_CACHED_PREFIX_SHARE.observe(prompt.cached_share, prompt=self.name)
+            logger.debug(
+                f"Prompt {self.name}: {prompt.cached_share:.0%} of {len(prompt)} characters cacheable"
+            )
+        return prompt
+
+
+def to_system_message(prompt: str, fully_specified_name: str) -> SystemMessage:
+    """Build a system message for a prompt.
+
+    For Anthropic models the cacheable prefix of a `CachedPrompt` is sent as its own
+    content block marked with `cache_control`.  Other providers cache prefixes
+    without markers, so they receive the prompt as plain text.
+
+    Args:
+        prompt (str): The rendered prompt.
+        fully_specified_name (str): The 'provider/model' the message is sent to.
+
+    Returns:
+        SystemMessage: The message to send.
+    """
+    if (
+        not isinstance(prompt, CachedPrompt)
+        or not prompt.prefix_length
+        or not fully_specified_name.startswith("anthropic/")
+    ):
+        return SystemMessage(str(prompt))
+    content = [
+        {"type": "text", "text": prompt.prefix, "cache_control": {"type": "ephemeral"}}
+    ]
+    if prompt.suffix:
+        content.append({"type": "text", "text": prompt.suffix})
+    return SystemMessage(content=content)
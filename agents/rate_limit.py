@@ -0,0 +1,261 @@
+"""Shared rate limiting for model providers and search clients.
+
+A single limiter exists per provider (or provider/model) key for the whole process, so
+parallel branches created by `Send` fan-outs in different graphs draw from the same
+budget instead of each hitting the provider at full speed.
+
+Classes:
+    TokenBucket: Refilling budget of requests or tokens per minute.
+    ProviderLimiter: Requests-per-minute, tokens-per-minute and in-flight limits for one key.
+
+Functions:
+    get_limiter: Return the shared limiter for a model or client name.
+    rate_limited: Async context manager that holds a limiter slot around a call.
+    rate_limited_sync: Synchronous counterpart of `rate_limited`.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from agents.metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_LIMITS = {
+    "openai": {
+        "requests_per_minute": 500,
+        "tokens_per_minute": 200_000,
+        "max_in_flight": 16,
+    },
+    "anthropic": {
+        "requests_per_minute": 50,
+        "tokens_per_minute": 40_000,
+        "max_in_flight": 8,
+    },
+    "perplexity": {"requests_per_minute": 50, "max_in_flight": 4},
+    "tavily": {"requests_per_minute": 100, "max_in_flight": 8},
+}
+
+QUEUE_WAIT_SECONDS = histogram(
+    "rate_limit_queue_wait_seconds",
+    "Time spent waiting for a rate limiter slot before calling a provider.",
+    labels=("limiter",),
+)
+THROTTLED_TOTAL = counter(
+    "rate_limit_throttled_total",
+    "Number of calls that had to wait for a rate limiter slot.",
+    labels=("limiter",),
+)
+
+
+class TokenBucket:
+    """Budget that refills continuously up to one minute's worth of capacity.
+
+    The bucket may go negative when actual usage turns out higher than the amount
+    taken up front; later callers then wait until the debt is repaid.
+    """
+
+    def __init__(self, per_minute: float):
+        """Create a full bucket refilling at `per_minute` units per minute."""
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(
+            self.capacity, self.available + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Return the seconds until `amount` can be taken (0 if available now)."""
+        self._refill()
+        # oversize requests only need a full bucket, otherwise they would never run
+        needed = min(amount, self.capacity)
+        if self.available >= needed:
+            return 0.0
+        return (needed - self.available) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Remove `amount` from the bucket."""
+        self._refill()
+        self.available -= amount
+
+
+@dataclass
+class Lease:
+    """A slot held on a limiter for the duration of one call."""
+
+    estimated_tokens: int = 0
+    actual_tokens: Optional[int] = None
+
+    def record_usage(self, tokens: Optional[int]) -> None:
+        """Record the number of tokens the call actually used."""
+        self.actual_tokens = tokens
+
+
+class ProviderLimiter:
+    """Requests-per-minute, tokens-per-minute and in-flight limits for one provider key.
+
+    Waiting is done by polling so the same limiter can be shared by synchronous
+    callers, async callers and callers running on different event loops.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+        poll_interval: float = 0.05,
+    ):
+        """Create a limiter.  Any limit left as None is not enforced."""
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take a slot if possible.  Returns 0 on success, otherwise a suggested wait."""
+        with self._lock:
+            if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                return self.poll_interval
+            wait = 0.0
+            if self.requests:
+                wait = max(wait, self.requests.wait_time(1))
+            if self.tokens and tokens:
+                wait = max(wait, self.tokens.wait_time(tokens))
+            if wait > 0:
+                return wait
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens and tokens:
+                self.tokens.take(tokens)
+            self.in_flight += 1
+            return 0.0
+
+    def release(self, lease: Lease) -> None:
+        """Free the in-flight slot and settle the token estimate against actual usage."""
+        with self._lock:
+            self.in_flight -= 1
+            if self.tokens and lease.actual_tokens is not None:
+                self.tokens.take(lease.actual_tokens - lease.estimated_tokens)
+
+    def _observe_wait(self, waited: float) -> None:
+        QUEUE_WAIT_SECONDS.observe(waited, limiter=self.name)
+        if waited > 0:
+            THROTTLED_TOTAL.inc(limiter=self.name)
+            logger.debug(f"Waited {waited:.2f}s for {self.name} rate limiter")
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """Wait for a slot without blocking the event loop.  Returns the seconds waited."""
+        start = time.monotonic()
+        while (wait := self._try_acquire(tokens)) > 0:
+            await asyncio.sleep(max(self.poll_interval, min(wait, 1.0)))
+        waited = time.monotonic() - start
+        self._observe_wait(waited)
+        return waited
+
+    def acquire_sync(self, tokens: int = 0) -> float:
+        """Block the current thread until a slot is available.  Returns the seconds waited."""
+        start = time.monotonic()
+        while (wait := self._try_acquire(tokens)) > 0:
+            time.sleep(max(self.poll_interval, min(wait, 1.0)))
+        waited = time.monotonic() - start
+        self._observe_wait(waited)
+        return waited
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0) -> AsyncIterator[Lease]:
+        """Hold a slot for the duration of the block."""
+        lease = Lease(estimated_tokens=tokens)
+        await self.acquire(tokens)
+        try:
+            yield lease
+        finally:
+            self.release(lease)
+
+    @contextmanager
+    def slot_sync(self, tokens: int = 0) -> Iterator[Lease]:
+        """Hold a slot for the duration of the block (synchronous callers)."""
+        lease = Lease(estimated_tokens=tokens)
+        self.acquire_sync(tokens)
+        try:
+            yield lease
+        finally:
+            self.release(lease)
+
+
+_limiters: dict[tuple[str, tuple], ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, config: Any = None) -> Optional[ProviderLimiter]:
+    """Return the shared limiter for a model or client name.
+
+    The most specific entry of the configured `rate_limits` wins: a 'provider/model'
+    entry before a 'provider' entry.  Limiters are created the first time a key and
+    its limits are seen and shared by every graph in the process afterwards; graphs
+    configured with different limits for the same key get separate limiters.
+
+    Args:
+        name (str): A fully specified model name ('provider/model') or a client name such as 'tavily'.
+        config: A configuration exposing `rate_limits`.  Defaults are used when omitted.
+
+    Returns:
+        Optional[ProviderLimiter]: The limiter, or None when no limits apply to the name.
+    """
+    rate_limits = getattr(config, "rate_limits", None)
+    if rate_limits is None:
+        rate_limits = DEFAULT_RATE_LIMITS
+    key = name if name in rate_limits else name.split("/", maxsplit=1)[0]
+    limits = rate_limits.get(key)
+    if not limits:
+        return None
+    cache_key = (key, tuple(sorted(limits.items())))
+    with _limiters_lock:
+        if cache_key not in _limiters:
+            if any(existing == key for existing, _ in _limiters):
+                logger.warning(
+                    f"Rate limits for {key} differ between configurations; "
+                    f"{limits} gets a separate budget"
+                )
+            _limiters[cache_key] = ProviderLimiter(key, **limits)
+        return _limiters[cache_key]
+
+
+@asynccontextmanager
+async def rate_limited(name: str, config: Any = None) -> AsyncIterator[Lease]:
+    """Hold a slot on the limiter for `name` (if any) around a block of code.
+
+    Example:
+        >>> async with rate_limited("tavily", config):
+        ...     results = await client.search(query)
+    """
+    limiter = get_limiter(name, config)
+    if limiter is None:
+        yield Lease()
+        return
+    async with limiter.slot() as lease:
+        yield lease
+
+
+@contextmanager
+def rate_limited_sync(name: str, config: Any = None) -> Iterator[Lease]:
+    """Synchronous counterpart of `rate_limited`."""
+    limiter = get_limiter(name, config)
+    if limiter is None:
+        yield Lease()
+        return
+    with limiter.slot_sync() as lease:
+        yield lease
@@ -55,7 +55,7 @@ def identify_new_rules(
         }
 
     config = ReflectionConfiguration.from_runnable_config(config)
-    model = load_chat_model(config.reflection_model, config.reflection_model_kwargs)
+    model = load_chat_model(config.reflection_model, config.reflection_model_kwargs, config=config)
     model = model.bind_tools([new_rule])
     reflection_prompt = asyncio.run(build_reflection_prompt(state, config))
 
@@ -96,7 +96,7 @@ def update_ruleset(
     existing_rules = asyncio.run(fetch_rules(config=config, post_style=state.post_style))
     if existing_rules:
         # determine how existing rules should be updated to account for new rules
-        model = load_chat_model(config.reflection_model, config.reflection_model_kwargs).with_structured_output(UpdatedRulesetSchema)
+        model = load_chat_model(config.reflection_model, config.reflection_model_kwargs, config=config).with_structured_output(UpdatedRulesetSchema)
         update_rules_prompt = asyncio.run(build_update_rules_prompt(existing_rules=existing_rules, new_rules=state.new_rules))
         response = model.invoke(
             [
@@ -0,0 +1,278 @@
+"""Durable background queue of reflection jobs.
+
+Editor changes to a post are reflected upon off the request path.  Jobs are stored in
+SQLite, so pending reflections survive a restart, and run on a small pool of worker
+threads shared by the process.  A worker claims every queued job of one post style at
+once: new rules are identified for each edit, then merged into the style's ruleset in
+a single update, so a burst of edits costs one ruleset rewrite.  At most one worker
+handles a post style at a time.
+
+Queue depth, job latency and outcomes are exported as metrics.
+
+Classes:
+    ReflectionQueue: SQLite backed reflection jobs and their workers.
+
+Functions:
+    get_reflection_queue: Return the shared queue for a configuration.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import fields
+from typing import Any, Optional
+
+from langchain_core.messages import HumanMessage
+
+from agents.metrics import counter, gauge, histogram
+from agents.reflection.configuration import ReflectionConfiguration
+from agents.reflection.graph import identify_new_rules, update_ruleset
+from agents.reflection.state import ReflectionState
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 60.0
+IDLE_POLL_SECONDS = 5.0
+
+REFLECTION_QUEUE_DEPTH = gauge(
+    "reflection_queue_depth",
+    "Reflection jobs waiting or running, by status.",
+    labels=("status",),
+)
+REFLECTION_JOB_LATENCY_SECONDS = histogram(
+    "reflection_job_latency_seconds",
+    "Time from enqueueing a reflection job to its completion.",
+    labels=("status",),
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+REFLECTION_JOBS_TOTAL = counter(
+    "reflection_jobs_total",
+    "Reflection jobs finished, by outcome.",
+    labels=("status",),
+)
+REFLECTION_RULESET_UPDATES_TOTAL = counter(
+    "reflection_ruleset_updates_total",
+    "Ruleset updates made by reflection workers, by post style.",
+    labels=("post_style",),
+)
+
+
+class ReflectionQueue:
+    """SQLite backed reflection jobs and the worker threads that run them.
+
+    Jobs move through the statuses queued -> running -> done (deleted) or failed.
+    Failed attempts are retried up to `MAX_ATTEMPTS` times after a backoff.
+    """
+
+    def __init__(self, path: str, config: ReflectionConfiguration, workers: int = 2):
+        """Open (or create) the queue at the given path and start its workers."""
+        self.path = os.path.expanduser(path)
+        self.config = config
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._active_styles: set[str] = set()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                post_style TEXT NOT NULL,
+                original_text TEXT NOT NULL,
+                revised_text TEXT NOT NULL,
+                editor_feedback TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                enqueued REAL NOT NULL,
+                available REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available);
+            """
+        )
+        # jobs running when the process stopped are picked up again
+        self._conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+        self._conn.commit()
+        self._update_depth()
+        for index in range(workers):
+            threading.Thread(
+                target=self._work, daemon=True, name=f"reflection-{index}"
+            ).start()
+
+    def enqueue(self, state: ReflectionState) -> int:
+        """Queue a reflection on an edit and return the job id."""
+        feedback = state.editor_feedback.content if state.editor_feedback else None
+        now = time.time()
+        with self._wakeup:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (post_style, original_text, revised_text, editor_feedback, status, enqueued, available)"
+                " VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (
+                    state.post_style,
+                    state.original_text,
+                    state.revised_text,
+                    feedback,
+                    now,
+                    now,
+                ),
+            )
+            self._conn.commit()
+            self._update_depth()
+            self._wakeup.notify()
+        return cursor.lastrowid
+
+    def stats(self) -> dict[str, int]:
+        """Return the number of jobs in each status."""
+        with self._lock:
+            return self._counts()
+
+    def _counts(self) -> dict[str, int]:
+        rows = self._conn.execute(
+            "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+        ).fetchall()
+        counts = {"queued": 0, "running": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def _update_depth(self) -> None:
+        counts = self._counts()
+        for status in ("queued", "running"):
+            REFLECTION_QUEUE_DEPTH.set(counts[status], status=status)
+
+    def _claim(self) -> Optional[tuple[str, list[tuple]]]:
+        """Claim every available job of one post style no other worker is handling."""
+        now = time.time()
+        styles = self._conn.execute(
+            "SELECT DISTINCT post_style FROM jobs WHERE status = 'queued' AND available <= ? ORDER BY id",
+            (now,),
+        ).fetchall()
+        for (post_style,) in styles:
+            if post_style in self._active_styles:
+                continue
+            jobs = self._conn.execute(
+                "SELECT id, original_text, revised_text, editor_feedback, enqueued, attempts FROM jobs"
+                " WHERE status = 'queued' AND available <= ? AND post_style = ? ORDER BY id",
+                (now, post_style),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE jobs SET status = 'running' WHERE id = ?",
+                [(job[0],) for job in jobs],
+            )
+            self._conn.commit()
+            self._active_styles.add(post_style)
+            self._update_depth()
+            return post_style, jobs
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._wakeup:
+                claimed = self._claim()
+                while claimed is None:
+                    self._wakeup.wait(IDLE_POLL_SECONDS)
+                    claimed = self._claim()
+            post_style, jobs = claimed
+            try:
+                self._reflect(post_style, jobs)
+                error = None
+            except Exception as e:
+                logger.exception(f"Reflection for post style {post_style} failed")
+                error = repr(e)
+            self._finish(post_style, jobs, error)
+
+    def _runnable_config(self) -> dict[str, Any]:
+        return {
+            "configurable": {
+                f.name: getattr(self.config, f.name) for f in fields(self.config)
+            }
+        }
+
+    def _reflect(self, post_style: str, jobs: list[tuple]) -> None:
+        """Identify new rules for each edit, then update the ruleset once."""
+        config = self._runnable_config()
+        new_rules = []
+        for _, original_text, revised_text, feedback, _, _ in jobs:
+            state = ReflectionState(
+                original_text=original_text,
+                revised_text=revised_text,
+                post_style=post_style,
+                editor_feedback=HumanMessage(feedback) if feedback else None,
+            )
+            new_rules.extend(identify_new_rules(state, config)["new_rules"])
+        new_rules = list(dict.fromkeys(new_rules))
+        if not new_rules:
+            return
+        _, original_text, revised_text, _, _, _ = jobs[-1]
+        update_ruleset(
+            ReflectionState(
+                original_text=original_text,
+                revised_text=revised_text,
+                post_style=post_style,
+                new_rules=new_rules,
+            ),
+            config,
+        )
+        REFLECTION_RULESET_UPDATES_TOTAL.inc(post_style=post_style)
+        logger.info(
+            f"Merged {len(new_rules)} new rules from {len(jobs)} edits into the {post_style} ruleset"
+        )
+
+    def _finish(self, post_style: str, jobs: list[tuple], error: Optional[str]) -> None:
+        now = time.time()
+        with self._wakeup:
+            for job_id, _, _, _, enqueued, attempts in jobs:
+                if error is None:
+                    status = "done"
+                    self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                elif attempts + 1 < MAX_ATTEMPTS:
+                    status = "retried"
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'queued', attempts = ?, error = ?, available = ? WHERE id = ?",
+                        (attempts + 1, error, now + RETRY_BACKOFF_SECONDS, job_id),
+                    )
+                else:
+                    status = "failed"
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'failed', attempts = ?, error = ? WHERE id = ?",
+                        (attempts + 1, error, job_id),
+                    )
+                REFLECTION_JOBS_TOTAL.inc(status=status)
+                if status != "retried":
+                    REFLECTION_JOB_LATENCY_SECONDS.observe(now - enqueued, status=status)
+            self._conn.commit()
+            self._active_styles.discard(post_style)
+            self._update_depth()
+            # jobs of this style queued meanwhile can now be claimed
+            self._wakeup.notify_all()
+
+
+_queues: dict[str, ReflectionQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_reflection_queue(config: Any) -> ReflectionQueue:
+    """Return the shared queue for a configuration, starting it on first use.
+
+    Reflection jobs run with the database and model settings of the configuration
+    that first starts the queue.
+    """
+    path = os.path.expanduser(config.reflection_queue_path)
+    with _queues_lock:
+        if path not in _queues:
+            reflection_config = ReflectionConfiguration(
+                **{
+                    f.name: getattr(config, f.name)
+                    for f in fields(ReflectionConfiguration)
+                    if f.init and hasattr(config, f.name)
+                }
+            )
+            _queues[path] = ReflectionQueue(
+                path, reflection_config, workers=config.reflection_workers
+            )
+        return _queues[path]
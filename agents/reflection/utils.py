@@ -9,7 +9,7 @@ async def build_reflection_prompt(
 ) -> str:
     """Build the reflection prompt."""
     
-    editor_feedback = state.editor_feedback["content"] if state.editor_feedback and "content" in state.editor_feedback else ""
+    editor_feedback = state.editor_feedback.content if state.editor_feedback else ""
     return REFLECTIONS_PROMPT.format(
         original_text=state.original_text,
         revised_text=state.revised_text,
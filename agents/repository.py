@@ -0,0 +1,148 @@
+"""Async access to the agents' MongoDB collections.
+
+pymongo is a blocking driver, so every operation is run on a bounded thread pool
+shared by the process instead of on the event loop.  This keeps one graph's
+database round trips from stalling the other graphs served by the same process,
+and works the same whether a node runs on the server's loop or inside `asyncio.run`.
+
+Classes:
+    MongoRepository: Async operations on the rules, LinkedIn post, blog post and image collections.
+
+Functions:
+    get_repository: Return a repository for a configuration.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from pymongo import ReturnDocument
+
+from agents.mongo import get_mongo_client
+from agents.rules_cache import get_rules_cache
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Return the process-wide executor for database calls."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="mongo"
+            )
+        return _executor
+
+
+class MongoRepository:
+    """Async operations on the rules, LinkedIn post, blog post and image collections."""
+
+    def __init__(self, config: Any):
+        """Create a repository for the database and collections named in a configuration."""
+        self.config = config
+        self.db = get_mongo_client(config)[config.mongo_db]
+        self.executor = _get_executor(config.mongo_executor_workers)
+
+    async def _run(self, fn: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    @property
+    def rules(self):
+        """The collection holding one rules document per post style."""
+        return self.db[self.config.mongo_collection_rules]
+
+    @property
+    def linkedin_posts(self):
+        """The collection of scheduled LinkedIn posts."""
+        return self.db[self.config.mongo_collection_linkedin_posts]
+
+    @property
+    def blog_posts(self):
+        """The collection of generated blog posts."""
+        return self.db[self.config.mongo_collection_blog_posts]
+
+    @property
+    def images(self):
+        """The index of stored images, keyed by content hash."""
+        return self.db[self.config.mongo_collection_images]
+
+    async def ensure_image_indexes(self) -> None:
+        """Index stored images by source URL."""
+        await self._run(self.images.create_index, "urls", name="urls")
+
+    async def find_image_by_url(self, url: str) -> Optional[dict[str, Any]]:
+        """Return the stored image downloaded from a URL, if any."""
+        return await self._run(self.images.find_one, {"urls": url})
+
+    async def add_image_reference(
+        self, sha256: str, url: str, document: Optional[dict[str, Any]] = None
+    ) -> None:
+        """Count a new reference to a stored image and index the URL it came from.
+
+        `document` holds the fields written when the image is first indexed.
+        """
+        update = {"$addToSet": {"urls": url}, "$inc": {"refcount": 1}}
+        if document:
+            update["$setOnInsert"] = document
+        await self._run(self.images.update_one, {"_id": sha256}, update, upsert=True)
+
+    async def fetch_rules(self, post_style: str = "default") -> list[str]:
+        """Return the rules stored for a post style (empty if there are none).
+
+        Rulesets are served from the in-process rules cache when it is current.
+        """
+        cache = get_rules_cache(self.config)
+        rules = cache.fresh(post_style)
+        if rules is None:
+            rules = await self._run(cache.get, post_style)
+        if rules is not None:
+            return rules
+        generation = cache.generation(post_style)
+        document = await self._run(
+            self.rules.find_one, {"post_style": post_style}, {"rules": 1, "version": 1}
+        )
+        rules = document["rules"] if document else []
+        cache.put(post_style, rules, (document or {}).get("version", 0), generation)
+        return rules
+
+    async def store_rules(self, rules: list[str], post_style: str = "default") -> None:
+        """Replace the rules of a post style, creating its document if needed.
+
+        Every write increments the document's version so other processes notice it.
+        """
+        cache = get_rules_cache(self.config)
+        generation = cache.generation(post_style)
+        document = await self._run(
+            self.rules.find_one_and_update,
+            {"post_style": post_style},
+            {"$set": {"rules": rules}, "$inc": {"version": 1}},
+            projection={"version": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        cache.put(post_style, rules, document["version"], generation)
+
+    async def insert_linkedin_post(self, document: dict[str, Any]) -> Any:
+        """Insert a scheduled LinkedIn post and return its id."""
+        result = await self._run(self.linkedin_posts.insert_one, document)
+        return result.inserted_id
+
+    async def insert_blog_post(self, document: dict[str, Any]) -> Any:
+        """Insert a blog post and return its id."""
+        result = await self._run(self.blog_posts.insert_one, document)
+        return result.inserted_id
+
+
+def get_repository(config: Any) -> MongoRepository:
+    """Return a repository for a configuration.
+
+    Repositories are cheap: the client, pool and executor behind them are shared.
+    """
+    return MongoRepository(config)
@@ -0,0 +1,171 @@
+"""In-process cache of reflection rulesets.
+
+Rules are read for every post generated, condensed or rewritten but change only when
+the reflection graph stores new ones.  Each rules document carries a `version`
+counter incremented by every write.  Cached rulesets are trusted:
+
+- indefinitely while a change stream on the rules collection is running (MongoDB
+  replica sets), since the listener drops entries as soon as a document changes;
+- otherwise for `check_seconds`, after which only the version is read back and the
+  rules are re-read if it moved.
+
+Writes made through the same process update the cache directly.  Readers and writers
+take a `generation` before going to the database and pass it to `put`, which drops
+the result if the ruleset was invalidated in the meantime; otherwise a read that
+started before a change could cache the old rules after the listener dropped them.
+
+Classes:
+    RulesCache: Versioned rulesets for one rules collection.
+
+Functions:
+    get_rules_cache: Return the shared cache for a configuration's rules collection.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from agents.mongo import get_mongo_client
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedRules:
+    """A ruleset and the version it was read at."""
+
+    rules: list[str]
+    version: int
+    checked: float
+
+
+class RulesCache:
+    """Versioned rulesets for one rules collection, keyed by post style."""
+
+    def __init__(self, collection, check_seconds: float = 60.0):
+        """Create a cache over a rules collection and try to start a change stream listener."""
+        self.collection = collection
+        self.check_seconds = check_seconds
+        self.listening = False
+        self._entries: dict[str, CachedRules] = {}
+        # invalidation counters, per post style and for the whole cache
+        self._invalidations: dict[str, int] = {}
+        self._clears = 0
+        self._lock = threading.Lock()
+        self._start_listener()
+
+    def _start_listener(self) -> None:
+        thread = threading.Thread(target=self._listen, daemon=True, name="rules-watch")
+        thread.start()
+
+    def _listen(self) -> None:
+        """Drop cached entries as soon as their document changes."""
+        try:
+            with self.collection.watch(full_document="updateLookup") as stream:
+                self.listening = True
+                logger.debug("Watching rules collection for changes")
+                for change in stream:
+                    post_style = (change.get("fullDocument") or {}).get("post_style")
+                    self.invalidate(post_style)
+        except OperationFailure as e:
+            # change streams need a replica set; fall back to version checks
+            logger.info(f"Rules change stream unavailable, checking versions instead: {e}")
+        except PyMongoError as e:
+            logger.warning(f"Rules change stream stopped: {e}")
+        finally:
+            self.listening = False
+            self.invalidate()
+
+    def invalidate(self, post_style: Optional[str] = None) -> None:
+        """Drop the cached ruleset of a post style, or every ruleset if None."""
+        with self._lock:
+            if post_style is None:
+                self._entries.clear()
+                self._clears += 1
+            else:
+                self._entries.pop(post_style, None)
+                self._invalidations[post_style] = self._invalidations.get(post_style, 0) + 1
+
+    def generation(self, post_style: str) -> tuple[int, int]:
+        """Return a token that changes whenever the ruleset of a post style is invalidated."""
+        with self._lock:
+            return self._clears, self._invalidations.get(post_style, 0)
+
+    def fresh(self, post_style: str) -> Optional[list[str]]:
+        """Return the cached rules of a post style if they can be used without a database read."""
+        with self._lock:
+            entry = self._entries.get(post_style)
+        if entry and (
+            self.listening or time.monotonic() - entry.checked < self.check_seconds
+        ):
+            return entry.rules
+        return None
+
+    def get(self, post_style: str) -> Optional[list[str]]:
+        """Return the cached rules of a post style if they are known to be current.
+
+        This may read the document version (but not the rules) from the database when
+        no change stream is running and the entry has not been checked recently.
+        """
+        with self._lock:
+            entry = self._entries.get(post_style)
+        if entry is None:
+            return None
+        if self.listening or time.monotonic() - entry.checked < self.check_seconds:
+            return entry.rules
+        document = self.collection.find_one({"post_style": post_style}, {"version": 1})
+        if (document or {}).get("version", 0) != entry.version:
+            self.invalidate(post_style)
+            return None
+        entry.checked = time.monotonic()
+        return entry.rules
+
+    def put(
+        self,
+        post_style: str,
+        rules: list[str],
+        version: int,
+        generation: Optional[tuple[int, int]] = None,
+    ) -> None:
+        """Cache the rules of a post style read (or written) at a version.
+
+        Args:
+            post_style (str): The post style of the rules.
+            rules (list[str]): The rules.
+            version (int): The document version the rules were read or written at.
+            generation (Optional[tuple[int, int]]): The `generation` taken before the
+                database call.  The rules are not cached if it has changed since.
+        """
+        with self._lock:
+            if generation is not None and generation != (
+                self._clears,
+                self._invalidations.get(post_style, 0),
+            ):
+                logger.debug(f"Dropping {post_style} rules invalidated during the read")
+                return
+            current = self._entries.get(post_style)
+            # never replace newer rules with an older read
+            if current is None or current.version <= version:
+                self._entries[post_style] = CachedRules(rules, version, time.monotonic())
+
+
+_caches: dict[tuple, RulesCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_rules_cache(config: Any) -> RulesCache:
+    """Return the shared cache for a configuration's rules collection."""
+    key = (config.mongo_url, config.mongo_db, config.mongo_collection_rules)
+    with _caches_lock:
+        if key not in _caches:
+            collection = get_mongo_client(config)[config.mongo_db][
+                config.mongo_collection_rules
+            ]
+            _caches[key] = RulesCache(
+                collection, check_seconds=config.rules_cache_check_seconds
+            )
+        return _caches[key]
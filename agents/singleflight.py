@@ -0,0 +1,109 @@
+"""Single-flight memoization of async lookups.
+
+Concurrent callers asking for the same key share one in-flight computation, and its
+result is reused for a time-to-live afterwards.  Failures are not cached.
+
+Classes:
+    AsyncMemo: TTL and LRU bounded memo with in-flight deduplication.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Union
+
+_MISSING = object()
+
+
+class AsyncMemo:
+    """TTL and LRU bounded memo with in-flight deduplication.
+
+    In-flight computations are only shared between callers on the same event loop;
+    cached results are shared across loops and threads.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """Create a memo holding at most `max_entries` results."""
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._pending: dict[tuple[int, Hashable], asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached result of a key, or a sentinel if there is none."""
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self._results[key]
+                return _MISSING
+            self._results.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, ttl_seconds: float) -> None:
+        """Cache a result for `ttl_seconds`."""
+        with self._lock:
+            self._results[key] = (time.monotonic() + ttl_seconds, value)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        ttl_seconds: Union[float, Callable[[Any], float]],
+    ) -> Any:
+        """Return the result of a key, computing it at most once across concurrent callers.
+
+        Args:
+            key: The memo key.
+            compute: Produces the result when it is neither cached nor in flight.
+            ttl_seconds: How long the result is reused, or a function of the result
+                returning it.  A TTL of zero or less shares the result with concurrent
+                callers only.
+
+        Returns:
+            Any: The cached, shared or newly computed result.
+        """
+        value = self.get(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        loop = asyncio.get_running_loop()
+        pending_key = (id(loop), key)
+        pending = self._pending.get(pending_key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = loop.create_future()
+        self._pending[pending_key] = future
+        try:
+            value = await compute()
+            ttl = ttl_seconds(value) if callable(ttl_seconds) else ttl_seconds
+            if ttl > 0:
+                self.put(key, value, ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # the exception is re-raised here; do not also report it as unretrieved
+            future.exception()
+            raise
+        finally:
+            if self._pending.get(pending_key) is future:
+                del self._pending[pending_key]
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self._results.clear()
@@ -0,0 +1,175 @@
+"""Shared cache of fetched URL contents.
+
+Scraping a page is slow and, for FireCrawl, billed, yet the same article is fetched
+again on every retry, every reprocessed thread and every post or blog citing it.
+Loaded documents (text, metadata and the image URLs it holds) are therefore kept
+compressed in a size-bounded `DiskCache`, keyed by the loader and the canonical form
+of the URL, and reused until they are older than `url_cache_ttl_seconds`.
+
+Lookups are counted in `url_cache_lookups_total` by loader and result, from which
+hit rates follow.
+
+Classes:
+    UrlContentCache: Loaded documents by loader and canonical URL.
+
+Functions:
+    canonicalize_url: Normalize a URL so equivalent spellings share a cache entry.
+    get_url_cache: Return the shared URL content cache for a configuration, if enabled.
+    cached_load: Load the documents of a URL through the cache, if enabled.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import zlib
+from typing import Any, Awaitable, Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from langchain_core.documents import Document
+
+from agents.cache import DiskCache
+from agents.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+URL_CACHE_LOOKUPS_TOTAL = counter(
+    "url_cache_lookups_total",
+    "URL content cache lookups, by loader and result (hit or miss).",
+    labels=("loader", "result"),
+)
+
+# query parameters that only track where a click came from
+TRACKING_PARAMS = ("fbclid", "gclid", "mc_cid", "mc_eid", "igshid", "ref", "ref_src")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so equivalent spellings share a cache entry.
+
+    The scheme and host are lowercased, default ports, fragments, tracking
+    parameters (`utm_*` and `TRACKING_PARAMS`) and trailing slashes are dropped, and
+    the remaining query parameters are sorted.
+
+    Args:
+        url (str): The URL.
+
+    Returns:
+        str: The canonical URL.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+class UrlContentCache:
+    """Loaded documents by loader and canonical URL, compressed in a DiskCache."""
+
+    def __init__(self, store: DiskCache):
+        """Create a URL content cache on top of the given store."""
+        self.store = store
+
+    @staticmethod
+    def key(url: str, loader: str) -> str:
+        """Return the cache key of a URL loaded with the named loader."""
+        return f"{loader}:{canonicalize_url(url)}"
+
+    def get(self, url: str, loader: str) -> Optional[list[Document]]:
+        """Return the cached documents of a URL, or None on a miss."""
+        value = self.store.get(self.key(url, loader))
+        documents = None
+        if value is not None:
+            try:
+                documents = [
+                    Document(page_content=doc["page_content"], metadata=doc["metadata"])
+                    for doc in json.loads(zlib.decompress(value))
+                ]
+            except (ValueError, KeyError, zlib.error) as e:
+                logger.warning(f"Discarding unreadable cached contents of {url}: {e}")
+        URL_CACHE_LOOKUPS_TOTAL.inc(
+            loader=loader, result="hit" if documents is not None else "miss"
+        )
+        return documents
+
+    def put(self, url: str, loader: str, documents: list[Document]) -> None:
+        """Store the documents loaded from a URL."""
+        value = json.dumps(
+            [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents],
+            default=str,
+        )
+        self.store.put(self.key(url, loader), zlib.compress(value.encode()))
+
+    def hit_rate(self) -> float:
+        """Return the fraction of lookups served from the cache."""
+        return self.store.hit_rate()
+
+
+_url_caches: dict[str, UrlContentCache] = {}
+_url_caches_lock = threading.Lock()
+
+
+def get_url_cache(config: Any) -> Optional[UrlContentCache]:
+    """Return the shared URL content cache for a configuration.
+
+    Args:
+        config: A configuration exposing `url_cache_enabled`, `url_cache_path`,
+            `url_cache_max_mb` and `url_cache_ttl_seconds`.
+
+    Returns:
+        Optional[UrlContentCache]: The cache, or None if caching is disabled.
+    """
+    if not getattr(config, "url_cache_enabled", False):
+        return None
+    path = os.path.expanduser(config.url_cache_path)
+    with _url_caches_lock:
+        if path not in _url_caches:
+            _url_caches[path] = UrlContentCache(
+                DiskCache(
+                    path,
+                    max_bytes=config.url_cache_max_mb * 1024 * 1024,
+                    ttl_seconds=config.url_cache_ttl_seconds,
+                )
+            )
+        return _url_caches[path]
+
+
+async def cached_load(
+    url: str,
+    loader: str,
+    load: Callable[[], Awaitable[list[Document]]],
+    config: Any,
+) -> list[Document]:
+    """Load the documents of a URL through the cache, if enabled.
+
+    Empty results are not cached, so a failed fetch is retried next time.
+
+    Args:
+        url (str): The URL.
+        loader (str): Name of the loader, since loaders extract different contents.
+        load (Callable): Fetches the documents on a miss.
+        config: The configuration selecting the cache.
+
+    Returns:
+        list[Document]: The cached or freshly loaded documents.
+    """
+    cache = get_url_cache(config)
+    if cache is None:
+        return await load()
+    documents = await asyncio.to_thread(cache.get, url, loader)
+    if documents is not None:
+        logger.debug(f"Loaded {url} from the URL cache (hit rate {cache.hit_rate():.0%})")
+        return documents
+    documents = await load()
+    if documents:
+        await asyncio.to_thread(cache.put, url, loader, documents)
+    return documents
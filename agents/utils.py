@@ -15,9 +15,16 @@ from langchain.chat_models import init_chat_model
 from langchain_community.chat_models import ChatPerplexity
 from langchain_core.documents import Document
 from langchain_core.language_models import BaseChatModel
-from pymongo import MongoClient
 
+from agents.chat_models import (
+    DEFAULT_HEDGE_ERRORS,
+    HedgedChatModel,
+    apply_model_policies,
+    get_hedge_policy,
+)
 from agents.configuration import BaseConfiguration
+from agents.mongo import get_mongo_client
+from agents.repository import get_repository
 
 RULESET_NAMESPACE = ["reflection_rules"]
 RULESET_KEY = "ruleset"
@@ -29,17 +36,13 @@ async def fetch_rules(
     """Retrieve persisted rules sets for a given post style.
 
     Args:
-        store (BaseStore): The store to retrieve the ruleset from.
+        config (BaseConfiguration): Configuration info used to connect to MongoDB.
         post_style (str, optional): The style of post for these rules. Defaults to "default".
 
     Returns:
         list[str]: List of rules for post type.
     """
-    collection = load_rules_collection(config)
-    filter = {"post_style": post_style}
-    rules_document = collection.find_one(filter)
-    rules = rules_document["rules"] if rules_document else []
-    return rules
+    return await get_repository(config).fetch_rules(post_style)
 
 
 async def store_rules(
@@ -54,17 +57,8 @@ async def store_rules(
     Returns:
         None.
     """
-    # only want one document of rules for each post_style, so we will update the existing document if it exists
-    collection = load_rules_collection(config)
-    filter = {"post_style": post_style}
-    rules_document = collection.find_one(filter)
-
-    if rules_document:
-        collection.update_one(
-            {"_id": rules_document["_id"]}, {"$set": {"rules": rules}}
-        )
-    else:
-        collection.insert_one({"post_style": post_style, "rules": rules})
+    # only want one document of rules for each post_style, so the existing document is updated if it exists
+    await get_repository(config).store_rules(rules, post_style)
 
 
 def _format_doc(doc: Document) -> str:
@@ -119,31 +113,68 @@ def format_docs(docs: Optional[list[Document]]) -> str:
 
 
 def load_chat_model(
-    fully_specified_name: str, model_kwargs: Optional[dict[str, Any]] = None
+    fully_specified_name: str,
+    model_kwargs: Optional[dict[str, Any]] = None,
+    config: Optional[BaseConfiguration] = None,
 ) -> BaseChatModel:
     """Load a chat model from a fully specified name.
 
     Args:
         fully_specified_name (str): String in the format 'provider/model'.
         model_kwargs (Optional[dict[str, Any]]): Additional keyword arguments for the model.
+        config (Optional[BaseConfiguration]): Configuration of the calling graph.  Used to
+            apply the response cache (temperature 0 calls only), provider rate limits,
+            metrics and the hedging policy of the calling node.
     """
+    chat_model = _load_chat_model(fully_specified_name, model_kwargs, config)
+    if config is None:
+        return chat_model
+
+    node, policy = get_hedge_policy(config)
+    if not policy:
+        return chat_model
+    secondary_name = policy["secondary_model"]
+    secondary = _load_chat_model(
+        secondary_name, policy.get("secondary_model_kwargs", model_kwargs), config
+    )
+    return HedgedChatModel(
+        primary=chat_model,
+        secondary=secondary,
+        primary_name=fully_specified_name,
+        secondary_name=secondary_name,
+        node=node,
+        hedge_after_seconds=policy.get("hedge_after_seconds"),
+        fallback_errors=tuple(policy.get("fallback_errors", DEFAULT_HEDGE_ERRORS)),
+    )
+
+
+def _load_chat_model(
+    fully_specified_name: str,
+    model_kwargs: Optional[dict[str, Any]] = None,
+    config: Optional[BaseConfiguration] = None,
+) -> BaseChatModel:
     if "/" in fully_specified_name:
         provider, model = fully_specified_name.split("/", maxsplit=1)
     else:
         provider = ""
         model = fully_specified_name
 
-    if model_kwargs is None:
-        model_kwargs = {"temperature": 0}
-    else:
-        model_kwargs.setdefault("temperature", 0)
+    model_kwargs = {"temperature": 0, **(model_kwargs or {})}
 
     if provider == "google_genai":
         model_kwargs["convert_system_message_to_human"] = True
-    elif provider == "perplexity":
-        return ChatPerplexity(model=model, **model_kwargs)
 
-    return init_chat_model(model, model_provider=provider, **model_kwargs)
+    if provider == "perplexity":
+        chat_model = ChatPerplexity(model=model, **model_kwargs)
+    else:
+        chat_model = init_chat_model(model, model_provider=provider, **model_kwargs)
+
+    return apply_model_policies(
+        chat_model,
+        fully_specified_name,
+        config,
+        deterministic=model_kwargs["temperature"] == 0,
+    )
 
 
 def reduce_docs(
@@ -384,9 +415,11 @@ def init_db_connection(config: BaseConfiguration):
     Args:
         config (BaseConfiguration): Configuration object containing MongoDB connection details.
 
+    The underlying client is shared by every caller using the same `mongo_url`.
+
     Returns:
         Database: A MongoDB database instance.
     """
-    client = MongoClient(config.mongo_url)
+    client = get_mongo_client(config)
     db = client[config.mongo_db]
     return db
@@ -28,4 +28,36 @@ class VerifyLinksConfiguration(BaseConfiguration):
         metadata={
             "description": "The language model used for generating information reports that act as input to posts. Should be in the form: provider/model-name."
         },
-    )
\ No newline at end of file
+    )
+    direct_fetch_enabled: bool = field(
+        default=True,
+        metadata={
+            "description": "Whether links are first fetched with a direct GET and extracted locally, using FireCrawl only for pages that are blocked or rendered with JavaScript."
+        },
+    )
+    direct_fetch_timeout_seconds: float = field(
+        default=15.0,
+        metadata={"description": "Timeout of the direct GET of a link."},
+    )
+    direct_fetch_min_chars: int = field(
+        default=500,
+        metadata={
+            "description": "Fewest characters of text a directly fetched page must yield; shorter pages are fetched again with FireCrawl."
+        },
+    )
+    firecrawl_screenshot: bool = field(
+        default=False,
+        metadata={"description": "Whether FireCrawl also returns a screenshot of the page."},
+    )
+    summarize_relevant_links: bool = field(
+        default=False,
+        metadata={
+            "description": "Whether the relevance check also returns a report-ready summary of each relevant link, so reports are written from the summaries instead of re-reading the pages."
+        },
+    )
+    url_memo_ttl_seconds: float = field(
+        default=15 * 60.0,
+        metadata={
+            "description": "How long fetched link contents and relevance verdicts are reused by other runs in the process."
+        },
+    )
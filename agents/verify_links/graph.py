@@ -7,11 +7,19 @@ from langgraph.graph import StateGraph
 from langchain_core.runnables import RunnableConfig
 from agents.verify_links.configuration import VerifyLinksConfiguration
 from agents.verify_links.state import VerifySingleLinkState, VerifyLinksState
-from agents.verify_links.utils import get_url_contents, RelevanceEvaluation, get_relevance_eval_system_prompt
+from agents.verify_links.utils import get_url_contents, RelevanceEvaluation, RelevanceSummaryEvaluation, get_relevance_eval_system_prompt
 from agents.utils import load_chat_model
+from agents.blob_store import SUMMARY_KEY, offload_documents
+from agents.singleflight import AsyncMemo
+from agents.url_cache import canonicalize_url
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.documents import Document
 
+URL_CONTENTS = AsyncMemo(max_entries=512)
+"""Contents of recently fetched links, shared by every run in the process."""
+RELEVANCE_EVALUATIONS = AsyncMemo(max_entries=2048)
+"""Recent relevance verdicts, by link, topic and model."""
+
 def route_verifications(state: VerifyLinksState):
     """Route the type of link to the appropriate verification function."""
     # TODO: route to additional link verification functions
@@ -28,21 +36,43 @@ async def verify_general(
         # TODO: log error
         raise ValueError("No URL provided as source content to verify.")
     
-    url_contents = await get_url_contents(state, config)
-
-    model = load_chat_model(config.relevancy_model).with_structured_output(RelevanceEvaluation)
-    response = await model.ainvoke(
-        [
-            SystemMessage(get_relevance_eval_system_prompt(state, config)),
-            HumanMessage(url_contents.content),
-        ]
+    # links shared by concurrent runs are fetched and evaluated once
+    url_contents = await URL_CONTENTS.get_or_compute(
+        canonicalize_url(state.link),
+        lambda: get_url_contents(state, config),
+        config.url_memo_ttl_seconds,
+    )
+
+    # optionally the same call also summarizes the page for the report
+    schema = RelevanceSummaryEvaluation if config.summarize_relevant_links else RelevanceEvaluation
+
+    async def evaluate_relevance() -> RelevanceEvaluation:
+        model = load_chat_model(config.relevancy_model, config=config).with_structured_output(schema)
+        return await model.ainvoke(
+            [
+                SystemMessage(get_relevance_eval_system_prompt(state, config)),
+                HumanMessage(url_contents.content),
+            ]
+        )
+
+    response = await RELEVANCE_EVALUATIONS.get_or_compute(
+        (canonicalize_url(state.link), state.topic, config.relevancy_model, schema.__name__),
+        evaluate_relevance,
+        config.url_memo_ttl_seconds,
     )
 
     if response.relevant:
+        metadata = {"source": state.link}
+        if getattr(response, "summary", ""):
+            metadata[SUMMARY_KEY] = response.summary
         # return the relevant links and page contents for use in crafting the post
         return {
             "relevant_links": [state.link],
-            "page_contents": [Document(page_content=url_contents.content)], 
+            # only a summary and the blob hash are checkpointed
+            "page_contents": offload_documents(
+                [Document(page_content=url_contents.content, metadata=metadata)],
+                config,
+            ),
             # TODO: include image urls
         }
     else:
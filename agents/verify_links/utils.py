@@ -2,8 +2,13 @@ from agents.verify_links.state import VerifySingleLinkState
 from agents.verify_links.configuration import VerifyLinksConfiguration
 from dataclasses import dataclass, field
 from pydantic import BaseModel, Field
-from langchain_community.document_loaders import FireCrawlLoader
-from agents.prompts import RELEVANCE_EVALUATION_SYSTEM_PROMPT
+from agents.prompts import (
+    RELEVANCE_EVALUATION_SYSTEM_PROMPT,
+    RELEVANCE_SUMMARY_EVALUATION_SYSTEM_PROMPT,
+    REPORT_CONTENT_RULES,
+)
+from agents.page_fetcher import fetch_page
+from agents.url_cache import cached_load
 from agents.utils import load_chat_model
 
 # TODO: consider moving these dataclasses to models.py
@@ -33,25 +38,27 @@ class RelevanceEvaluation(BaseModel):
         description = "Final verdict if the content is relevant to the topic."
     )
 
+class RelevanceSummaryEvaluation(RelevanceEvaluation):
+    """Schema for evaluating the relevance of a source and summarizing it for the report."""
+
+    summary: str = Field(
+        description = "Report-ready summary of the content if it is relevant, otherwise empty."
+    )
+
 async def get_url_contents(
     state: VerifySingleLinkState, config: VerifyLinksConfiguration
 ) -> UrlContents:
     """Get content from state.url"""
-    # TODO: add support for using other loaders defined in the configuration
-    loader = FireCrawlLoader(
-        url = state.link,
-        mode = "scrape",
-        params={
-            "formats": ["markdown", "screenshot"],
-        },
+    # pages are fetched directly where possible, falling back to FireCrawl
+    docs = await cached_load(
+        state.link, "page", lambda: fetch_page(state.link, config), config
     )
-    docs = await loader.aload()
     docsText = ""
     for doc in docs:
         docsText += doc.page_content + "\n"
     if docsText:
         return UrlContents(content=docsText, image_urls=[
-            url for doc in docs for url in (doc.metadata.get("image", []), doc.metadata.get("ogImage", [])) if url
+            url for doc in docs for url in (doc.metadata.get("image", []), doc.metadata.get("ogImage", []), *doc.metadata.get("images", [])) if url
         ])
     else:
         # TODO: attempt to retrieve content from other loaders
@@ -61,5 +68,9 @@ def get_relevance_eval_system_prompt(
     state: VerifySingleLinkState, config: VerifyLinksConfiguration
 ) -> str:
     """Get content rules."""
+    if config.summarize_relevant_links:
+        return RELEVANCE_SUMMARY_EVALUATION_SYSTEM_PROMPT.format(
+            topic=state.topic, content_rules=REPORT_CONTENT_RULES
+        )
     return RELEVANCE_EVALUATION_SYSTEM_PROMPT.format(topic=state.topic)
     
@@ -1,6 +1,6 @@
 """Main graph for the agent."""
 
-from typing import Annotated, List
+from typing import Annotated, List, Optional
 
 from langchain_community.agent_toolkits import PlayWrightBrowserToolkit
 from langchain_community.document_loaders import PlaywrightURLLoader
@@ -13,6 +13,8 @@ from langgraph.prebuilt import create_react_agent
 from playwright.async_api import async_playwright
 
 from agents.blog.schema import Section
+from agents.rate_limit import rate_limited_sync
+from agents.url_cache import cached_load
 from agents.utils import load_chat_model
 from agents.write_blog_section.configuration import BlogWriteSectionConfiguration
 from agents.write_blog_section.prompts import (
@@ -33,8 +35,12 @@ async def create_async_playwright_browser():
 
 
 # Create Playwright browser and toolkit
-async def initialize_browsing_tools():
-    """Initialize and return browsing tools for the agent."""
+async def initialize_browsing_tools(config: Optional[BlogWriteSectionConfiguration] = None):
+    """Initialize and return browsing tools for the agent.
+
+    Pages loaded with the custom URL loader are shared through the URL content cache
+    selected by the configuration.
+    """
     browser = await create_async_playwright_browser()
     toolkit = PlayWrightBrowserToolkit.from_browser(async_browser=browser)
 
@@ -43,9 +49,12 @@ async def initialize_browsing_tools():
         url: Annotated[str, "The URL to load"],
     ) -> List[Document]:
         """Load and extract text content from a specific URL."""
-        loader = PlaywrightURLLoader(urls=[url], remove_selectors=["header", "footer"])
-        documents = await loader.aload()
-        return documents
+
+        async def load() -> List[Document]:
+            loader = PlaywrightURLLoader(urls=[url], remove_selectors=["header", "footer"])
+            return await loader.aload()
+
+        return await cached_load(url, "playwright", load, config)
 
     # Combine Playwright tools with custom URL loader
     tools = toolkit.get_tools() + [custom_url_loader]
@@ -62,10 +71,18 @@ async def write_section(
     llm = load_chat_model(
         fully_specified_name=agent_config.default_model,
         model_kwargs=agent_config.default_model_kwargs,
+        config=agent_config,
     )
     system_prompt = build_section_writer_system_prompt(state, agent_config)
-    search_tool = TavilySearchResults(max_results=agent_config.max_results)
-    browsing_tools = await initialize_browsing_tools()
+    tavily = TavilySearchResults(max_results=agent_config.max_results)
+
+    @tool(tavily.name, description=tavily.description)
+    def search_tool(query: Annotated[str, "The search query"]) -> list:
+        """Search the web, sharing the process-wide tavily rate limit."""
+        with rate_limited_sync("tavily", agent_config):
+            return tavily.invoke(query)
+
+    browsing_tools = await initialize_browsing_tools(agent_config)
     tools = [search_tool] + browsing_tools
 
     # Create the React agent to write section content
@@ -10,14 +10,16 @@ from tavily import AsyncTavilyClient, TavilyClient
 from agents.blog.configuration import BlogConfiguration
 from agents.blog.schema import Section
 from agents.blog.state import BlogState
+from agents.rate_limit import rate_limited, rate_limited_sync
 
 
 @traceable
-def tavily_search(query):
+def tavily_search(query, config=None):
     """Search the web using the Tavily API.
 
     Args:
         query (str): The search query to execute
+        config: Configuration whose `rate_limits` apply to the search (defaults when omitted)
 
     Returns:
         dict: Tavily search response containing:
@@ -28,17 +30,19 @@ def tavily_search(query):
                 - raw_content (str): Full content of the page if available
     """
     tavily_client = TavilyClient()
-    return tavily_client.search(query, max_results=5, include_raw_content=True)
+    with rate_limited_sync("tavily", config):
+        return tavily_client.search(query, max_results=5, include_raw_content=True)
 
 
 @traceable
-async def tavily_search_async(search_queries, tavily_topic, tavily_days):
+async def tavily_search_async(search_queries, tavily_topic, tavily_days, config=None):
     """Perform concurrent web searches using the Tavily API.
 
     Args:
         search_queries (List[SearchQuery]): List of search queries to process
         tavily_topic (str): Type of search to perform ('news' or 'general')
         tavily_days (int): Number of days to look back for news articles (only used when tavily_topic='news')
+        config: Configuration whose `rate_limits` apply to the searches (defaults when omitted)
 
     Returns:
         List[dict]: List of search results from Tavily API, one per query
@@ -48,25 +52,23 @@ async def tavily_search_async(search_queries, tavily_topic, tavily_days):
         For general searches, the time range is unrestricted.
     """
     tavily_async_client = AsyncTavilyClient()
-    search_tasks = []
 
-    for query in search_queries:
-        if tavily_topic == "news":
-            search_tasks.append(
-                tavily_async_client.search(
+    async def search(query):
+        # concurrent searches share the process-wide tavily budget
+        async with rate_limited("tavily", config):
+            if tavily_topic == "news":
+                return await tavily_async_client.search(
                     query,
                     max_results=5,
                     include_raw_content=True,
                     topic="news",
                     days=tavily_days,
                 )
+            return await tavily_async_client.search(
+                query, max_results=5, include_raw_content=True, topic="general"
             )
-        else:
-            search_tasks.append(
-                tavily_async_client.search(
-                    query, max_results=5, include_raw_content=True, topic="general"
-                )
-            )
+
+    search_tasks = [search(query) for query in search_queries]
 
     # Execute all searches concurrently
     search_docs = await asyncio.gather(*search_tasks)
@@ -63,6 +63,23 @@ class BaseConfiguration:
         },
     )
 
+    llm_cache_enabled: bool = field(
+        default=False,
+        metadata={
+            "description": "Whether model responses should be replayed from the local response cache."
+        },
+    )
+    llm_cache_path: str = field(
+        default="~/.eminence-builder/backend-llm-cache.sqlite",
+        metadata={"description": "Location of the SQLite file backing the response cache."},
+    )
+    llm_cache_max_mb: int = field(
+        default=512,
+        metadata={
+            "description": "Size of the response cache in megabytes before the oldest responses are evicted."
+        },
+    )
+
     # for backwards compatibility
     k: int = field(
         default=6,
@@ -38,7 +38,7 @@ async def analyze_and_route_query(
         return {"router": state.router}
 
     configuration = AgentConfiguration.from_runnable_config(config)
-    model = load_chat_model(configuration.query_model)
+    model = load_chat_model(configuration.query_model, configuration)
     messages = [
         {"role": "system", "content": configuration.router_system_prompt}
     ] + state.messages
@@ -88,7 +88,7 @@ async def ask_for_more_info(
         dict[str, list[str]]: A dictionary with a 'messages' key containing the generated response.
     """
     configuration = AgentConfiguration.from_runnable_config(config)
-    model = load_chat_model(configuration.query_model)
+    model = load_chat_model(configuration.query_model, configuration)
     system_prompt = configuration.more_info_system_prompt.format(
         logic=state.router["logic"]
     )
@@ -112,7 +112,7 @@ async def respond_to_general_query(
         dict[str, list[str]]: A dictionary with a 'messages' key containing the generated response.
     """
     configuration = AgentConfiguration.from_runnable_config(config)
-    model = load_chat_model(configuration.query_model)
+    model = load_chat_model(configuration.query_model, configuration)
     system_prompt = configuration.general_system_prompt.format(
         logic=state.router["logic"]
     )
@@ -141,7 +141,7 @@ async def create_research_plan(
 
     configuration = AgentConfiguration.from_runnable_config(config)
     model = load_chat_model(
-        configuration.query_model).with_structured_output(Plan)
+        configuration.query_model, configuration).with_structured_output(Plan)
     messages = [
         {"role": "system", "content": configuration.research_plan_system_prompt.format(
             sub_topic_count=configuration.research_plan_subtopic_count,
@@ -249,7 +249,7 @@ async def write_blog(
         dict[str, list[str]]: A dictionary with a 'messages' key containing the generated response.
     """
     configuration = AgentConfiguration.from_runnable_config(config)
-    model = load_chat_model(configuration.blog_model)
+    model = load_chat_model(configuration.blog_model, configuration)
     # TODO: add a re-ranker here
     top_k = 20
     context = format_docs(state.documents[:top_k])
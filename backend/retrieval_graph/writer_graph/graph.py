@@ -39,7 +39,7 @@ async def generate_queries(
 
     configuration = AgentConfiguration.from_runnable_config(config)
     model = load_chat_model(
-        configuration.query_model).with_structured_output(Response)
+        configuration.query_model, configuration).with_structured_output(Response)
     messages = [
         {"role": "system", "content": configuration.generate_queries_system_prompt.format(
             max_count=configuration.generate_queries_count)},
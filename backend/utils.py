@@ -1,16 +1,28 @@
 """Shared utility functions used in the project.
 
+Classes:
+    BoundedSQLiteCache: SQLite response cache that drops its oldest responses beyond a size limit.
+
 Functions:
     format_docs: Convert documents to an xml-formatted string.
     load_chat_model: Load a chat model from a model name.
 """
 
+import os
+import threading
 import uuid
 from typing import Any, Literal, Optional, Union
 
 from langchain.chat_models import init_chat_model
+from langchain_community.cache import SQLiteCache
 from langchain_core.documents import Document
 from langchain_core.language_models import BaseChatModel
+from sqlalchemy import text
+
+from backend.configuration import BaseConfiguration
+
+_response_caches: dict[str, "BoundedSQLiteCache"] = {}
+_response_caches_lock = threading.Lock()
 
 
 def _format_doc(doc: Document) -> str:
@@ -64,11 +76,15 @@ def format_docs(docs: Optional[list[Document]]) -> str:
 </documents>"""
 
 
-def load_chat_model(fully_specified_name: str) -> BaseChatModel:
+def load_chat_model(
+    fully_specified_name: str, configuration: Optional[BaseConfiguration] = None
+) -> BaseChatModel:
     """Load a chat model from a fully specified name.
 
     Args:
         fully_specified_name (str): String in the format 'provider/model'.
+        configuration (Optional[BaseConfiguration]): Configuration of the calling graph.
+            Used to enable the local response cache.
     """
     if "/" in fully_specified_name:
         provider, model = fully_specified_name.split("/", maxsplit=1)
@@ -79,9 +95,70 @@ def load_chat_model(fully_specified_name: str) -> BaseChatModel:
     model_kwargs = {"temperature": 0}
     if provider == "google_genai":
         model_kwargs["convert_system_message_to_human"] = True
+    if configuration is not None and configuration.llm_cache_enabled:
+        model_kwargs["cache"] = _get_response_cache(
+            configuration.llm_cache_path, configuration.llm_cache_max_mb * 1024 * 1024
+        )
     return init_chat_model(model, model_provider=provider, **model_kwargs)
 
 
+class BoundedSQLiteCache(SQLiteCache):
+    """SQLite response cache that drops its oldest responses beyond a size limit.
+
+    When the stored responses exceed `max_bytes`, the earliest written ones are
+    deleted until the cache is back under `low_water_ratio` of the limit.
+    """
+
+    def __init__(
+        self, database_path: str, max_bytes: int, low_water_ratio: float = 0.9
+    ):
+        """Open (or create) the cache database at the given path."""
+        super().__init__(database_path=database_path)
+        self.max_bytes = max_bytes
+        self.low_water_ratio = low_water_ratio
+
+    def update(self, prompt: str, llm_string: str, return_val: Any) -> None:
+        """Store a response, evicting the oldest ones if the cache is full."""
+        super().update(prompt, llm_string, return_val)
+        self._evict()
+
+    def _evict(self) -> None:
+        table = self.cache_schema.__tablename__
+        size = "LENGTH(CAST(response AS BLOB))"
+        with self.engine.begin() as conn:
+            total = conn.execute(
+                text(f"SELECT COALESCE(SUM({size}), 0) FROM {table}")
+            ).scalar()
+            if total <= self.max_bytes:
+                return
+            target = int(self.max_bytes * self.low_water_ratio)
+            cutoff = None
+            for rowid, row_size in conn.execute(
+                text(f"SELECT rowid, {size} FROM {table} ORDER BY rowid")
+            ):
+                if total <= target:
+                    break
+                total -= row_size or 0
+                cutoff = rowid
+            if cutoff is not None:
+                conn.execute(
+                    text(f"DELETE FROM {table} WHERE rowid <= :cutoff"),
+                    {"cutoff": cutoff},
+                )
+
+
+def _get_response_cache(path: str, max_bytes: int) -> BoundedSQLiteCache:
+    """Return the response cache stored at a path, shared by every graph in the process."""
+    path = os.path.expanduser(path)
+    with _response_caches_lock:
+        if path not in _response_caches:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            _response_caches[path] = BoundedSQLiteCache(path, max_bytes=max_bytes)
+        return _response_caches[path]
+
+
 def reduce_docs(
     existing: Optional[list[Document]],
     new: Union[
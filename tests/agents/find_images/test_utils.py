@@ -1,6 +1,10 @@
+import asyncio
 import pytest
 from datetime import datetime
+from types import SimpleNamespace
+from agents.find_images import utils
 from agents.find_images.utils import *
+from agents.image_probe import ImageInfo
 
 # @pytest.fixture
 # def state():
@@ -52,4 +56,27 @@ def test_parse_validate_images_response():
     assert parse_validate_images_response(response) == []
 
     response = "No relevant indices here"
-    assert parse_validate_images_response(response) == []
\ No newline at end of file
+    assert parse_validate_images_response(response) == []
+
+def test_filter_usable_images_probes_original_urls(monkeypatch):
+    signed = "https://cdn.example.com/photo?signature=abc"
+    typed = "https://cdn.example.com/chart.png?w=800"
+    infos = {
+        signed: ImageInfo(url=signed, ok=True, mime_type="image/jpeg", width=800, height=600),
+        # no Content-Type, so the type is guessed from the path
+        typed: ImageInfo(url=typed, ok=True),
+        "https://cdn.example.com/icon.svg": ImageInfo(url="https://cdn.example.com/icon.svg", ok=True),
+        "https://cdn.example.com/gone.png": ImageInfo(url="https://cdn.example.com/gone.png", ok=False),
+    }
+    probed = []
+
+    class FakeProbe:
+        async def probe_many(self, urls):
+            probed.extend(urls)
+            return {url: infos[url] for url in urls}
+
+    monkeypatch.setattr(utils, "get_image_probe", lambda config: FakeProbe())
+    config = SimpleNamespace(min_image_dimension=100)
+    usable = asyncio.run(filter_usable_images(list(infos) + [signed], config))
+    assert probed == list(infos)
+    assert usable == [signed, typed]
@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+
+from agents.generate_post.batch_runner import load_requests, run_request
+from agents.generate_post.graph import route_post_request
+from agents.generate_post.state import GeneratePostState
+
+
+class FakeClient:
+    def __init__(self, state=None, error=None):
+        self.inputs = []
+        self.state = state or {}
+        self.error = error
+        self.threads = self
+        self.runs = self
+
+    async def create(self, metadata):
+        return {"thread_id": "thread-1"}
+
+    async def wait(self, thread_id, assistant_id, input, config):
+        self.inputs.append(input)
+        if self.error:
+            raise self.error
+
+    async def get_state(self, thread_id):
+        return self.state
+
+
+def test_load_requests(tmp_path):
+    path = tmp_path / "posts.jsonl"
+    request = {"topic": "AI", "links": ["https://example.com/a"], "style": "news"}
+    path.write_text(json.dumps(request) + "\n\n" + json.dumps({"links": ["b"]}) + "\n")
+    assert load_requests(str(path)) == [request, {"links": ["b"]}]
+
+    path.write_text(json.dumps({"topic": "AI"}) + "\n")
+    with pytest.raises(ValueError, match="line 1 has no links"):
+        load_requests(str(path))
+    path.write_text(json.dumps({"links": ["a"], "tone": "dry"}) + "\n")
+    with pytest.raises(ValueError, match="unknown fields"):
+        load_requests(str(path))
+
+
+def test_run_request_sends_request_as_message():
+    state = {
+        "values": {"post": "A post", "relevant_links": ["https://example.com/a"]},
+        "tasks": [{"interrupts": [{"value": {"action_request": "review"}}]}],
+    }
+    client = FakeClient(state=state)
+    request = {"topic": "AI", "links": ["https://example.com/a"], "commentary": "Big news"}
+    result = asyncio.run(
+        run_request(client, "generate_post", request, {}, asyncio.Semaphore(1), "batch-1")
+    )
+
+    [sent] = client.inputs
+    assert sent["topic"] == "AI" and sent["links"] == request["links"]
+    [message] = sent["messages"]
+    assert message["role"] == "user"
+    assert "AI" in message["content"] and "https://example.com/a" in message["content"]
+    assert result["status"] == "review"
+    assert result["post"] == "A post"
+    assert result["interrupts"] == [{"action_request": "review"}]
+
+
+def test_run_request_reports_errors():
+    client = FakeClient(error=RuntimeError("server down"))
+    result = asyncio.run(
+        run_request(
+            client, "generate_post", {"links": ["a"]}, {}, asyncio.Semaphore(1), "batch-1"
+        )
+    )
+    assert result["status"] == "error"
+    assert result["error"] == "server down"
+
+
+def test_structured_requests_skip_parsing():
+    structured = GeneratePostState(topic="AI", links=["a"])
+    assert route_post_request(structured, {}) == "verify_links"
+    assert route_post_request(GeneratePostState(links=["a"]), {}) == "parse_post_request"
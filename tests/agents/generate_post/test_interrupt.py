@@ -0,0 +1,46 @@
+import pytest
+
+from agents.generate_post.interrupt import route_locally
+
+
+@pytest.mark.parametrize(
+    "user_response",
+    [
+        "p1",
+        " P2 ",
+        "priority 3",
+        "12/25/2024 10:00 AM PST",
+        "Please schedule it for 12/25/2024 10:00 AM PST",
+        "change the date to p3",
+        "move it to tomorrow",
+    ],
+)
+def test_route_locally_update_date(user_response):
+    assert route_locally(user_response) == "update_date"
+
+
+@pytest.mark.parametrize(
+    "user_response",
+    [
+        "Rewrite the intro to be punchier",
+        "remove the hashtags",
+        "Make it shorter and drop the emojis.",
+        "change the tone to be more formal",
+    ],
+)
+def test_route_locally_rewrite_post(user_response):
+    assert route_locally(user_response) == "rewrite_post"
+
+
+@pytest.mark.parametrize(
+    "user_response",
+    [
+        "",
+        "hmm",
+        "can you post this on Monday?",
+        "add a line about the time savings",
+        "looks good to me",
+    ],
+)
+def test_route_locally_ambiguous(user_response):
+    assert route_locally(user_response) is None
@@ -0,0 +1,52 @@
+from agents.generate_post.length import (
+    collapse_emoji,
+    enforce_post_length,
+    post_length,
+    trim_hashtags,
+)
+
+POST = """🚨🔥 AI Meets Nuclear Security
+
+OpenAI partnered with the U.S. labs https://example.com/article#details
+
+- Faster research (for now).
+- Better security!
+
+What do you think? 👇👇👇
+
+#AI #Security #OpenAI #FutureOfAI #TechForGood"""
+
+
+def test_post_length_ignores_urls_and_whitespace():
+    assert post_length("Read  this\n\nhttps://example.com/a now") == len("Read this now")
+
+
+def test_collapse_emoji():
+    assert collapse_emoji("Wow 🔥🔥 🔥 done 👍🏽👍🏽") == "Wow 🔥 done 👍🏽"
+
+
+def test_trim_hashtags_keeps_url_fragments_and_two_hashtags():
+    trimmed = trim_hashtags(POST, 0)
+    assert trimmed.endswith("#AI #Security")
+    assert "https://example.com/article#details" in trimmed
+
+
+def test_trim_hashtags_only_trims_the_trailing_block():
+    post = "Why #AI matters for #Security teams.\n\n#OpenAI #FutureOfAI #TechForGood"
+    assert trim_hashtags(post, 0) == "Why #AI matters for #Security teams.\n\n#OpenAI #FutureOfAI"
+    # a post without a trailing block is left as it is
+    assert trim_hashtags("Why #AI #ML #Data matters.", 0) == "Why #AI #ML #Data matters."
+
+
+def test_enforce_post_length_trims_small_overages():
+    limit = post_length(POST) - 20
+    result = enforce_post_length(POST, limit, max_overage=50)
+    assert result.length <= limit
+    assert result.steps[0] == "collapse_emoji"
+
+
+def test_enforce_post_length_leaves_large_overages_to_the_model():
+    limit = post_length(POST) - 100
+    result = enforce_post_length(POST, limit, max_overage=50)
+    assert result.steps == []
+    assert result.length == post_length(POST)
@@ -0,0 +1,70 @@
+import asyncio
+
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage
+
+from agents.generate_post import graph
+from agents.generate_post.state import GeneratePostState
+
+
+class FakeChatModel:
+    """Answers summary requests with a short summary and records every call."""
+
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+
+    async def ainvoke(self, messages):
+        self.calls.append((self.name, messages))
+        if self.name == "summary":
+            page = messages[-1].content
+            source = "first" if "first page" in page else "second"
+            return AIMessage(f"<summary>Summary of the {source} page.</summary>")
+        return AIMessage("<report>The report.</report>")
+
+
+def run_generate_report(monkeypatch, tmp_path, map_reduce_tokens):
+    calls = []
+    monkeypatch.setattr(
+        graph,
+        "load_chat_model",
+        lambda name, config=None: FakeChatModel(
+            "summary" if name == "test/summary" else "report", calls
+        ),
+    )
+    state = GeneratePostState(
+        topic="AI",
+        page_contents=[
+            Document(page_content="first page " * 400, metadata={"source": "https://a"}),
+            Document(page_content="second page " * 400, metadata={"source": "https://b"}),
+        ],
+    )
+    config = {
+        "configurable": {
+            "report_model": "test/report",
+            "report_summary_model": "test/summary",
+            "report_map_reduce_tokens": map_reduce_tokens,
+            "blob_store_dir": str(tmp_path),
+        }
+    }
+    result = asyncio.run(graph.generate_report(state, config=config))
+    assert result == {"report": "The report."}
+    return calls
+
+
+def test_small_inputs_are_reported_directly(monkeypatch, tmp_path):
+    calls = run_generate_report(monkeypatch, tmp_path, map_reduce_tokens=100_000)
+    [(name, messages)] = calls
+    assert name == "report"
+    assert "first page first page" in messages[-1].content
+
+
+def test_large_inputs_are_reported_from_summaries(monkeypatch, tmp_path):
+    calls = run_generate_report(monkeypatch, tmp_path, map_reduce_tokens=1_000)
+    assert [name for name, _ in calls] == ["summary", "summary", "report"]
+    # each page is summarized on its own
+    assert "second page" not in calls[0][1][-1].content
+    report_input = calls[-1][1][-1].content
+    assert "Summary of the first page." in report_input
+    assert "Summary of the second page." in report_input
+    assert "first page first page" not in report_input
@@ -0,0 +1,44 @@
+from agents.generate_post.scoring import rank_posts, score_post
+
+LINKS = ["https://www.example.com/article"]
+RULES = ["Don't use the word 'game-changer'", "Avoid emojis", "Keep it short"]
+
+
+def test_score_post_checks_length_links_and_rules():
+    assert score_post("Read https://www.example.com/article", 100, RULES, LINKS).failed == []
+    score = score_post("A game-changer 🚀 " * 20, 100, RULES, LINKS)
+    assert score.failed == [
+        "length",
+        "links",
+        "rule: Don't use the word 'game-changer'",
+        "rule: Avoid emojis",
+    ]
+
+
+def test_rules_with_apostrophes_do_not_match_stray_phrases():
+    assert score_post("We don't use hype", 100, ["Don't use 'hype words'"], []).failed == []
+
+
+def test_only_outright_bans_are_checked():
+    post = "Big news! #AI #ML #Data example.com"
+    rules = [
+        "Use no more than 3 hashtags",
+        "Never use more than two hashtags",
+        "No fluff, keep exclamation marks rare",
+        "Write without hype",
+    ]
+    assert score_post(post, 100, rules, []).failed == []
+    bans = ["Never use hashtags", "Avoid exclamation marks"]
+    assert score_post(post, 100, bans, []).failed == [
+        "rule: Never use hashtags",
+        "rule: Avoid exclamation marks",
+    ]
+    assert score_post("Top 10 tips", 100, ["Never say 'top 10'"], []).failed == [
+        "rule: Never say 'top 10'"
+    ]
+
+
+def test_rank_posts_orders_best_first_and_keeps_ties_stable():
+    posts = ["First 🚀 example.com", "Second example.com", "Third example.com"]
+    ranked = [post for post, _ in rank_posts(posts, 100, RULES, LINKS)]
+    assert ranked == ["Second example.com", "Third example.com", "First 🚀 example.com"]
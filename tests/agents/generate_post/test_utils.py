@@ -40,3 +40,14 @@ def test_build_condense_post_system_prompt(state, config, mock_store):
     assert "100" in prompt
     assert "https://www.google.com" in prompt
     assert "https://www.yahoo.com" in prompt
+
+def test_use_page_summaries():
+    from langchain_core.documents import Document
+
+    docs = use_page_summaries([
+        Document(page_content="Short summary …", metadata={"source": "https://a.com", "summary": "Report-ready summary", "blob": "abc", "blob_chars": 5000}),
+        Document(page_content="Full page", metadata={"source": "https://b.com"}),
+    ])
+    assert docs[0].page_content == "Report-ready summary"
+    assert docs[0].metadata == {"source": "https://a.com"}
+    assert docs[1].page_content == "Full page"
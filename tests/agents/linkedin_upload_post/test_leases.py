@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from agents.linkedin_upload_post import utils
+from agents.linkedin_upload_post.configuration import LinkedInUploadPostConfiguration
+from agents.linkedin_upload_post.utils import (
+    claim_next_pending_post,
+    release_post,
+    renew_lease,
+)
+
+
+def matches(document, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(document, option) for option in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = document.get(key)
+            for operator, operand in condition.items():
+                if operator == "$exists" and (key in document) != operand:
+                    return False
+                if operator == "$lt" and not (key in document and value < operand):
+                    return False
+                if operator == "$lte" and not (key in document and value <= operand):
+                    return False
+        elif document.get(key) != condition:
+            return False
+    return True
+
+
+class FakeCollection:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def create_index(self, keys, name):
+        pass
+
+    def _update(self, document, update):
+        document.update(update.get("$set", {}))
+        for key, amount in update.get("$inc", {}).items():
+            document[key] = document.get(key, 0) + amount
+        for key in update.get("$unset", {}):
+            document.pop(key, None)
+
+    def find_one_and_update(self, query, update, projection, sort, return_document):
+        [(field, _)] = sort
+        candidates = sorted(
+            (doc for doc in self.documents if matches(doc, query)), key=lambda doc: doc[field]
+        )
+        if not candidates:
+            return None
+        self._update(candidates[0], update)
+        return dict(candidates[0])
+
+    def update_one(self, query, update):
+        for document in self.documents:
+            if matches(document, query):
+                self._update(document, update)
+                return SimpleNamespace(modified_count=1)
+        return SimpleNamespace(modified_count=0)
+
+
+@pytest.fixture
+def config():
+    return LinkedInUploadPostConfiguration(lease_seconds=60)
+
+
+def use_posts(monkeypatch, posts):
+    collection = FakeCollection(posts)
+    monkeypatch.setattr(utils, "load_linkedin_posts_collection", lambda config: collection)
+    return collection
+
+
+def test_claim_takes_due_posts_earliest_first(monkeypatch, config):
+    now = datetime.now()
+    posts = [
+        {"_id": "later", "status": "pending", "scheduled_date": now - timedelta(minutes=1)},
+        {"_id": "future", "status": "pending", "scheduled_date": now + timedelta(hours=1)},
+        {"_id": "earliest", "status": "pending", "scheduled_date": now - timedelta(hours=1)},
+    ]
+    use_posts(monkeypatch, posts)
+
+    first = claim_next_pending_post(config, "worker-a")
+    assert first["_id"] == "earliest"
+    assert first["status"] == "queued" and first["worker_id"] == "worker-a"
+    assert first["lease_expires"] > now
+    assert claim_next_pending_post(config, "worker-b")["_id"] == "later"
+    assert claim_next_pending_post(config, "worker-c") is None
+
+
+def test_claim_reclaims_expired_and_legacy_leases(monkeypatch, config):
+    now = datetime.now()
+    due = now - timedelta(hours=1)
+    posts = [
+        {
+            "_id": "held",
+            "status": "queued",
+            "scheduled_date": due - timedelta(hours=2),
+            "worker_id": "worker-a",
+            "lease_expires": now + timedelta(minutes=5),
+        },
+        {
+            "_id": "expired",
+            "status": "queued",
+            "scheduled_date": due - timedelta(hours=1),
+            "worker_id": "worker-a",
+            "lease_expires": now - timedelta(minutes=5),
+            "claim_count": 1,
+        },
+        # queued before leases existed
+        {"_id": "legacy", "status": "queued", "scheduled_date": due},
+    ]
+    use_posts(monkeypatch, posts)
+
+    expired = claim_next_pending_post(config, "worker-b")
+    assert expired["_id"] == "expired" and expired["worker_id"] == "worker-b"
+    assert posts[1]["claim_count"] == 2
+    legacy = claim_next_pending_post(config, "worker-b")
+    assert legacy["_id"] == "legacy" and "lease_expires" in posts[2]
+    assert claim_next_pending_post(config, "worker-b") is None
+
+
+def test_renew_and_release_require_the_claim(monkeypatch, config):
+    now = datetime.now()
+    posts = [{"_id": 1, "status": "pending", "scheduled_date": now - timedelta(hours=1)}]
+    use_posts(monkeypatch, posts)
+    post = claim_next_pending_post(config, "worker-a")
+
+    posts[0]["lease_expires"] = now
+    assert renew_lease(config, post)
+    assert posts[0]["lease_expires"] > now + timedelta(seconds=30)
+    assert not renew_lease(config, {**post, "worker_id": "worker-b"})
+
+    assert not release_post(config, {**post, "worker_id": "worker-b"}, "posted")
+    assert release_post(config, post, "posted", posted_date=now)
+    assert posts[0]["status"] == "posted" and posts[0]["posted_date"] == now
+    assert "worker_id" not in posts[0] and "lease_expires" not in posts[0]
+    # once released the post can no longer be renewed or released again
+    assert not renew_lease(config, post)
+    assert not release_post(config, post, "failed")
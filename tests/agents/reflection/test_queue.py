@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from agents.reflection import queue
+from agents.reflection.configuration import ReflectionConfiguration
+from agents.reflection.queue import ReflectionQueue
+from agents.reflection.state import ReflectionState
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the reflection workers")
+        time.sleep(0.01)
+
+
+def edit(revised_text, post_style="default"):
+    return ReflectionState(
+        original_text="original", revised_text=revised_text, post_style=post_style
+    )
+
+
+@pytest.fixture
+def updates(monkeypatch):
+    monkeypatch.setattr(queue, "IDLE_POLL_SECONDS", 0.05)
+    monkeypatch.setattr(queue, "RETRY_BACKOFF_SECONDS", 0.0)
+    updates = []
+    monkeypatch.setattr(
+        queue,
+        "update_ruleset",
+        lambda state, config: updates.append((state.post_style, state.new_rules)),
+    )
+    return updates
+
+
+def test_jobs_of_one_style_are_coalesced(tmp_path, monkeypatch, updates):
+    started = threading.Event()
+    release = threading.Event()
+
+    def identify_new_rules(state, config):
+        if state.revised_text == "first":
+            started.set()
+            release.wait(5)
+        return {"new_rules": [f"rule from {state.revised_text}"]}
+
+    monkeypatch.setattr(queue, "identify_new_rules", identify_new_rules)
+    reflection_queue = ReflectionQueue(
+        str(tmp_path / "queue.sqlite"), ReflectionConfiguration(), workers=2
+    )
+
+    reflection_queue.enqueue(edit("first"))
+    assert started.wait(5)
+    # queued while the first default job runs; the idle worker may only take news
+    reflection_queue.enqueue(edit("second"))
+    reflection_queue.enqueue(edit("third"))
+    reflection_queue.enqueue(edit("news", post_style="news"))
+    wait_for(lambda: ("news", ["rule from news"]) in updates)
+    assert not any(style == "default" for style, _ in updates)
+
+    release.set()
+    wait_for(lambda: len(updates) == 3)
+    assert [rules for style, rules in updates if style == "default"] == [
+        ["rule from first"],
+        ["rule from second", "rule from third"],
+    ]
+    assert reflection_queue.stats() == {"queued": 0, "running": 0, "failed": 0}
+
+
+def test_failed_jobs_are_retried_then_failed(tmp_path, monkeypatch, updates):
+    attempts = {}
+
+    def identify_new_rules(state, config):
+        attempts[state.post_style] = attempts.get(state.post_style, 0) + 1
+        if state.post_style == "broken" or attempts[state.post_style] == 1:
+            raise RuntimeError("model unavailable")
+        return {"new_rules": ["a rule"]}
+
+    monkeypatch.setattr(queue, "identify_new_rules", identify_new_rules)
+    reflection_queue = ReflectionQueue(
+        str(tmp_path / "queue.sqlite"), ReflectionConfiguration(), workers=1
+    )
+
+    reflection_queue.enqueue(edit("flaky", post_style="flaky"))
+    reflection_queue.enqueue(edit("broken", post_style="broken"))
+    wait_for(
+        lambda: reflection_queue.stats() == {"queued": 0, "running": 0, "failed": 1}
+    )
+
+    # the flaky job succeeded on its second attempt, the broken one gave up
+    assert attempts == {"flaky": 2, "broken": queue.MAX_ATTEMPTS}
+    assert updates == [("flaky", ["a rule"])]
+    [(error,)] = reflection_queue._conn.execute(
+        "SELECT error FROM jobs WHERE status = 'failed'"
+    ).fetchall()
+    assert "model unavailable" in error
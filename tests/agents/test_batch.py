@@ -0,0 +1,106 @@
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_openai import ChatOpenAI
+from openai import OpenAI
+
+from agents.batch import poller, server
+from agents.batch.utils import (
+    BatchLedger,
+    batch_body,
+    invoke_chat_models,
+    message_from_result,
+)
+
+STANDIN_URL = "http://testserver/v1"
+
+
+@pytest.fixture
+def standin_client(monkeypatch):
+    monkeypatch.setattr(server, "COMPLETION_DELAY_SECONDS", 0)
+    return OpenAI(base_url=STANDIN_URL, api_key="stand-in", http_client=TestClient(server.app))
+
+
+def test_ledger_round_trip_through_standin_server(tmp_path, standin_client, monkeypatch):
+    ledger = BatchLedger(str(tmp_path / "batch.sqlite"))
+    body = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hello"}]}
+    ledger.enqueue("thread:node:0", body, STANDIN_URL)
+    ledger.enqueue("thread:node:1", body, "")
+    ledger.add_wait("thread", "generate_post", ["thread:node:0"])
+
+    poller.submit_queued(ledger, standin_client, STANDIN_URL)
+    # the request queued for OpenAI is left for a poller talking to OpenAI
+    assert [custom_id for custom_id, _ in ledger.queued("")] == ["thread:node:1"]
+    assert ledger.queued(STANDIN_URL) == []
+
+    poller.collect_results(ledger, standin_client)
+    assert ledger.submitted_batches() == []
+
+    resumed = []
+
+    class FakeRuns:
+        async def create(self, thread_id, assistant_id, command):
+            resumed.append((thread_id, assistant_id, command))
+
+    monkeypatch.setattr(poller, "get_client", lambda url: SimpleNamespace(runs=FakeRuns()))
+    asyncio.run(poller.resume_ready(ledger, "http://langgraph"))
+    [(thread_id, assistant_id, command)] = resumed
+    assert (thread_id, assistant_id) == ("thread", "generate_post")
+    assert message_from_result(command["resume"][0]).content == "hello"
+    assert ledger.ready_waits() == []
+
+
+def test_ledger_adds_api_url_to_old_ledgers(tmp_path):
+    path = str(tmp_path / "batch.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE requests (custom_id TEXT PRIMARY KEY, body TEXT NOT NULL, status TEXT NOT NULL, batch_id TEXT, result TEXT, created REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO requests VALUES ('old', '{}', 'queued', NULL, NULL, 0)")
+    conn.commit()
+    conn.close()
+    assert BatchLedger(path).queued() == [("old", {})]
+
+
+def test_batch_body_keeps_bound_arguments():
+    tool = {
+        "type": "function",
+        "function": {"name": "lookup", "parameters": {"type": "object", "properties": {}}},
+    }
+    model = ChatOpenAI(model="gpt-4o-mini", api_key="test", temperature=0.3)
+    body = batch_body(
+        model.bind_tools([tool], tool_choice="required"),
+        "openai/gpt-4o-mini",
+        [SystemMessage("system"), HumanMessage("hi")],
+    )
+    assert body["tools"] == [tool]
+    assert body["tool_choice"] == "required"
+    assert body["temperature"] == 0.3
+    assert "stream" not in body
+    assert body["messages"][-1] == {"role": "user", "content": "hi"}
+
+
+def test_batch_body_refuses_bound_arguments_of_other_providers():
+    model = FakeListChatModel(responses=["ok"])
+    assert batch_body(model, "acme/model", [HumanMessage("hi")])["model"] == "model"
+    assert batch_body(model.bind(stop=["x"]), "acme/model", [HumanMessage("hi")]) is None
+
+
+@pytest.mark.asyncio
+async def test_unserved_providers_are_called_directly(tmp_path):
+    config = SimpleNamespace(
+        batch_mode=True,
+        batch_api_url="",
+        batch_providers=["openai", "acme"],
+        batch_ledger_path=str(tmp_path / "batch.sqlite"),
+    )
+    model = FakeListChatModel(responses=["direct"])
+    # acme is listed, but OpenAI does not serve it
+    [response] = await invoke_chat_models(model, "acme/model", [[HumanMessage("hi")]], config)
+    assert response.content == "direct"
+    assert BatchLedger(config.batch_ledger_path).queued() == []
@@ -0,0 +1,38 @@
+import asyncio
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+
+from agents.blob_store import (
+    BLOB_KEY,
+    PREVIEW_CHARS,
+    SUMMARY_KEY,
+    aload_documents,
+    load_documents,
+    offload_documents,
+)
+
+
+def test_offloaded_documents_load_back_unchanged(tmp_path):
+    config = SimpleNamespace(blob_store_dir=str(tmp_path), blob_min_chars=100)
+    docs = [
+        Document(page_content="word " * 300, metadata={"source": "https://a"}),
+        Document(
+            page_content="line\n" * 300,
+            metadata={"source": "https://b", SUMMARY_KEY: "A page about lines."},
+        ),
+        Document(page_content="short", metadata={"source": "https://c"}),
+    ]
+
+    offloaded = offload_documents(docs, config)
+    assert [BLOB_KEY in doc.metadata for doc in offloaded] == [True, True, False]
+    # a preview of the text, or the summary when the page has one
+    assert offloaded[0].page_content.endswith(" …")
+    assert len(offloaded[0].page_content) <= PREVIEW_CHARS + 2
+    assert offloaded[1].page_content == "A page about lines."
+    assert offloaded[2] == docs[2]
+    # offloading again neither rewrites blobs nor changes the documents
+    assert offload_documents(offloaded, config) == offloaded
+
+    assert load_documents(offloaded, config) == docs
+    assert asyncio.run(aload_documents(offloaded, config)) == docs
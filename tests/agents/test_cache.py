@@ -0,0 +1,49 @@
+import time
+
+from langchain_core.load import dumps
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from agents.cache import DiskCache, response_cache_key
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), max_bytes=350)
+    cache.put("a", b"x" * 100)
+    time.sleep(0.01)
+    cache.put("b", b"x" * 100)
+    time.sleep(0.01)
+    # reading a makes b the least recently used entry
+    assert cache.get("a") == b"x" * 100
+    time.sleep(0.01)
+    cache.put("c", b"x" * 100)
+    time.sleep(0.01)
+    cache.put("d", b"x" * 100)
+
+    # evicting b alone brings the cache under its low-water mark
+    assert cache.get("b") is None
+    assert all(cache.get(key) == b"x" * 100 for key in ("a", "c", "d"))
+    assert cache.size() == 300
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), max_bytes=1000, ttl_seconds=0.01)
+    cache.put("a", b"value")
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.hit_rate() == 0.0
+
+
+def test_cache_key_ignores_ids_but_not_whitespace():
+    def key(*messages):
+        return response_cache_key(dumps(list(messages)), "llm")
+
+    base = key(SystemMessage("Rules"), HumanMessage("Write a post."))
+    assert base == key(
+        SystemMessage("Rules", id="run-1"),
+        HumanMessage("Write a post.", id="run-2", response_metadata={"run": 2}),
+    )
+    assert base != key(SystemMessage("Rules"), HumanMessage("Write a post. "))
+    assert base != key(SystemMessage("Rules\n"), HumanMessage("Write a post."))
+    assert base != response_cache_key(
+        dumps([SystemMessage("Rules"), HumanMessage("Write a post.")]), "other llm"
+    )
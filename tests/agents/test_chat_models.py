@@ -0,0 +1,190 @@
+import asyncio
+from typing import Optional
+
+import pytest
+from langchain_core.language_models import BaseChatModel, GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableBinding
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from agents.chat_models import (
+    HEDGE_WINS_TOTAL,
+    HEDGES_TOTAL,
+    HedgedChatModel,
+    RateLimitedChatModel,
+)
+from agents.instrumentation import (
+    LLM_ERRORS_TOTAL,
+    LLM_LATENCY_SECONDS,
+    LLMMetricsHandler,
+)
+from agents.rate_limit import ProviderLimiter
+
+
+class Answer(BaseModel):
+    text: str
+
+
+def test_structured_output_keeps_provider_method():
+    model = ChatOpenAI(model="gpt-4o-mini", api_key="test")
+    wrapped = RateLimitedChatModel(chat_model=model, limiter=ProviderLimiter("openai"))
+
+    binding = wrapped.with_structured_output(Answer).first
+    assert isinstance(binding, RunnableBinding)
+    assert binding.bound is wrapped
+    assert "response_format" in binding.kwargs and "tools" not in binding.kwargs
+
+    raw = wrapped.with_structured_output(Answer, include_raw=True).first
+    assert raw.steps__["raw"].bound is wrapped
+
+
+def test_streaming_is_delegated_inside_a_slot():
+    limiter = ProviderLimiter("acme", max_in_flight=1)
+    model = GenericFakeChatModel(messages=iter([AIMessage("hello streaming world")]))
+    wrapped = RateLimitedChatModel(chat_model=model, limiter=limiter)
+
+    async def run():
+        chunks = []
+        async for chunk in wrapped.astream("hi"):
+            chunks.append(chunk.content)
+            assert limiter.in_flight == 1
+        return chunks
+
+    chunks = asyncio.run(run())
+    assert len(chunks) > 1
+    assert "".join(chunks) == "hello streaming world"
+    assert limiter.in_flight == 0
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class FakeModel(BaseChatModel):
+    answer: str
+    delay: float = 0.0
+    error: Optional[Exception] = None
+    cancelled: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.error:
+            raise self.error
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(self.answer))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self._generate(messages)
+
+
+def hedge(node, primary, secondary, hedge_after_seconds=None):
+    for name, model in (("primary", primary), ("secondary", secondary)):
+        model.callbacks = [LLMMetricsHandler(f"acme/{node}-{name}")]
+    return HedgedChatModel(
+        primary=primary,
+        secondary=secondary,
+        primary_name="acme/primary",
+        secondary_name="acme/secondary",
+        node=node,
+        hedge_after_seconds=hedge_after_seconds,
+    )
+
+
+def counts(node):
+    hedges = {
+        reason: HEDGES_TOTAL.value(
+            node=node, primary="acme/primary", secondary="acme/secondary", reason=reason
+        )
+        for reason in ("latency", "error")
+    }
+    wins = {
+        winner: HEDGE_WINS_TOTAL.value(node=node, winner=winner)
+        for winner in ("primary", "secondary")
+    }
+    errors = {
+        name: LLM_ERRORS_TOTAL.value(node=node, model=f"acme/{node}-{name}")
+        for name in ("primary", "secondary")
+    }
+    return hedges, wins, errors
+
+
+def run_hedged(model, node):
+    async def run():
+        message = await model.ainvoke("hi", config={"metadata": {"langgraph_node": node}})
+        # let the cancelled loser finish unwinding
+        await asyncio.sleep(0.05)
+        return message
+
+    return asyncio.run(run())
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    primary = FakeModel(answer="primary", delay=5)
+    secondary = FakeModel(answer="secondary", delay=0.01)
+    model = hedge("hedge_latency", primary, secondary, hedge_after_seconds=0.05)
+
+    assert run_hedged(model, "hedge_latency").content == "secondary"
+    assert primary.cancelled
+    hedges, wins, errors = counts("hedge_latency")
+    assert hedges == {"latency": 1, "error": 0}
+    assert wins == {"primary": 0, "secondary": 1}
+    # the cancelled primary is not an error, and the inner calls keep the node label
+    assert errors == {"primary": 0, "secondary": 0}
+    latency_labels = {"node": "hedge_latency", "model": "acme/hedge_latency-secondary"}
+    assert LLM_LATENCY_SECONDS.count(**latency_labels) == 1
+
+
+def test_fast_primary_is_not_hedged():
+    primary = FakeModel(answer="primary")
+    secondary = FakeModel(answer="secondary")
+    model = hedge("hedge_fast", primary, secondary, hedge_after_seconds=1)
+
+    assert run_hedged(model, "hedge_fast").content == "primary"
+    hedges, wins, _ = counts("hedge_fast")
+    assert hedges == {"latency": 0, "error": 0}
+    assert wins == {"primary": 0, "secondary": 0}
+
+
+def test_failing_primary_falls_back():
+    primary = FakeModel(answer="primary", error=RateLimitError("slow down"))
+    secondary = FakeModel(answer="secondary")
+    model = hedge("hedge_error", primary, secondary, hedge_after_seconds=1)
+
+    assert run_hedged(model, "hedge_error").content == "secondary"
+    assert model.invoke("hi").content == "secondary"
+    hedges, wins, errors = counts("hedge_error")
+    assert hedges == {"latency": 0, "error": 2}
+    assert wins == {"primary": 0, "secondary": 2}
+    assert errors["primary"] == 1
+
+
+def test_both_models_failing_raises():
+    primary = FakeModel(answer="primary", error=RateLimitError("primary down"))
+    secondary = FakeModel(answer="secondary", error=RateLimitError("secondary down"))
+    model = hedge("hedge_both", primary, secondary)
+
+    with pytest.raises(RateLimitError, match="secondary down"):
+        run_hedged(model, "hedge_both")
+    _, wins, errors = counts("hedge_both")
+    assert wins == {"primary": 0, "secondary": 0}
+    assert errors == {"primary": 1, "secondary": 1}
+
+
+def test_other_errors_are_not_hedged():
+    primary = FakeModel(answer="primary", error=ValueError("bad request"))
+    secondary = FakeModel(answer="secondary")
+    model = hedge("hedge_other", primary, secondary)
+
+    with pytest.raises(ValueError, match="bad request"):
+        run_hedged(model, "hedge_other")
+    hedges, _, _ = counts("hedge_other")
+    assert hedges == {"latency": 0, "error": 0}
@@ -0,0 +1,50 @@
+import asyncio
+import struct
+
+from agents.image_probe import ImageInfo, ImageProbe, parse_image_header
+
+
+def test_parse_png_header():
+    data = b"\x89PNG\r\n\x1a\n" + b"\x00\x00\x00\rIHDR" + struct.pack(">II", 640, 480)
+    assert parse_image_header(data) == ("image/png", 640, 480)
+
+
+def test_parse_gif_header():
+    data = b"GIF89a" + struct.pack("<HH", 32, 16) + b"\x00" * 8
+    assert parse_image_header(data) == ("image/gif", 32, 16)
+
+
+def test_parse_jpeg_header():
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHH", 17, 8, 720, 1280) + b"\x00" * 10
+    data = b"\xff\xd8" + app0 + sof0
+    assert parse_image_header(data) == ("image/jpeg", 1280, 720)
+
+
+def test_parse_truncated_and_unknown_headers():
+    assert parse_image_header(b"\xff\xd8\xff\xe0") == ("image/jpeg", None, None)
+    assert parse_image_header(b"<html><body>") == (None, None, None)
+    assert parse_image_header(b'<?xml version="1.0"?><svg xmlns="...">')[0] == "image/svg+xml"
+
+
+def test_failed_probes_are_not_kept_for_the_full_ttl():
+    probe = ImageProbe(ttl_seconds=3600, failure_ttl_seconds=0)
+    calls = []
+
+    async def fetch(url):
+        calls.append(url)
+        return ImageInfo(url=url, ok=not url.endswith("broken.png"))
+
+    probe._fetch = fetch
+
+    async def run():
+        for _ in range(2):
+            await probe.probe("https://example.com/ok.png")
+            await probe.probe("https://example.com/broken.png")
+
+    asyncio.run(run())
+    assert calls == [
+        "https://example.com/ok.png",
+        "https://example.com/broken.png",
+        "https://example.com/broken.png",
+    ]
@@ -0,0 +1,151 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from agents import image_store
+from agents.image_store import ImageStore, gc, hash_file
+
+
+class FakeRepository:
+    def __init__(self):
+        self.images = {}
+
+    async def ensure_image_indexes(self):
+        pass
+
+    async def find_image_by_url(self, url):
+        return next((i for i in self.images.values() if url in i["urls"]), None)
+
+    async def add_image_reference(self, sha256, url, document=None):
+        image = self.images.setdefault(
+            sha256, {"_id": sha256, "urls": [], "refcount": 0, **(document or {})}
+        )
+        if url not in image["urls"]:
+            image["urls"].append(url)
+        image["refcount"] += 1
+
+
+class FakeCollection:
+    def __init__(self, documents):
+        self.documents = {doc["_id"]: doc for doc in documents}
+
+    def find(self, query=None, projection=None):
+        return list(self.documents.values())
+
+    def update_one(self, query, update):
+        self.documents[query["_id"]].update(update["$set"])
+
+    def delete_one(self, query):
+        doc = self.documents.get(query["_id"])
+        deleted = doc is not None and doc.get("refcount") == query["refcount"]
+        if deleted:
+            del self.documents[query["_id"]]
+        return SimpleNamespace(deleted_count=int(deleted))
+
+    def aggregate(self, pipeline):
+        counts = {}
+        for doc in self.documents.values():
+            if "image_hash" in doc:
+                counts[doc["image_hash"]] = counts.get(doc["image_hash"], 0) + 1
+        return [{"_id": key, "count": count} for key, count in counts.items()]
+
+    def distinct(self, field):
+        return list({doc[field] for doc in self.documents.values() if field in doc})
+
+
+def make_store(tmp_path, monkeypatch, content):
+    repository = FakeRepository()
+    downloads = []
+
+    async def download_to_file(url, path, max_bytes, timeout_seconds):
+        downloads.append(url)
+        with open(path, "wb") as f:
+            f.write(content[url])
+        return len(content[url])
+
+    monkeypatch.setattr(image_store, "get_repository", lambda config: repository)
+    monkeypatch.setattr(image_store, "download_to_file", download_to_file)
+    config = SimpleNamespace(image_download_max_mb=1, image_download_timeout_seconds=5)
+    return ImageStore(str(tmp_path), config), repository, downloads
+
+
+def test_store_keys_files_on_content(tmp_path, monkeypatch):
+    content = {"https://a/x.png": b"same bytes", "https://b/x.jpg": b"same bytes"}
+    store, repository, downloads = make_store(tmp_path, monkeypatch, content)
+
+    async def run():
+        first = await store.store_url("https://a/x.png", "image/png")
+        second = await store.store_url("https://b/x.jpg", "image/jpeg")
+        again = await store.store_url("https://a/x.png", "image/png")
+        return first, second, again
+
+    first, second, again = asyncio.run(run())
+    assert first == second == again
+    assert os.path.basename(first["image_path"]) == first["image_hash"]
+    assert hash_file(first["image_path"]) == first["image_hash"]
+    # the repeated URL is served from the index without downloading it again
+    assert downloads == ["https://a/x.png", "https://b/x.jpg"]
+    image = repository.images[first["image_hash"]]
+    assert image["refcount"] == 3
+    assert image["urls"] == ["https://a/x.png", "https://b/x.jpg"]
+    assert not os.listdir(tmp_path / "tmp")
+
+
+def test_gc_reconciles_refcounts_and_deletes_unreferenced(tmp_path, monkeypatch):
+    old = datetime.now() - timedelta(days=2)
+    paths = {}
+    for name in ("kept", "unreferenced", "recent", "orphan"):
+        paths[name] = str(tmp_path / name)
+        with open(paths[name], "wb") as f:
+            f.write(name.encode())
+        os.utime(paths[name], (old.timestamp(), old.timestamp()))
+    images = FakeCollection(
+        [
+            {"_id": "kept", "path": paths["kept"], "refcount": 5, "created_date": old},
+            {
+                "_id": "unreferenced",
+                "path": paths["unreferenced"],
+                "refcount": 1,
+                "created_date": old,
+            },
+            {
+                "_id": "recent",
+                "path": paths["recent"],
+                "refcount": 0,
+                "created_date": datetime.now(),
+            },
+        ]
+    )
+    posts = FakeCollection(
+        [
+            {"_id": 1, "image_hash": "kept", "image_path": paths["kept"]},
+            {"_id": 2, "image_hash": "kept", "image_path": paths["kept"]},
+        ]
+    )
+    config = SimpleNamespace(
+        mongo_db="db",
+        mongo_collection_linkedin_posts="posts",
+        mongo_collection_images="images",
+    )
+    monkeypatch.setattr(
+        image_store,
+        "get_mongo_client",
+        lambda config: {"db": {"posts": posts, "images": images}},
+    )
+
+    assert gc(config, str(tmp_path), timedelta(hours=24), dry_run=True) == {
+        "referenced": 1,
+        "deleted": 1,
+        "orphaned_files": 1,
+    }
+    assert all(os.path.exists(path) for path in paths.values())
+
+    assert gc(config, str(tmp_path), timedelta(hours=24)) == {
+        "referenced": 1,
+        "deleted": 1,
+        "orphaned_files": 1,
+    }
+    assert images.documents["kept"]["refcount"] == 2
+    assert set(images.documents) == {"kept", "recent"}
+    assert sorted(os.listdir(tmp_path)) == ["kept", "recent"]
@@ -0,0 +1,87 @@
+import asyncio
+import json
+from uuid import uuid4
+
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from agents.cache import DiskCache, LLMResponseCache
+from agents.chat_models import RateLimitedChatModel
+from agents.configuration import BaseConfiguration
+from agents.instrumentation import (
+    LLM_CACHE_HITS_TOTAL,
+    LLM_LATENCY_SECONDS,
+    LLM_TOKENS_TOTAL,
+    LLM_TTFT_SECONDS,
+    LLMMetricsHandler,
+)
+from agents.rate_limit import ProviderLimiter
+
+
+def _call(handler, thread_id, node="generate_post"):
+    run_id = uuid4()
+    handler.on_chat_model_start(
+        {}, [], run_id=run_id, metadata={"langgraph_node": node, "thread_id": thread_id}
+    )
+    message = AIMessage(
+        "ok", usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+    )
+    handler.on_llm_end(
+        LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id
+    )
+
+
+def test_run_summaries_are_opt_in():
+    assert BaseConfiguration().metrics_dir == ""
+
+
+def test_run_summary_accumulates_calls(tmp_path):
+    handler = LLMMetricsHandler("openai/gpt-4o-mini", summary_dir=str(tmp_path))
+    _call(handler, "thread-1")
+    _call(handler, "thread-1")
+
+    summary = json.loads((tmp_path / "thread-1.json").read_text())
+    entry = summary["nodes"]["generate_post|openai/gpt-4o-mini"]
+    assert entry["calls"] == 2
+    assert entry["input_tokens"] == 20
+    assert entry["output_tokens"] == 10
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_cached_responses_are_counted_separately(tmp_path):
+    model_name = "acme/cached-model"
+    handler = LLMMetricsHandler(model_name)
+    usage = {"input_tokens": 3, "output_tokens": 2, "total_tokens": 5}
+    model = GenericFakeChatModel(
+        messages=iter([AIMessage("fresh", usage_metadata=usage)]),
+        cache=LLMResponseCache(DiskCache(str(tmp_path / "cache.sqlite"), max_bytes=10**6)),
+        callbacks=[handler],
+    )
+    config = {"metadata": {"langgraph_node": "cached_node"}}
+    labels = {"node": "cached_node", "model": model_name}
+
+    assert model.invoke("hi", config=config).content == "fresh"
+    replayed = model.invoke("hi", config=config)
+    assert replayed.content == "fresh"
+    assert replayed.response_metadata["cached"] is True
+    assert LLM_CACHE_HITS_TOTAL.value(**labels) == 1
+    assert LLM_LATENCY_SECONDS.count(**labels) == 1
+    assert LLM_TOKENS_TOTAL.value(direction="input", **labels) == 3
+
+
+def test_streaming_through_the_rate_limiter_records_ttft():
+    model_name = "acme/streaming-model"
+    handler = LLMMetricsHandler(model_name)
+    model = RateLimitedChatModel(
+        chat_model=GenericFakeChatModel(messages=iter([AIMessage("one two three")])),
+        limiter=ProviderLimiter("acme"),
+        callbacks=[handler],
+    )
+    config = {"metadata": {"langgraph_node": "streaming_node"}}
+
+    async def run():
+        return [chunk async for chunk in model.astream("hi", config=config)]
+
+    assert len(asyncio.run(run())) > 1
+    assert LLM_TTFT_SECONDS.count(node="streaming_node", model=model_name) == 1
@@ -0,0 +1,31 @@
+from agents.metrics import counter, histogram, render_metrics
+
+
+def test_counter_render():
+    calls = counter("test_calls_total", "Calls made in tests.", labels=("node",))
+    calls.inc(node="generate_post")
+    calls.inc(2, node="generate_post")
+    assert calls.value(node="generate_post") == 3
+    assert 'test_calls_total{node="generate_post"} 3' in render_metrics()
+
+
+def test_histogram_render():
+    latency = histogram(
+        "test_latency_seconds", "Latency in tests.", labels=("node",), buckets=(1, 5)
+    )
+    latency.observe(0.5, node="condense_post")
+    latency.observe(3, node="condense_post")
+    latency.observe(10, node="condense_post")
+    assert latency.count(node="condense_post") == 3
+    rendered = render_metrics()
+    assert "# TYPE test_latency_seconds histogram" in rendered
+    assert 'test_latency_seconds_bucket{node="condense_post",le="1"} 1' in rendered
+    assert 'test_latency_seconds_bucket{node="condense_post",le="5"} 2' in rendered
+    assert 'test_latency_seconds_bucket{node="condense_post",le="+Inf"} 3' in rendered
+    assert 'test_latency_seconds_sum{node="condense_post"} 13.5' in rendered
+
+
+def test_label_values_are_escaped():
+    errors = counter("test_errors_total", "Errors in tests.", labels=("reason",))
+    errors.inc(reason='bad "quote"')
+    assert 'test_errors_total{reason="bad \\"quote\\""} 1' in render_metrics()
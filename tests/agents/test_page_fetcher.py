@@ -0,0 +1,149 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+
+from agents import page_fetcher
+from agents.page_fetcher import fetch_page, html_to_markdown
+
+HTML = """
+<html>
+<head>
+<title>Fallback title</title>
+<meta property="og:title" content="Launch day">
+<meta property="og:image" content="/images/cover.png">
+</head>
+<body>
+<nav><a href="/">Home</a></nav>
+<article>
+<h1>Launch day</h1>
+<p>We shipped <strong>version 2</strong> today. Read the <a href="/docs">docs</a>.</p>
+<img src="diagram.png" alt="Architecture">
+<ul><li>Faster</li><li>Smaller</li></ul>
+</article>
+<footer>Copyright</footer>
+<script>track()</script>
+</body>
+</html>
+"""
+
+
+def test_html_to_markdown():
+    markdown, metadata = html_to_markdown(HTML, "https://example.com/blog/launch")
+    assert markdown == (
+        "# Launch day\n\n"
+        "We shipped **version 2** today. Read the [docs](https://example.com/docs).\n\n"
+        "![Architecture](https://example.com/blog/diagram.png)\n\n"
+        "- Faster\n\n"
+        "- Smaller"
+    )
+    assert metadata["title"] == "Launch day"
+    assert metadata["ogImage"] == "https://example.com/images/cover.png"
+    assert metadata["images"] == ["https://example.com/blog/diagram.png"]
+
+
+PARAGRAPHS = "".join(
+    f"<p>Paragraph {i} of the article, long enough to count.</p>" for i in range(20)
+)
+ARTICLE = f"<html><body><article>{PARAGRAPHS}</article></body></html>"
+CONFIG = SimpleNamespace(
+    direct_fetch_enabled=True,
+    direct_fetch_timeout_seconds=5,
+    direct_fetch_min_chars=500,
+    firecrawl_screenshot=False,
+)
+
+
+class FakeResponse:
+    def __init__(self, url, body, status=200):
+        self.url = url
+        self.status = status
+        self.headers = {"Content-Type": "text/html; charset=utf-8"}
+        self.charset = "utf-8"
+        # sent without a length, in small chunks
+        self.content_length = None
+        self.content = SimpleNamespace(iter_chunked=self._iter_chunked)
+        self._body = body.encode()
+
+    async def _iter_chunked(self, size):
+        for i in range(0, len(self._body), 100):
+            yield self._body[i : i + 100]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+
+    def get(self, url, headers, timeout):
+        self.requests.append(url)
+        return FakeResponse(url, self.pages[url])
+
+
+class FakeFireCrawlLoader:
+    loaded = []
+
+    def __init__(self, url, mode, params):
+        self.url = url
+
+    async def aload(self):
+        self.loaded.append(self.url)
+        return [Document(page_content="Rendered page", metadata={"url": self.url})]
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = FakeSession(
+        {
+            "https://static.example.com/post": ARTICLE,
+            "https://app.example.com/post": "<html><body><div id=root></div></body></html>",
+        }
+    )
+    monkeypatch.setattr(page_fetcher, "get_http_session", lambda: session)
+    monkeypatch.setattr(page_fetcher, "FireCrawlLoader", FakeFireCrawlLoader)
+    monkeypatch.setattr(page_fetcher, "_direct_failures", {})
+    FakeFireCrawlLoader.loaded = []
+    return session
+
+
+def test_fetch_page_reads_whole_body_directly(session):
+    [doc] = asyncio.run(fetch_page("https://static.example.com/post", CONFIG))
+    assert doc.metadata["fetch_tier"] == "direct"
+    assert "Paragraph 0 of" in doc.page_content
+    assert "Paragraph 19 of" in doc.page_content
+    assert FakeFireCrawlLoader.loaded == []
+
+
+def test_fetch_page_falls_back_to_firecrawl(session):
+    [doc] = asyncio.run(fetch_page("https://app.example.com/post", CONFIG))
+    assert doc.metadata["fetch_tier"] == "firecrawl"
+    assert doc.page_content == "Rendered page"
+    assert session.requests == ["https://app.example.com/post"]
+
+
+def test_fetch_page_skips_direct_tier_after_repeated_failures(session):
+    async def run():
+        for _ in range(page_fetcher.DIRECT_FAILURES_BEFORE_SKIP + 2):
+            await fetch_page("https://app.example.com/post", CONFIG)
+
+    asyncio.run(run())
+    assert len(session.requests) == page_fetcher.DIRECT_FAILURES_BEFORE_SKIP
+    assert len(FakeFireCrawlLoader.loaded) == (
+        page_fetcher.DIRECT_FAILURES_BEFORE_SKIP + 2
+    )
+    # other domains are still fetched directly
+    [doc] = asyncio.run(fetch_page("https://static.example.com/post", CONFIG))
+    assert doc.metadata["fetch_tier"] == "direct"
+
+
+def test_fetch_direct_rejects_bodies_over_the_cap(session, monkeypatch):
+    monkeypatch.setattr(page_fetcher, "MAX_HTML_BYTES", 1000)
+    url = "https://static.example.com/post"
+    assert asyncio.run(page_fetcher.fetch_direct(url, CONFIG)) is None
@@ -0,0 +1,46 @@
+from agents.prompt_builder import (
+    PROMPT_CACHED_PREFIX_SHARE,
+    CachedPrompt,
+    PromptTemplate,
+    to_system_message,
+)
+from agents.prompts import REPORT_SYSTEM_PROMPT_NEWS
+
+
+def test_static_sections_come_first():
+    template = PromptTemplate("test", "Rules: {rules}\n", "Report: {report}")
+    prompt = template.format(rules="- be brief", report="A report")
+    assert prompt == "Rules: - be brief\nReport: A report"
+    assert prompt.prefix == "Rules: - be brief\n"
+    assert prompt.suffix == "Report: A report"
+    assert 0 < prompt.cached_share < 1
+
+
+def test_prefix_is_reused_across_runs():
+    template = PromptTemplate("test", "Rules: {rules}\n", "Report: {report}")
+    first = template.format(rules="- be brief", report="one")
+    second = template.format(rules="- be brief", report="two")
+    assert first.prefix == second.prefix
+    assert template._render_prefix.cache_info().hits == 1
+
+
+def test_cache_control_only_for_anthropic():
+    prompt = CachedPrompt("static", "dynamic")
+    message = to_system_message(prompt, "anthropic/claude-3-5-sonnet-20240620")
+    assert message.content[0]["cache_control"] == {"type": "ephemeral"}
+    assert message.content[1]["text"] == "dynamic"
+    assert to_system_message(prompt, "openai/gpt-4o").content == "staticdynamic"
+
+
+def test_share_only_reported_for_dynamic_templates():
+    PromptTemplate("test_static", "Rules: {rules}\n").format(rules="- be brief")
+    PromptTemplate("test_dynamic", "Rules\n", "Report: {report}").format(report="A report")
+    assert PROMPT_CACHED_PREFIX_SHARE.count(prompt="test_static") == 0
+    assert PROMPT_CACHED_PREFIX_SHARE.count(prompt="test_dynamic") == 1
+
+
+def test_news_report_prompt_is_cacheable():
+    prompt = REPORT_SYSTEM_PROMPT_NEWS.format()
+    assert isinstance(prompt, CachedPrompt)
+    assert prompt.cached_share == 1
+    assert "news reporter" in prompt
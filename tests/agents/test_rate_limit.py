@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+
+from agents.rate_limit import Lease, ProviderLimiter, get_limiter
+
+
+def test_get_limiter_prefers_model_entry_and_shares_limiters():
+    config = SimpleNamespace(
+        rate_limits={
+            "acme": {"requests_per_minute": 10},
+            "acme/big": {"requests_per_minute": 1},
+        }
+    )
+    assert get_limiter("acme/big", config) is get_limiter("acme/big", config)
+    assert get_limiter("acme/small", config) is get_limiter("acme", config)
+    assert get_limiter("acme/big", config) is not get_limiter("acme", config)
+    assert get_limiter("other/model", config) is None
+
+
+def test_get_limiter_keys_on_limits():
+    slow = SimpleNamespace(rate_limits={"acme-search": {"requests_per_minute": 5}})
+    fast = SimpleNamespace(rate_limits={"acme-search": {"requests_per_minute": 500}})
+    assert get_limiter("acme-search", slow) is not get_limiter("acme-search", fast)
+    assert get_limiter("acme-search", slow) is get_limiter("acme-search", slow)
+
+
+def test_token_bucket_makes_callers_wait():
+    limiter = ProviderLimiter("acme", requests_per_minute=600, poll_interval=0.01)
+    # drain the bucket; it refills at ten requests per second
+    limiter.requests.take(limiter.requests.available)
+    assert limiter.acquire_sync() >= 0.08
+    limiter.release(Lease())
+
+    limiter = ProviderLimiter("acme", tokens_per_minute=6000, poll_interval=0.01)
+    with limiter.slot_sync(100) as lease:
+        lease.record_usage(6000)
+    # the call used far more than its estimate, so the next one waits for the debt
+    assert limiter.tokens.wait_time(100) > 0.9
+    assert limiter.acquire_sync(0) < 0.05
+
+
+def test_in_flight_cap_is_enforced():
+    limiter = ProviderLimiter("acme", max_in_flight=2, poll_interval=0.01)
+    active = []
+    peak = []
+
+    async def call():
+        async with limiter.slot():
+            active.append(1)
+            peak.append(len(active))
+            await asyncio.sleep(0.05)
+            active.pop()
+
+    async def run():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(run())
+    assert max(peak) == 2
+    assert len(peak) == 6
+    assert limiter.in_flight == 0
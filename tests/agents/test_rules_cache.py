@@ -0,0 +1,93 @@
+import queue
+import time
+
+from pymongo.errors import OperationFailure
+
+from agents.rules_cache import RulesCache
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the rules listener")
+        time.sleep(0.01)
+
+
+class FakeStream:
+    def __init__(self):
+        self.changes = queue.Queue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        while (change := self.changes.get()) is not None:
+            yield change
+
+
+class FakeCollection:
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.documents = {}
+
+    def watch(self, full_document):
+        if self.stream is None:
+            raise OperationFailure("The $changeStream stage is only supported on replica sets")
+        return self.stream
+
+    def find_one(self, query, projection):
+        return self.documents.get(query["post_style"])
+
+
+def test_versions_are_checked_without_a_change_stream():
+    collection = FakeCollection()
+    cache = RulesCache(collection, check_seconds=0)
+    wait_for(lambda: cache.generation("default") != (0, 0))
+    assert not cache.listening
+
+    collection.documents["default"] = {"version": 2}
+    cache.put("default", ["new"], 2)
+    # an older read never replaces newer rules
+    cache.put("default", ["old"], 1)
+    assert cache.get("default") == ["new"]
+
+    collection.documents["default"] = {"version": 3}
+    assert cache.get("default") is None
+    assert cache.fresh("default") is None
+
+
+def test_invalidated_reads_are_not_cached():
+    stream = FakeStream()
+    cache = RulesCache(FakeCollection(stream), check_seconds=0)
+    wait_for(lambda: cache.listening)
+
+    cache.put("default", ["v1"], 1)
+    assert cache.fresh("default") == ["v1"]
+
+    # a read starts, then the listener sees the rules change
+    generation = cache.generation("default")
+    news_generation = cache.generation("news")
+    stream.changes.put({"fullDocument": {"post_style": "default", "version": 2}})
+    wait_for(lambda: cache.generation("default") != generation)
+    assert cache.fresh("default") is None
+
+    cache.put("default", ["v1"], 1, generation)
+    assert cache.fresh("default") is None
+    # other post styles are unaffected
+    cache.put("news", ["news rules"], 1, news_generation)
+    assert cache.fresh("news") == ["news rules"]
+    cache.put("default", ["v2"], 2, cache.generation("default"))
+    assert cache.fresh("default") == ["v2"]
+
+    # a stopped listener drops everything and invalidates reads in flight
+    generation = cache.generation("news")
+    stream.changes.put(None)
+    wait_for(lambda: cache.generation("news") != generation)
+    assert not cache.listening
+    assert cache.fresh("news") is None
+    cache.put("news", ["news rules"], 1, generation)
+    assert cache.get("news") is None
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from agents.singleflight import _MISSING, AsyncMemo
+
+
+def test_concurrent_callers_share_one_computation():
+    memo = AsyncMemo()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(
+            *(memo.get_or_compute("key", compute, 60) for _ in range(5))
+        )
+
+    assert asyncio.run(run()) == ["value"] * 5
+    assert len(calls) == 1
+    assert (memo.hits, memo.misses) == (4, 1)
+    # later callers are served from the cache, on any loop
+    assert asyncio.run(memo.get_or_compute("key", compute, 60)) == "value"
+    assert len(calls) == 1
+
+
+def test_failures_and_expired_results_are_recomputed():
+    memo = AsyncMemo()
+    results = iter([RuntimeError("boom"), "first", "second"])
+
+    async def compute():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(memo.get_or_compute("key", compute, 60))
+    assert asyncio.run(memo.get_or_compute("key", compute, 0)) == "first"
+    assert asyncio.run(memo.get_or_compute("key", compute, 60)) == "second"
+
+
+def test_ttl_can_depend_on_the_result():
+    memo = AsyncMemo()
+
+    async def compute():
+        return None
+
+    # a None result is only shared with concurrent callers
+    asyncio.run(
+        memo.get_or_compute("key", compute, lambda value: 0 if value is None else 60)
+    )
+    assert memo.misses == 1
+    asyncio.run(memo.get_or_compute("key", compute, lambda value: 60))
+    asyncio.run(memo.get_or_compute("key", compute, lambda value: 60))
+    assert (memo.hits, memo.misses) == (1, 2)
+
+
+def test_least_recently_used_results_are_evicted():
+    memo = AsyncMemo(max_entries=2)
+    memo.put("a", 1, 60)
+    memo.put("b", 2, 60)
+    memo.get("a")
+    memo.put("c", 3, 60)
+    assert memo.get("a") == 1 and memo.get("c") == 3
+    assert memo.get("b") is _MISSING
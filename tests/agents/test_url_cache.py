@@ -0,0 +1,24 @@
+from langchain_core.documents import Document
+
+from agents.cache import DiskCache
+from agents.url_cache import UrlContentCache, canonicalize_url
+
+
+def test_canonicalize_url():
+    assert (
+        canonicalize_url("HTTPS://Example.com:443/post/?utm_source=x&b=2&a=1#intro")
+        == "https://example.com/post?a=1&b=2"
+    )
+    assert canonicalize_url("http://example.com") == "http://example.com/"
+    assert canonicalize_url("http://example.com:8080/a") == "http://example.com:8080/a"
+
+
+def test_url_content_cache_round_trip(tmp_path):
+    cache = UrlContentCache(DiskCache(str(tmp_path / "urls.sqlite"), max_bytes=1024 * 1024))
+    docs = [Document(page_content="# Title", metadata={"source": "https://example.com/post", "ogImage": "https://example.com/a.png"})]
+    assert cache.get("https://example.com/post", "firecrawl") is None
+
+    cache.put("https://example.com/post/?utm_medium=email", "firecrawl", docs)
+    assert cache.get("https://example.com/post", "firecrawl") == docs
+    assert cache.get("https://example.com/post", "playwright") is None
+    assert cache.hit_rate() == 1 / 3
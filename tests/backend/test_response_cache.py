@@ -0,0 +1,16 @@
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from backend.utils import BoundedSQLiteCache
+
+
+def test_oldest_responses_are_evicted_beyond_the_limit(tmp_path):
+    cache = BoundedSQLiteCache(str(tmp_path / "cache.sqlite"), max_bytes=2000)
+    for index in range(10):
+        cache.update(f"prompt {index}", "llm", [ChatGeneration(message=AIMessage("x" * 300))])
+
+    assert cache.lookup("prompt 0", "llm") is None
+    assert cache.lookup("prompt 9", "llm")[0].message.content == "x" * 300
+    kept = [index for index in range(10) if cache.lookup(f"prompt {index}", "llm")]
+    assert kept == list(range(10 - len(kept), 10))
+    assert 0 < len(kept) < 10